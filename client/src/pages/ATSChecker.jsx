@@ -131,7 +131,8 @@ export default function ATSChecker() {
   const loadPreview = async (filename) => {
     setLoadingPreview(true);
     try {
-      const res  = await fetch('/api/ats/preview', { method:'POST', headers:{'Content-Type':'application/json'}, body:JSON.stringify({ filename }) });
+      // Manifest only — each page image is fetched by its <img> when that page is shown
+      const res  = await fetch('/api/ats/preview', { method:'POST', headers:{'Content-Type':'application/json'}, body:JSON.stringify({ filename, format:'webp' }) });
       const data = await res.json();
       if (data.success && data.pages?.length) { setPreview(data.pages); setCurrentPage(0); }
     } catch { } finally { setLoadingPreview(false); }
@@ -456,8 +457,10 @@ export default function ATSChecker() {
                 ) : preview?.length > 0 ? (
                   <>
                     <div ref={previewRef} className="border border-gray-200 rounded-xl overflow-auto bg-gray-50 max-h-[400px] sm:max-h-[600px] shadow-inner">
-                      <img src={preview[currentPage].image} alt={`Resume page ${currentPage+1}`} className="mx-auto block"
-                        style={{ transform:`scale(${zoom})`, transformOrigin:'top center', transition:'transform 0.2s ease' }} />
+                      <img key={currentPage} src={preview[currentPage].url || preview[currentPage].image} alt={`Resume page ${currentPage+1}`} className="mx-auto block"
+                        width={preview[currentPage].width} height={preview[currentPage].height} decoding="async"
+                        style={{ transform:`scale(${zoom})`, transformOrigin:'top center', transition:'transform 0.2s ease',
+                          ...(preview[currentPage].thumbnail_url && { backgroundImage:`url(${preview[currentPage].thumbnail_url})`, backgroundSize:'100% 100%' }) }} />
                     </div>
                     {hasIssues && (
                       <div className="mt-3 flex items-start gap-2 sm:gap-2.5 rounded-xl p-3 sm:p-3.5 border border-amber-200 bg-amber-50">
@@ -10,6 +10,12 @@ import {
 } from 'lucide-react';
 
 /* ─── helpers ───────────────────────────────────────────────── */
+// Job-mode polling: give up when the batch makes no progress for
+// POLL_STALL_MS, or after POLL_MAX_MS overall
+const POLL_INTERVAL_MS = 1500;
+const POLL_STALL_MS    = 2 * 60 * 1000;
+const POLL_MAX_MS      = 15 * 60 * 1000;
+
 const getScoreConfig = (s) =>
   s >= 85 ? { color:'text-emerald-600', bg:'bg-emerald-50', border:'border-emerald-200', bar:'from-emerald-400 to-emerald-600', pill:'bg-emerald-50 text-emerald-700 ring-emerald-200' }
 : s >= 70 ? { color:'text-blue-600',    bg:'bg-blue-50',    border:'border-blue-200',    bar:'from-blue-400 to-blue-600',       pill:'bg-blue-50 text-blue-700 ring-blue-200'           }
@@ -110,11 +116,39 @@ export default function BatchJobMatcher() {
       const fd = new FormData();
       fd.append('resume', resume);
       jdFiles.forEach(f => fd.append('jds', f));
-      const iv = setInterval(() => setProgress(p => p >= 90 ? p : p + 10), 500);
-      const res = await axios.post('/api/batch/analyze', fd, { headers:{ Authorization:`Bearer ${idToken}` } });
-      clearInterval(iv); setProgress(100);
+      fd.append('mode', 'async');
+      const headers = { Authorization:`Bearer ${idToken}` };
+      const res = await axios.post('/api/batch/analyze', fd, { headers });
       if (!res.data.success) { setError(res.data.error || 'Analysis failed'); return; }
-      setResults(res.data.results);
+
+      // Job mode — poll until every JD has been analysed
+      let data = null;
+      const startedAt = Date.now();
+      let lastCompleted = -1, lastProgressAt = startedAt;
+      while (!data || data.status === 'processing') {
+        await new Promise(r => setTimeout(r, POLL_INTERVAL_MS));
+        const poll = await axios.get(`/api/batch/${res.data.batch_id}`, { headers });
+        data = poll.data.data;
+        setProgress(data.progress?.percent ?? 0);
+
+        const now = Date.now();
+        const completed = data.progress?.completed ?? 0;
+        if (completed !== lastCompleted) { lastCompleted = completed; lastProgressAt = now; }
+        // The server's ETA can stretch the stall window, never past POLL_MAX_MS
+        const etaMs = (data.progress?.eta_seconds ?? 0) * 1000;
+        const stallLimit = Math.max(POLL_STALL_MS, etaMs);
+        if (data.status === 'processing' &&
+            (now - lastProgressAt > stallLimit || now - startedAt > POLL_MAX_MS)) {
+          setError('This batch is taking too long. Please try again in a few minutes.');
+          return;
+        }
+      }
+      if (data.status === 'failed' || !data.results?.length) {
+        setError(data.error || 'No valid job descriptions could be processed.');
+        return;
+      }
+      setProgress(100);
+      setResults(data.results);
     } catch(err) {
       setError(err.response?.data?.error || 'Something went wrong. Please try again.');
     } finally { setLoading(false); }
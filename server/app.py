@@ -1,5 +1,6 @@
 import os
 import sys
+import hmac
 from flask import Flask, request, jsonify, send_from_directory, g
 from flask_cors import CORS
 from dotenv import load_dotenv
@@ -63,7 +64,11 @@ CORS(
 
 # --------------------------------------------------
 # 🔐 Centralised Firebase token verifier
+# Decoded claims are cached until just before `exp`
+# (utils/token_cache.py) — shared with every blueprint.
 # --------------------------------------------------
+from utils.token_cache import verify_id_token, token_cache_stats
+
 def verify_firebase_token(token: str):
     """
     Returns (uid, None) on success.
@@ -75,7 +80,7 @@ def verify_firebase_token(token: str):
     auth.RevokedIdTokenError branch below.
     """
     try:
-        decoded = auth.verify_id_token(
+        decoded = verify_id_token(
             token,
             check_revoked=False,   # ← KEY FIX: was True (or missing) before
         )
@@ -157,12 +162,14 @@ from routes.interview_prep import interview_blueprint
 from routes.ats_checker   import ats_blueprint
 from routes.batch_matcher import batch_blueprint
 from routes.verify_cert   import verify_cert_blueprint  # 🆕 NEW!
+from routes.jd_library    import jd_library_blueprint
 
 app.register_blueprint(upload_blueprint,    url_prefix='/api')
 app.register_blueprint(interview_blueprint, url_prefix='/api')
 app.register_blueprint(ats_blueprint,       url_prefix='/api')
 app.register_blueprint(batch_blueprint,     url_prefix='/api')
 app.register_blueprint(verify_cert_blueprint, url_prefix='/api')  # 🆕 NEW!
+app.register_blueprint(jd_library_blueprint,  url_prefix='/api')
 
 
 # --------------------------------------------------
@@ -210,6 +217,29 @@ def health():
     }), 200
 
 
+# --------------------------------------------------
+# 📊 Metrics — per-process counters/timings (utils/metrics.py)
+# Needs METRICS_TOKEN in .env and a matching Bearer token; with no
+# token configured the endpoint stays off (404) rather than public.
+# --------------------------------------------------
+@app.route("/metrics", methods=["GET"])
+def metrics_snapshot():
+    from utils import metrics
+    from utils.preview_generator import preview_cache_stats
+
+    metrics_token = os.getenv("METRICS_TOKEN", "")
+    if not metrics_token:
+        return jsonify({"error": "Not found"}), 404
+    if not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {metrics_token}"):
+        return jsonify({"error": "Unauthorized"}), 401
+
+    return jsonify({
+        "pid":    os.getpid(),
+        **metrics.snapshot(),
+        "caches": {"preview": preview_cache_stats(), "auth_tokens": token_cache_stats()},
+    }), 200
+
+
 # --------------------------------------------------
 # 🎨 Serve React App — MUST BE LAST (catch-all)
 # --------------------------------------------------
@@ -0,0 +1,192 @@
+# server/benchmarks/bench_batch_store.py
+#
+# Saving and reading a finished batch with FirestoreBatchStore:
+#   - 1 + N sequential set() calls vs one WriteBatch commit
+#   - subcollection layout vs results inline on the parent doc
+# against an in-process fake of the Firestore client that charges
+# a fixed round-trip per RPC and counts document reads. Point
+# FIRESTORE_EMULATOR_HOST at a running emulator and pass
+# --emulator to time the real client instead.
+#
+#   cd server && python benchmarks/bench_batch_store.py [--results 10] [--rtt-ms 40]
+
+import os
+import sys
+import copy
+import time
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.batch_store import FirestoreBatchStore
+
+
+# ======================================================
+# FAKE FIRESTORE (the subset batch_store uses)
+# ======================================================
+
+class FakeSnapshot:
+    def __init__(self, reference, data):
+        self.reference = reference
+        self.id        = reference.id
+        self.exists    = data is not None
+        self._data     = data
+
+    def to_dict(self):
+        return copy.deepcopy(self._data)
+
+
+class FakeDocument:
+    def __init__(self, db, path):
+        self._db  = db
+        self.path = path
+        self.id   = path.rsplit("/", 1)[-1]
+
+    def collection(self, name):
+        return FakeCollection(self._db, f"{self.path}/{name}")
+
+    def set(self, data, merge=False):
+        self._db.rpc()
+        self._db.write(self.path, data, merge)
+
+    def get(self):
+        self._db.rpc(reads=1)
+        return FakeSnapshot(self, self._db.docs.get(self.path))
+
+
+class FakeCollection:
+    def __init__(self, db, path):
+        self._db  = db
+        self.path = path
+
+    def document(self, doc_id):
+        return FakeDocument(self._db, f"{self.path}/{doc_id}")
+
+    def order_by(self, _field):
+        return self
+
+    def stream(self):
+        prefix = self.path + "/"
+        paths  = [p for p in sorted(self._db.docs)
+                  if p.startswith(prefix) and "/" not in p[len(prefix):]]
+        self._db.rpc(reads=max(1, len(paths)))   # empty queries still bill one read
+        for path in paths:
+            yield FakeSnapshot(FakeDocument(self._db, path), self._db.docs[path])
+
+
+class FakeWriteBatch:
+    def __init__(self, db):
+        self._db     = db
+        self._writes = []
+
+    def set(self, doc_ref, data, merge=False):
+        self._writes.append((doc_ref.path, data, merge))
+
+    def delete(self, doc_ref):
+        self._writes.append((doc_ref.path, None, False))
+
+    def commit(self):
+        self._db.rpc()
+        for path, data, merge in self._writes:
+            if data is None:
+                self._db.docs.pop(path, None)
+            else:
+                self._db.write(path, data, merge)
+
+
+class FakeFirestore:
+    """Dict-backed client; every RPC sleeps rtt seconds; RPCs and reads are counted."""
+
+    def __init__(self, rtt=0.04):
+        self.rtt   = rtt
+        self.rpcs  = 0
+        self.reads = 0
+        self.docs  = {}
+
+    def rpc(self, reads=0):
+        self.rpcs  += 1
+        self.reads += reads
+        time.sleep(self.rtt)
+
+    def write(self, path, data, merge):
+        data = copy.deepcopy(data)
+        if merge and path in self.docs:
+            self.docs[path].update(data)
+        else:
+            self.docs[path] = data
+
+    def collection(self, name):
+        return FakeCollection(self, name)
+
+    def batch(self):
+        return FakeWriteBatch(self)
+
+
+# ======================================================
+# RUNNER
+# ======================================================
+
+def make_results(n):
+    return [{"rank": i + 1, "score": 90 - i, "jd_name": f"jd_{i}.pdf",
+             "jd_text": "requirements " * 150, "missing_skills": ["docker", "aws"]}
+            for i in range(n)]
+
+
+def legacy_save(store, batch_id, fields, results):
+    store.create(batch_id, fields)
+    for i, result in enumerate(results):
+        store.add_result(batch_id, i, result)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--results",  type=int,   default=10)
+    parser.add_argument("--rtt-ms",   type=float, default=40)
+    parser.add_argument("--emulator", action="store_true",
+                        help="use google.cloud.firestore against FIRESTORE_EMULATOR_HOST")
+    args = parser.parse_args()
+
+    if args.emulator:
+        from google.cloud import firestore as gcf
+        db = gcf.Client(project=os.getenv("GCLOUD_PROJECT", "demo-jobmorph"))
+    else:
+        db = FakeFirestore(rtt=args.rtt_ms / 1000)
+
+    fields  = {"user_id": "bench", "resume_name": "resume.pdf",
+               "total_jobs": args.results, "top_score": 90, "skipped_count": 0}
+    results = make_results(args.results)
+
+    rows = [
+        ("create + add_result x N (legacy)", "subcollection", legacy_save),
+        ("save_batch, subcollection",         "subcollection", lambda s, b, f, r: s.save_batch(b, f, r)),
+        ("save_batch, inline",                "inline",        lambda s, b, f, r: s.save_batch(b, f, r)),
+    ]
+
+    print(f"📊 {args.results} results" +
+          ("" if args.emulator else f", simulated RTT {args.rtt_ms:g} ms"))
+    print(f"   {'':<34} {'save':>10} {'get':>10}")
+    for n, (label, layout, save) in enumerate(rows):
+        store    = FirestoreBatchStore(db, layout=layout)
+        batch_id = f"bench_{n}"
+
+        rpcs     = getattr(db, "rpcs", 0)
+        start    = time.perf_counter()
+        save(store, batch_id, fields, results)
+        save_ms  = (time.perf_counter() - start) * 1000
+        writes   = getattr(db, "rpcs", 0) - rpcs
+
+        reads    = getattr(db, "reads", 0)
+        start    = time.perf_counter()
+        saved    = store.get(batch_id)
+        get_ms   = (time.perf_counter() - start) * 1000
+        reads    = getattr(db, "reads", 0) - reads
+
+        # Subcollection docs come back in document-id (string) order
+        assert saved and sorted(saved["results"], key=lambda r: r["rank"]) == results
+
+        note = "" if args.emulator else f"  ({writes} write RPCs, {reads} doc reads)"
+        print(f"   {label:<34} {save_ms:7.1f} ms {get_ms:7.1f} ms{note}")
+
+
+if __name__ == "__main__":
+    main()
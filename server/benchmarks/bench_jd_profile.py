@@ -0,0 +1,110 @@
+# server/benchmarks/bench_jd_profile.py
+#
+# "Edit the resume, re-run the same batch": the JD-side work of a
+# batch (extract → profile → prompt build) for N PDF JDs, first
+# with cold caches, then re-run with a different resume each time.
+# Prints the per-stage StageTimings for the cold run and the
+# average warm run. Gemini itself is not called.
+#
+#   cd server && python benchmarks/bench_jd_profile.py [--jds 10] [--reruns 5]
+
+import os
+import io
+import sys
+import random
+import argparse
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Fresh, throwaway cache dir — must be set before the utils import
+os.environ["JOBMORPH_CACHE_DIR"] = tempfile.mkdtemp(prefix="bench_jd_profile_")
+
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+
+from utils.metrics import StageTimings
+from utils.jd_profile import extract_jd_text, get_jd_profile, prompt_clean
+from utils.prompt_budget import budget_prompt_inputs
+
+
+# ======================================================
+# SYNTHETIC INPUT
+# ======================================================
+
+SKILLS = ["Python", "Django", "PostgreSQL", "Docker", "Kubernetes", "AWS", "React", "TypeScript",
+          "REST API", "Git", "Linux", "machine learning", "PyTorch", "LangChain", "SQL", "GCP"]
+
+BOILERPLATE = [
+    "About Us:", "We are a fast growing company building tools people love.",
+    "Benefits:", "- Health, dental and vision insurance", "- Flexible remote work",
+    "We are an equal opportunity employer without regard to race, age or gender.",
+]
+
+
+def make_jd_pdf(rng, n_lines=90):
+    lines = ["Senior Software Engineer", "Requirements:"]
+    for _ in range(n_lines):
+        picked = rng.sample(SKILLS, 3)
+        lines.append(f"- Hands-on experience with {picked[0]}, {picked[1]} and {picked[2]} in production")
+    lines += ["Responsibilities:", "- Own services end to end", "- Mentor engineers"] + BOILERPLATE * 3
+
+    buffer = io.BytesIO()
+    pdf    = canvas.Canvas(buffer, pagesize=letter)
+    y      = 750
+    for line in lines:
+        pdf.drawString(40, y, line)
+        y -= 14
+        if y < 40:
+            pdf.showPage()
+            y = 750
+    pdf.save()
+    return buffer.getvalue()
+
+
+def make_resume(rng):
+    return "\n".join(f"- Built systems with {', '.join(rng.sample(SKILLS, 4))}" for _ in range(25))
+
+
+# ======================================================
+# RUNNER
+# ======================================================
+
+def jd_side(resume, jd_files, timings):
+    for name, data in jd_files:
+        jd_text = extract_jd_text(data, filename=name, timings=timings)
+        profile = get_jd_profile(jd_text, timings)
+        if profile["is_technical"]:
+            with timings.stage("prompt"):
+                budget_prompt_inputs(resume, jd_text, jd_clean=prompt_clean(profile), label="bench")
+
+
+def print_stages(title, stages, runs=1):
+    print(f"📊 {title}")
+    print(f"   {'stage':<12} {'ms':>9} {'memo hits':>10} {'saved ms':>9}")
+    for name, s in stages.items():
+        print(f"   {name:<12} {s['ms'] / runs:9.2f} {s['memoized'] / runs:10.1f} {s['saved_ms'] / runs:9.2f}")
+    print(f"   {'total':<12} {sum(s['ms'] for s in stages.values()) / runs:9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jds", type=int, default=10)
+    parser.add_argument("--reruns", type=int, default=5)
+    args = parser.parse_args()
+
+    rng      = random.Random(3)
+    jd_files = [(f"jd{i}.pdf", make_jd_pdf(rng)) for i in range(args.jds)]
+
+    cold = StageTimings("bench_cold")
+    jd_side(make_resume(rng), jd_files, cold)
+    print_stages(f"cold run — {args.jds} PDF JDs", cold.as_dict()["stages"])
+
+    warm = StageTimings("bench_warm")
+    for _ in range(args.reruns):
+        jd_side(make_resume(rng), jd_files, warm)
+    print_stages(f"re-run with an edited resume (avg of {args.reruns})", warm.as_dict()["stages"], args.reruns)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# server/benchmarks/bench_match_engine.py
+#
+# One resume against N JDs: the per-pair calculate_match_score loop
+# vs utils/match_engine (encode every JD once, score all in one call).
+# "score only" is the saved-JD case — the JD matrix is already encoded.
+# Every run checks the engine's scores against the per-pair loop.
+#
+#   cd server && python benchmarks/bench_match_engine.py [--sizes 10 1000 100000] [--pair-limit 20000]
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+
+from utils.matcher import SKILL_SET, calculate_match_score
+from utils import match_engine
+
+
+# ======================================================
+# SYNTHETIC INPUT
+# ======================================================
+
+FILLER = ("We are looking for an engineer to join a fast moving team and own "
+          "services end to end with strong communication and project delivery").split()
+
+SKILLS = sorted(SKILL_SET)
+
+
+def make_text(rng, n_skills, n_words=120):
+    words = [rng.choice(FILLER) for _ in range(n_words)]
+    for skill in rng.sample(SKILLS, n_skills):
+        words.insert(rng.randrange(len(words) + 1), skill)
+    return " ".join(words)
+
+
+def make_jds(n, seed=7):
+    rng = random.Random(seed)
+    return [make_text(rng, rng.randint(0, 12)) for _ in range(n)]
+
+
+# ======================================================
+# RUNNER
+# ======================================================
+
+def per_pair(resume, jds):
+    return [calculate_match_score(resume, jd) for jd in jds]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 100000])
+    parser.add_argument("--pair-limit", type=int, default=20000,
+                        help="time the per-pair loop on at most this many JDs and extrapolate")
+    args = parser.parse_args()
+
+    resume = make_text(random.Random(1), 10, n_words=300) + " project project"
+
+    print(f"📊 vocabulary: {len(match_engine.VOCABULARY)} terms")
+    print(f"   {'JDs':>7} {'per-pair loop':>15} {'encode+score':>14} {'score only':>12} {'speedup*':>9}")
+    for n in args.sizes:
+        jds = make_jds(n)
+
+        sample = jds[:min(n, args.pair_limit)]
+        start  = time.perf_counter()
+        pairs  = per_pair(resume, sample)
+        pair_s = (time.perf_counter() - start) * n / len(sample)
+
+        start   = time.perf_counter()
+        matrix  = match_engine.encode_many(jds)
+        encode_s = time.perf_counter() - start
+
+        start   = time.perf_counter()
+        scores  = match_engine.score_matrix(resume, matrix)
+        score_s = time.perf_counter() - start
+
+        expected = np.array([p["final_score"] for p in pairs])
+        assert np.allclose(scores["final_score"][:len(sample)], expected, atol=0.011), "score mismatch"
+        for row in range(min(len(sample), 200)):
+            assert match_engine.match_result(scores, matrix, row)["missing_skills"] == pairs[row]["missing_skills"]
+
+        note = "" if len(sample) == n else f"  (loop timed on {len(sample)}, extrapolated)"
+        print(f"   {n:>7} {pair_s * 1000:12.1f} ms {(encode_s + score_s) * 1000:11.1f} ms "
+              f"{score_s * 1000:9.2f} ms {pair_s / score_s:8.0f}x{note}")
+
+    print("   * speedup = per-pair loop / score only (JDs already encoded)")
+
+
+if __name__ == "__main__":
+    main()
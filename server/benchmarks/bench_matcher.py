@@ -0,0 +1,129 @@
+# server/benchmarks/bench_matcher.py
+#
+# Micro-benchmark: compiled single-pass scanner vs the old
+# regex-per-term loops in utils/matcher.py.
+#
+#   cd server && python benchmarks/bench_matcher.py [--words 4000] [--repeat 20]
+
+import os
+import re
+import sys
+import time
+import random
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.matcher import (
+    SKILL_SET, DOMAIN_KEYWORDS, TECHNICAL_TERMS,
+    normalize_text, scan_text, calculate_match_score,
+)
+
+
+# ======================================================
+# LEGACY IMPLEMENTATION (regex built + searched per term, per call)
+# ======================================================
+
+def _legacy_patterns():
+    patterns = []
+    for term in TECHNICAL_TERMS:
+        alternatives = term if isinstance(term, tuple) else (term,)
+        patterns.append("|".join(
+            r"\b" + ".?".join(map(re.escape, alt.split("~"))) + r"\b" for alt in alternatives
+        ))
+    return patterns
+
+
+LEGACY_TECH_PATTERNS = _legacy_patterns()
+
+
+def legacy_extract_skills(text):
+    normalized = normalize_text(text)
+    return {
+        skill for skill in SKILL_SET
+        if re.search(r"\b" + re.escape(skill) + r"\b", normalized)
+    }
+
+
+def legacy_detect_domain(text):
+    normalized = normalize_text(text)
+    scores = {
+        domain: sum(1 for kw in keywords
+                    if re.search(r"\b" + re.escape(kw) + r"\b", normalized))
+        for domain, keywords in DOMAIN_KEYWORDS.items()
+    }
+    best = max(scores, key=scores.get)
+    return best if scores[best] > 0 else "unknown"
+
+
+def legacy_technical_hits(text):
+    normalized = normalize_text(text)
+    return sum(1 for p in LEGACY_TECH_PATTERNS if re.search(p, normalized))
+
+
+def legacy_match_score_scans(resume_text, jd_text):
+    """The scans the old calculate_match_score did (normalize + 5 rescans)."""
+    r, j = normalize_text(resume_text), normalize_text(jd_text)
+    legacy_extract_skills(r), legacy_extract_skills(j)
+    legacy_detect_domain(r), legacy_detect_domain(j)
+    legacy_extract_skills(jd_text), legacy_extract_skills(normalize_text(resume_text))
+    re.findall(r"\bproject\b", normalize_text(resume_text))
+
+
+# ======================================================
+# SYNTHETIC INPUT
+# ======================================================
+
+FILLER = (
+    "led team delivered project across stakeholders improved latency "
+    "designed implemented owned roadmap mentored engineers reviewed code "
+    "collaborated with product analytics customers shipped features"
+).split()
+
+
+def make_resume(n_words, seed=0):
+    rng   = random.Random(seed)
+    terms = sorted(SKILL_SET) + ["Full-Stack", "CI/CD", "Power BI", "fine-tuning"]
+    words = [rng.choice(terms) if rng.random() < 0.08 else rng.choice(FILLER)
+             for _ in range(n_words)]
+    return " ".join(words)
+
+
+def timeit(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--words",  type=int, default=4000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    resume = make_resume(args.words, seed=1)
+    jd     = make_resume(max(args.words // 4, 50), seed=2)
+
+    # Sanity: both paths must agree before timing means anything
+    scan = scan_text(resume)
+    assert scan["skills"] == legacy_extract_skills(resume)
+    assert scan["technical_hits"] == legacy_technical_hits(resume)
+
+    legacy_all = lambda: (legacy_extract_skills(resume), legacy_detect_domain(resume),
+                          legacy_technical_hits(resume))
+    rows = [
+        ("skills + domain + tech (legacy)", legacy_all),
+        ("scan_text (single pass)",         lambda: scan_text(resume)),
+        ("match score scans (legacy)",      lambda: legacy_match_score_scans(resume, jd)),
+        ("calculate_match_score",           lambda: calculate_match_score(resume, jd)),
+    ]
+
+    print(f"📊 resume={len(resume.split())} words, jd={len(jd.split())} words, "
+          f"repeat={args.repeat}")
+    for label, fn in rows:
+        print(f"   {label:<34} {timeit(fn, args.repeat):8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
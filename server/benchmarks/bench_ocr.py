@@ -0,0 +1,166 @@
+# server/benchmarks/bench_ocr.py
+#
+# Offline check of the scanned-PDF OCR path: extract_from_pdf_ocr()
+# against VisionOCRBackend(client=fake), so no Vision credentials
+# or network are needed. The fake client answers each page with
+# "PAGE <n>" after a fixed latency. Scenarios:
+#   - all pages: text comes back in page order, pages overlap
+#   - deadline:  one slow page → partial result, the rest in order
+#   - page error: one failing page → dropped, result marked partial
+#   - quota:     a quota error fails the whole document
+# Prints wall time vs the serial estimate; exits 1 if a check fails.
+#
+#   cd server && python benchmarks/bench_ocr.py [--pages 8] [--latency 0.2]
+
+import os
+import io
+import sys
+import time
+import types
+import hashlib
+import argparse
+import tempfile
+import threading
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Fresh, throwaway cache dir — must be set before the utils import
+os.environ["JOBMORPH_CACHE_DIR"] = tempfile.mkdtemp(prefix="bench_ocr_")
+
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+
+from utils import extract_text as et
+
+
+# ======================================================
+# SYNTHETIC INPUT
+# ======================================================
+
+def make_scanned_pdf(n_pages):
+    buffer = io.BytesIO()
+    pdf    = canvas.Canvas(buffer, pagesize=letter)
+    for page in range(n_pages):
+        pdf.setFont("Helvetica", 28)
+        pdf.drawString(60, 700, f"Scanned page {page}")
+        pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+
+def page_fingerprints(pdf_bytes, backend):
+    """sha256 of each page's OCR payload → page number, rendered the way OCR renders it."""
+    document = et.fitz.open(stream=pdf_bytes, filetype="pdf")
+    try:
+        return {
+            hashlib.sha256(backend.prepare(document[n].get_pixmap(dpi=et.OCR_DPI))).hexdigest(): n
+            for n in range(len(document))
+        }
+    finally:
+        document.close()
+
+
+# ======================================================
+# FAKE VISION CLIENT
+# ======================================================
+
+class FakeVisionClient:
+    """Stands in for vision.ImageAnnotatorClient — only text_detection()."""
+
+    def __init__(self, pages, latency, slow=None, errors=None):
+        self.pages   = pages           # payload fingerprint → page number
+        self.latency = latency
+        self.slow    = slow or {}      # page → latency override
+        self.errors  = errors or {}    # page → Vision error message
+        self.active  = 0
+        self.peak    = 0
+        self._lock   = threading.Lock()
+
+    def text_detection(self, image):
+        content = getattr(image, "content", image)   # vision.Image when installed
+        page    = self.pages[hashlib.sha256(content).hexdigest()]
+
+        with self._lock:
+            self.active += 1
+            self.peak    = max(self.peak, self.active)
+        try:
+            time.sleep(self.slow.get(page, self.latency))
+        finally:
+            with self._lock:
+                self.active -= 1
+
+        return types.SimpleNamespace(
+            error=types.SimpleNamespace(message=self.errors.get(page, "")),
+            text_annotations=[types.SimpleNamespace(description=f"PAGE {page}")],
+        )
+
+
+# ======================================================
+# RUNNER
+# ======================================================
+
+def run(pdf_bytes, client, deadline_seconds=None):
+    notes   = {}
+    started = time.perf_counter()
+    try:
+        text  = et.extract_from_pdf_ocr(pdf_bytes, backend=et.VisionOCRBackend(client=client),
+                                        notes=notes, deadline_seconds=deadline_seconds)
+        error = None
+    except Exception as e:
+        text, error = None, e
+    pages = [int(n) for n in (text or "").split()[1::2]]
+    return pages, notes, error, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.2)
+    args = parser.parse_args()
+
+    n_pages   = min(args.pages, et.MAX_OCR_PAGES)
+    pdf_bytes = make_scanned_pdf(n_pages)
+    pages     = page_fingerprints(pdf_bytes, et.VisionOCRBackend(client=object()))
+    every     = list(range(n_pages))
+    failures  = []
+
+    def check(name, ok, detail):
+        print(f"{'✅' if ok else '❌'} {name:<11} {detail}")
+        if not ok:
+            failures.append(name)
+
+    # ── All pages, in order, overlapping ─────────────────────
+    client = FakeVisionClient(pages, args.latency)
+    got, notes, error, elapsed = run(pdf_bytes, client)
+    check("page order", error is None and got == every and not notes.get("partial"),
+          f"{elapsed:.2f}s vs {n_pages * args.latency:.2f}s serial, "
+          f"{client.peak} call(s) in flight, pages {got}")
+
+    # ── Deadline: the slow page is dropped, result partial ───
+    slow_page = n_pages // 2
+    deadline  = args.latency * 4
+    client    = FakeVisionClient(pages, args.latency, slow={slow_page: deadline * 3})
+    got, notes, error, elapsed = run(pdf_bytes, client, deadline_seconds=deadline)
+    check("deadline", error is None and notes.get("partial") and slow_page not in got
+          and got == sorted(got) and elapsed < deadline * 2,
+          f"{elapsed:.2f}s with a {deadline:g}s deadline, partial={notes.get('partial')}, pages {got}")
+
+    # ── A failing page is dropped, result partial ────────────
+    client = FakeVisionClient(pages, args.latency, errors={1: "Bad image data"})
+    got, notes, error, elapsed = run(pdf_bytes, client)
+    check("page error", error is None and notes.get("partial") and got == [p for p in every if p != 1],
+          f"partial={notes.get('partial')}, pages {got}")
+
+    # ── Quota errors fail the whole document ─────────────────
+    client = FakeVisionClient(pages, args.latency, errors={1: "Quota exceeded for quota metric"})
+    got, notes, error, elapsed = run(pdf_bytes, client)
+    check("quota", error is not None and "quota" in str(error).lower(),
+          f"raised {type(error).__name__}: {error}")
+
+    if failures:
+        print(f"❌ {len(failures)} check(s) failed: {', '.join(failures)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
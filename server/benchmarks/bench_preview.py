@@ -0,0 +1,133 @@
+# server/benchmarks/bench_preview.py
+#
+# Per-page preview rendering: the old PNG round-trip pipeline
+# (pixmap → PNG → PIL decode → copy → PNG save) vs render_pdf_page
+# (raw samples → draw in place → one encode).
+# Each variant runs in its own process so peak RSS is comparable.
+#
+#   cd server && python benchmarks/bench_preview.py [--pages 3] [--dpi 150 300] [--repeat 3]
+
+import os
+import sys
+import time
+import resource
+import argparse
+import multiprocessing
+from io import BytesIO
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import fitz
+from PIL import Image, ImageDraw
+
+from utils.preview_generator import render_pdf_page
+
+
+# ======================================================
+# LEGACY IMPLEMENTATION (two PNG encodes, one decode, one copy)
+# ======================================================
+
+def legacy_render_pdf_page(page, page_issues, dpi, fmt="png"):
+    mat = fitz.Matrix(dpi/72, dpi/72)
+    pix = page.get_pixmap(matrix=mat)
+
+    img = Image.open(BytesIO(pix.tobytes("png")))
+    img_with_highlights = img.copy()
+    draw = ImageDraw.Draw(img_with_highlights, 'RGBA')
+
+    for loc in page_issues:
+        box = [loc['x1'], loc['y1'], loc['x2'], loc['y2']]
+        draw.rectangle(box, outline='red', width=8)
+        draw.rectangle(box, fill=(255, 0, 0, 30))
+        draw.text((loc['x1'], loc['y1'] - 35), loc['label'], fill='white')
+
+    buffered = BytesIO()
+    img_with_highlights.save(buffered, format="PNG", quality=95)
+    return buffered.getvalue(), img_with_highlights.width, img_with_highlights.height
+
+
+# ======================================================
+# SYNTHETIC INPUT
+# ======================================================
+
+LINE = "Senior Software Engineer — Python, React, AWS, Kubernetes, CI/CD pipelines, 6 years"
+
+
+def make_pdf(n_pages):
+    doc = fitz.open()
+    for page_num in range(n_pages):
+        page = doc.new_page()
+        for row in range(45):
+            page.insert_text((50, 60 + row * 16), f"{LINE} ({page_num}.{row})", fontsize=9)
+        page.draw_rect(fitz.Rect(50, 500, 545, 620), color=(0, 0, 0))
+    return doc.tobytes()
+
+
+def make_issues(dpi):
+    scale = dpi / 72
+    return [{
+        'page': 0, 'type': 'table', 'label': '🔴 TABLE',
+        'x1': int(50 * scale), 'y1': int(500 * scale),
+        'x2': int(545 * scale), 'y2': int(620 * scale),
+    }]
+
+
+# ======================================================
+# RUNNER
+# ======================================================
+
+VARIANTS = {
+    "legacy (png round-trip)": legacy_render_pdf_page,
+    "render_pdf_page png":     lambda page, issues, dpi: render_pdf_page(page, issues, dpi=dpi, fmt="png"),
+    "render_pdf_page webp":    lambda page, issues, dpi: render_pdf_page(page, issues, dpi=dpi, fmt="webp"),
+}
+
+
+def _run_variant(name, pdf_bytes, dpi, repeat, out):
+    render = VARIANTS[name]
+    doc    = fitz.open(stream=pdf_bytes, filetype="pdf")
+    issues = make_issues(dpi)
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    sizes      = []
+    start      = time.perf_counter()
+    for _ in range(repeat):
+        for page in doc:
+            image_bytes, _, _ = render(page, issues if page.number == 0 else [], dpi)
+            sizes.append(len(image_bytes))
+    elapsed = time.perf_counter() - start
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    out.put({
+        "ms_per_page": elapsed / len(sizes) * 1000,
+        "kb_per_page": sum(sizes) / len(sizes) / 1024,
+        "peak_rss_mb": rss_after / 1024,                  # ru_maxrss is KB on Linux
+        "rss_growth_mb": (rss_after - rss_before) / 1024,
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages",  type=int, default=3)
+    parser.add_argument("--dpi",    type=int, nargs="+", default=[150, 300])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    pdf_bytes = make_pdf(args.pages)
+    ctx       = multiprocessing.get_context("spawn")
+
+    for dpi in args.dpi:
+        print(f"📊 {args.pages} page(s) @ {dpi} DPI, repeat={args.repeat}")
+        for name in VARIANTS:
+            out  = ctx.Queue()
+            proc = ctx.Process(target=_run_variant, args=(name, pdf_bytes, dpi, args.repeat, out))
+            proc.start()
+            row = out.get()
+            proc.join()
+            print(f"   {name:<26} {row['ms_per_page']:8.1f} ms/page  "
+                  f"{row['kb_per_page']:8.1f} KB/page  "
+                  f"peak RSS {row['peak_rss_mb']:6.1f} MB (+{row['rss_growth_mb']:.1f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+# server/benchmarks/bench_semantic_matcher.py
+#
+# 1. Ranking quality: resumes and JDs generated from role profiles;
+#    about half of each JD's skills are written as aliases ("k8s",
+#    "torch", "postgres"...) the way real postings mix them. Each resume ranks
+#    a pool of JDs; a JD is relevant if it shares the resume's role.
+#    Compares calculate_match_score (current), the same on
+#    canonicalized text, semantic_score and hybrid_score.
+# 2. Vector index: exact scan vs LSH over N stored JDs — query
+#    latency and recall@10 of LSH against the exact top 10.
+#
+# The alias share is a knob (--alias-rate); at 0 the quality table
+# shows what the semantic scorer adds without any synonyms.
+#
+#   cd server && python benchmarks/bench_semantic_matcher.py [--alias-rate 0.5] [--index-sizes 2000 20000]
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+
+from utils.matcher import calculate_match_score
+from utils import semantic_matcher
+from utils.semantic_matcher import (
+    HashingEmbedder, SemanticIndex, prepare, semantic_score, canonicalize, hybrid,
+)
+
+
+# ======================================================
+# SYNTHETIC INPUT
+# ======================================================
+
+PROFILES = {
+    "aiml":      ["python", "pytorch", "tensorflow", "machine learning", "llm", "langchain",
+                  "vector database", "hugging face", "fine tuning", "nlp"],
+    "fullstack": ["javascript", "typescript", "react", "node", "express", "rest api",
+                  "html", "css", "frontend", "backend"],
+    "devops":    ["kubernetes", "docker", "aws", "gcp", "azure", "linux", "git", "cloud",
+                  "terraform", "ci cd pipelines"],
+    "data":      ["sql", "postgresql", "data analysis", "data science", "python", "pandas",
+                  "dashboards", "etl", "statistics", "excel"],
+    "crm":       ["crm", "erp", "salesforce", "workflow automation", "automation", "reporting",
+                  "excel", "stakeholder management", "sap", "process design"],
+}
+
+# canonical skill → alias spellings used in generated JDs
+ALIASES = {}
+for alias, canonical in semantic_matcher.SKILL_ALIASES.items():
+    for skill in {s for skills in PROFILES.values() for s in skills}:
+        if canonical == skill or canonical.startswith(skill + " "):
+            ALIASES.setdefault(skill, []).append(alias)
+
+JD_LINES = ["Experience with {}", "Hands-on {} in production", "Strong knowledge of {}",
+            "You have shipped projects using {}", "Comfortable with {} and {}"]
+RESUME_LINES = ["Built services with {}", "Used {} to deliver a project", "{} and {} at scale",
+                "Led migration to {}", "Mentored the team on {}"]
+FILLER = ["Collaborate with product and design", "Own delivery end to end",
+          "Communicate clearly with stakeholders", "Work in an agile environment"]
+
+
+def _spell(rng, skill, alias_rate):
+    options = ALIASES.get(skill)
+    return rng.choice(options) if options and rng.random() < alias_rate else skill
+
+
+def _lines(rng, templates, skills):
+    out, skills = [], list(skills)
+    while skills:
+        template = rng.choice([t for t in templates if t.count("{}") <= len(skills)])
+        out.append("- " + template.format(*(skills.pop() for _ in range(template.count("{}")))))
+    return out
+
+
+def make_jd(rng, role, alias_rate):
+    skills = [_spell(rng, s, alias_rate) for s in rng.sample(PROFILES[role], 5)]
+    return "\n".join(["Requirements:", *_lines(rng, JD_LINES, skills),
+                      "Responsibilities:", *rng.sample(FILLER, 2),
+                      "Benefits:", "- Health insurance", "- Remote friendly"])
+
+
+def make_resume(rng, role):
+    skills = rng.sample(PROFILES[role], 6) + rng.sample(PROFILES[rng.choice(list(PROFILES))], 1)
+    return "\n".join(["Experience", *_lines(rng, RESUME_LINES, skills),
+                      "Projects", "- Shipped a project for a client"])
+
+
+# ======================================================
+# QUALITY
+# ======================================================
+
+def _metrics(scores, relevant, k=5):
+    order     = np.argsort(-np.asarray(scores), kind="stable")
+    hits      = np.asarray(relevant)[order]
+    precision = hits[:k].mean()
+    first     = np.flatnonzero(hits)
+    mrr       = 1.0 / (first[0] + 1) if len(first) else 0.0
+    pos, neg  = np.asarray(scores)[relevant], np.asarray(scores)[~np.asarray(relevant)]
+    auc       = ((pos[:, None] > neg[None, :]) + 0.5 * (pos[:, None] == neg[None, :])).mean()
+    return precision, mrr, auc
+
+
+def quality(n_resumes, pool_size, alias_rate, seed=11):
+    rng     = random.Random(seed)
+    roles   = list(PROFILES)
+    methods = {"calculate_match_score": [], "canonicalized": [], "semantic": [], "hybrid": []}
+    timings = {"calculate_match_score": 0.0, "semantic": 0.0}
+    pairs   = 0
+
+    for _ in range(n_resumes):
+        role     = rng.choice(roles)
+        resume   = make_resume(rng, role)
+        jd_roles = [rng.choice(roles) for _ in range(pool_size)]
+        jds      = [make_jd(rng, r, alias_rate) for r in jd_roles]
+        relevant = np.array([r == role for r in jd_roles])
+
+        start = time.perf_counter()
+        base  = [calculate_match_score(resume, jd)["final_score"] for jd in jds]
+        timings["calculate_match_score"] += time.perf_counter() - start
+
+        canon = [calculate_match_score(canonicalize(resume), canonicalize(jd))["final_score"] for jd in jds]
+
+        start    = time.perf_counter()
+        prepared = prepare(resume, "resume")
+        semantic = [semantic_score(prepared, prepare(jd, "jd"))[0] for jd in jds]
+        timings["semantic"] += time.perf_counter() - start
+
+        pairs += len(jds)
+        for name, scores in (("calculate_match_score", base), ("canonicalized", canon),
+                             ("semantic", semantic),
+                             ("hybrid", [hybrid(c, s) for c, s in zip(canon, semantic)])):
+            methods[name].append(_metrics(scores, relevant))
+
+    print(f"📊 ranking quality — {n_resumes} resumes × {pool_size} JDs, alias rate {alias_rate:.0%}")
+    print(f"   {'scorer':<22} {'P@5':>6} {'MRR':>6} {'AUC':>6}")
+    for name, rows in methods.items():
+        p, m, a = np.mean(rows, axis=0)
+        print(f"   {name:<22} {p:6.3f} {m:6.3f} {a:6.3f}")
+    print(f"   per pair: calculate_match_score {timings['calculate_match_score'] / pairs * 1e6:.0f} µs, "
+          f"semantic (embed JD + score) {timings['semantic'] / pairs * 1e6:.0f} µs")
+
+
+# ======================================================
+# VECTOR INDEX
+# ======================================================
+
+def index_bench(sizes, queries=50, seed=5):
+    rng   = random.Random(seed)
+    roles = list(PROFILES)
+    print("📊 vector index — exact scan vs LSH (recall@10 vs exact)")
+    print(f"   {'JDs':>7} {'index build':>12} {'exact':>10} {'LSH':>10} {'recall@10':>10} {'scanned':>8}")
+
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            index = SemanticIndex(os.path.join(tmp, "index.sqlite3"), embedder=HashingEmbedder())
+
+            start = time.perf_counter()
+            for i in range(0, n, 500):
+                index.add_many("bench", [(f"jd{j}", make_jd(rng, rng.choice(roles), 0.5))
+                                         for j in range(i, min(n, i + 500))])
+            build_s = time.perf_counter() - start
+
+            exact_s = lsh_s = 0.0
+            recalls, scanned = [], 0
+            for _ in range(queries):
+                vector = prepare(make_resume(rng, rng.choice(roles)), "resume", index.embedder).document
+
+                start = time.perf_counter()
+                exact = index.query("bench", vector, 10, exact=True)
+                exact_s += time.perf_counter() - start
+
+                before = semantic_matcher.metrics.snapshot()["counters"].get("semantic.ann.candidates", 0)
+                start  = time.perf_counter()
+                approx = index.query("bench", vector, 10, exact=False)
+                lsh_s += time.perf_counter() - start
+                scanned += semantic_matcher.metrics.snapshot()["counters"]["semantic.ann.candidates"] - before
+
+                recalls.append(len({d for d, _ in exact} & {d for d, _ in approx}) / max(1, len(exact)))
+
+            print(f"   {n:>7} {build_s:10.1f} s {exact_s / queries * 1000:7.1f} ms "
+                  f"{lsh_s / queries * 1000:7.1f} ms {np.mean(recalls):10.2f} "
+                  f"{scanned / queries / n:7.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--resumes", type=int, default=40)
+    parser.add_argument("--pool", type=int, default=50)
+    parser.add_argument("--alias-rate", type=float, default=0.5)
+    parser.add_argument("--index-sizes", type=int, nargs="+", default=[2000, 20000])
+    args = parser.parse_args()
+
+    quality(args.resumes, args.pool, args.alias_rate)
+    index_bench(args.index_sizes)
+
+
+if __name__ == "__main__":
+    main()
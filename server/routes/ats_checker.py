@@ -3,12 +3,18 @@
 import os
 import uuid
 import time
+import hashlib
 import traceback
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, request, jsonify, send_file, make_response
 from werkzeug.utils import secure_filename
 
 from utils.ats_checker import detect_ats_issues, auto_fix_resume, get_before_after_comparison
-from utils.preview_generator import generate_resume_preview_with_highlights
+from utils.preview_generator import (
+    generate_resume_preview_with_highlights, get_pdf_page_manifest, render_pdf_page_image,
+    clamp_dpi, normalize_image_format, parse_page_range, cached_issues,
+    PREVIEW_DPI, THUMBNAIL_DPI, PREVIEW_VERSION,
+)
+from utils.parsed_document import ParsedDocument
 
 # ✅ FIX: Import all new exception types from updated extract_text.py
 from utils.extract_text import ScannedPDFError, EncryptedPDFError, CorruptedFileError
@@ -50,6 +56,34 @@ def cleanup_file(path):
         print(f"⚠️ Cleanup warning: {e}")
 
 
+def _preview_issues(document):
+    """
+    Issues to highlight for a preview — cached per file content, so
+    repeat previews of the same upload skip detection entirely.
+    Returns (issues, None) or (None, error_response) for unreadable files;
+    any other detection failure previews without highlights.
+    """
+    try:
+        issues = cached_issues(
+            document.content_hash,
+            lambda: detect_ats_issues(document).get('issues', [])
+        )
+        return issues, None
+
+    except EncryptedPDFError as e:
+        return None, (jsonify({"error": str(e), "is_encrypted_pdf": True}), 400)
+
+    except CorruptedFileError as e:
+        return None, (jsonify({"error": str(e), "is_corrupted": True}), 400)
+
+    except ScannedPDFError as e:
+        return None, (jsonify({"error": str(e), "is_scanned_pdf": True}), 400)
+
+    except Exception as e:
+        print(f"⚠️ Issue detection failed for preview: {e}")
+        return [], None   # Generate preview without highlights rather than failing
+
+
 # ======================================================
 # 1. CHECK ATS ISSUES
 # ======================================================
@@ -96,43 +130,48 @@ def check_ats():
                 "error": f"File is too large ({size_mb:.1f}MB). Maximum size is 10MB."
             }), 413
 
-        # ── Save with unique filename ─────────────────────────────
+        # ── Read upload into memory ───────────────────────────────
+        # ✅ PERF: Parsed straight from the request bytes — no
+        # save → reopen round-trip through /tmp/uploads
         unique_name = unique_filename(file.filename)
-        filepath    = os.path.join(UPLOAD_FOLDER, unique_name)
-        file.save(filepath)
+        file_bytes  = file.read()
 
         print(f"📄 ATS check: {unique_name}")
 
         # ── Analyze ───────────────────────────────────────────────
         # ✅ FIX: All 3 exception types handled with correct messages
+        # ✅ PERF: One ParsedDocument for every check → file parsed once
+        document = ParsedDocument(file_bytes, unique_name)
         try:
-            result = detect_ats_issues(filepath)
+            result = detect_ats_issues(document)
 
         except EncryptedPDFError as e:
-            cleanup_file(filepath)
             return jsonify({
                 "error": str(e),
                 "is_encrypted_pdf": True
             }), 400
 
         except CorruptedFileError as e:
-            cleanup_file(filepath)
             return jsonify({
                 "error": str(e),
                 "is_corrupted": True
             }), 400
 
         except ScannedPDFError as e:
-            cleanup_file(filepath)
             return jsonify({
                 "error": str(e),
                 "is_scanned_pdf": True
             }), 400
 
         except (ValueError, RuntimeError) as e:
-            cleanup_file(filepath)
             return jsonify({"error": str(e)}), 400
 
+        # ── Keep a copy for the follow-up preview/fix calls ───────
+        # Write-only: nothing in this request reads it back.
+        filepath = os.path.join(UPLOAD_FOLDER, unique_name)
+        with open(filepath, "wb") as f:
+            f.write(file_bytes)
+
         # ── Attach temp file info for preview/fix endpoints ───────
         # Use unique_name so subsequent calls hit the right file
         result['temp_file']          = unique_name
@@ -140,7 +179,8 @@ def check_ats():
 
         print(f"✅ ATS Score: {result['score']}/100 | "
               f"Issues: {len(result['issues'])} | "
-              f"Warnings: {len(result['warnings'])}")
+              f"Warnings: {len(result['warnings'])} | "
+              f"Parses: {document.parse_counts}")
 
         # NOTE: File is NOT deleted here — it's needed for
         # /ats/preview and /ats/fix calls that follow immediately.
@@ -165,8 +205,21 @@ def generate_preview():
     """
     Generate visual preview of resume with highlighted ATS issues.
 
-    Request:  JSON { "filename": "uuid_resume.pdf" }
+    Request:  JSON {
+                "filename": "uuid_resume.pdf",
+                "pages":    "1-2",     optional, 1-based range (default: all)
+                "dpi":      150,       optional, 36-300
+                "format":   "png",     optional, "png" | "webp"
+                "embed":    false      optional, inline base64 images
+              }
     Response: JSON { "success": true, "pages": [...], "total_pages": N }
+
+    ✅ PERF: PDF pages come back as a manifest — size, highlight
+    boxes, and a `url` / `thumbnail_url` per page pointing at
+    GET /ats/preview/<filename>/pages/<n> — so the client only
+    downloads the pages it shows. "embed": true restores inline
+    base64 images, for the selected pages only.
+    DOCX keeps the text preview.
     """
     if request.method == "OPTIONS":
         return '', 204
@@ -178,6 +231,12 @@ def generate_preview():
         if not filename:
             return jsonify({"error": "Filename is required."}), 400
 
+        try:
+            dpi = clamp_dpi(data.get('dpi', PREVIEW_DPI))
+            fmt = normalize_image_format(data.get('format'))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
         # ✅ FIX: secure_filename ensures no path traversal
         filename = secure_filename(filename)
         filepath = os.path.join(UPLOAD_FOLDER, filename)
@@ -190,26 +249,57 @@ def generate_preview():
         print(f"🖼️ Generating preview: {filename}")
 
         # ── Get issues for highlights ─────────────────────────────
-        try:
-            issues_result = detect_ats_issues(filepath)
-            issues        = issues_result.get('issues', [])
-
-        except EncryptedPDFError as e:
-            return jsonify({"error": str(e), "is_encrypted_pdf": True}), 400
+        document = ParsedDocument(filepath)
+        issues, error_response = _preview_issues(document)
+        if error_response:
+            return error_response
 
-        except CorruptedFileError as e:
-            return jsonify({"error": str(e), "is_corrupted": True}), 400
+        is_pdf = filepath.lower().endswith('.pdf')
 
-        except ScannedPDFError as e:
-            return jsonify({"error": str(e), "is_scanned_pdf": True}), 400
-
-        except Exception as e:
-            print(f"⚠️ Issue detection failed for preview: {e}")
-            issues = []   # Generate preview without highlights rather than failing
+        # ── PDF manifest (lazy per-page images) ───────────────────
+        if is_pdf and not data.get('embed'):
+            try:
+                manifest = get_pdf_page_manifest(
+                    filepath, issues, dpi=dpi, content_hash=document.content_hash
+                )
+                selected = set(parse_page_range(data.get('pages'), manifest['total_pages']))
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+            except Exception as e:
+                print(f"⚠️ Preview manifest failed: {e}")
+                manifest, selected = None, set()
+
+            if not manifest or not manifest['pages']:
+                return jsonify({
+                    "error": "Could not generate preview. "
+                             "The file may be scanned, corrupted, or in an unsupported format."
+                }), 500
+
+            base  = f"/api/ats/preview/{filename}/pages"
+            pages = []
+            for page in manifest['pages']:
+                if page['page'] - 1 not in selected:
+                    continue
+                page['url']           = f"{base}/{page['page']}?dpi={dpi}&format={fmt}"
+                page['thumbnail_url'] = f"{base}/{page['page']}?thumb=1&format={fmt}"
+                pages.append(page)
+
+            print(f"✅ Preview manifest: {len(pages)}/{manifest['total_pages']} page(s) at {dpi} DPI")
 
-        # ── Generate preview images ───────────────────────────────
+            return jsonify({
+                "success":     True,
+                "pages":       pages,
+                "total_pages": manifest['total_pages'],
+                "dpi":         dpi,
+                "format":      fmt
+            }), 200
+
+        # ── Inline images (embed) / DOCX text preview ─────────────
         try:
-            preview_images = generate_resume_preview_with_highlights(filepath, issues)
+            preview_images = generate_resume_preview_with_highlights(
+                filepath, issues, pages=data.get('pages'), dpi=dpi, fmt=fmt,
+                content_hash=document.content_hash
+            )
         except Exception as e:
             print(f"⚠️ Preview generation failed: {e}")
             preview_images = None
@@ -234,6 +324,73 @@ def generate_preview():
         return jsonify({"error": "Preview generation failed. Please try again."}), 500
 
 
+@ats_blueprint.route("/ats/preview/<filename>/pages/<int:page>", methods=["GET"])
+def preview_page(filename, page):
+    """
+    One highlighted PDF page as raw image bytes.
+
+    Query: dpi (36-300, default 150), format (png | webp), thumb=1
+           (THUMBNAIL_DPI, overrides dpi)
+
+    The ETag covers file content, page, DPI, format and the preview
+    version, so a revalidation (If-None-Match) is answered with 304
+    after hashing the file — no issue detection, no rendering.
+    """
+    try:
+        try:
+            fmt = normalize_image_format(request.args.get('format'))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        if request.args.get('thumb') in ('1', 'true'):
+            dpi = THUMBNAIL_DPI
+        else:
+            dpi = clamp_dpi(request.args.get('dpi', PREVIEW_DPI))
+
+        filename = secure_filename(filename)
+        filepath = os.path.join(UPLOAD_FOLDER, filename)
+
+        if not os.path.exists(filepath):
+            return jsonify({
+                "error": "Resume file not found. Please re-upload your resume."
+            }), 404
+
+        if not filepath.lower().endswith('.pdf'):
+            return jsonify({"error": "Page images are only available for PDF files."}), 400
+
+        document = ParsedDocument(filepath)
+        etag     = hashlib.sha256(
+            f"{PREVIEW_VERSION}:{document.content_hash}:{page}:{dpi}:{fmt}".encode()
+        ).hexdigest()[:32]
+
+        if etag in request.if_none_match:
+            response = make_response('', 304)
+        else:
+            issues, error_response = _preview_issues(document)
+            if error_response:
+                return error_response
+
+            try:
+                image_bytes, mimetype = render_pdf_page_image(
+                    filepath, issues, page, dpi=dpi, fmt=fmt, content_hash=document.content_hash
+                )
+            except IndexError as e:
+                return jsonify({"error": str(e)}), 404
+
+            response = make_response(image_bytes)
+            response.mimetype = mimetype
+
+        response.set_etag(etag)
+        # Uploads are removed by /ats/cleanup after 1 hour — no point caching longer
+        response.headers['Cache-Control'] = 'private, max-age=3600'
+        return response
+
+    except Exception as e:
+        print(f"❌ Preview page error: {e}")
+        traceback.print_exc()
+        return jsonify({"error": "Preview generation failed. Please try again."}), 500
+
+
 # ======================================================
 # 3. AUTO-FIX AND DOWNLOAD
 # ======================================================
@@ -378,7 +535,9 @@ def compare_versions():
         if not os.path.exists(fixed_path):
             return jsonify({"error": "Fixed file not found."}), 404
 
-        comparison = get_before_after_comparison(original_path, fixed_path)
+        comparison = get_before_after_comparison(
+            ParsedDocument(original_path), ParsedDocument(fixed_path)
+        )
 
         return jsonify(comparison), 200
 
@@ -2,10 +2,10 @@
 
 import os
 import sys
-import uuid
 import traceback
 import hashlib
 import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from flask import Blueprint, request, jsonify
 from werkzeug.utils import secure_filename
 
@@ -35,19 +35,47 @@ db = firestore.client()
 # -------------------------------------------------
 from utils.extract_text import extract_text, ScannedPDFError, EncryptedPDFError, CorruptedFileError
 from utils.gemini_utils import analyze_with_gemini
+from utils.rate_limiter import PRIORITY_BATCH
 from utils.matcher import is_technical_text
+from utils import match_engine
+from utils.jd_profile import get_jd_profile, jd_vector, extract_jd_text
+from utils.batch_store import make_batch_store
+from utils.batch_queue import (
+    get_batch_queue, register_task_handler, run_task, expire_abandoned, progress_summary,
+    BATCH_QUEUE_BACKEND, STATUS_PROCESSING,
+)
+from utils import metrics
+from utils.metrics import StageTimings
+from utils.token_cache import verify_id_token
 
 batch_blueprint = Blueprint('batch_matcher', __name__)
 
-UPLOAD_FOLDER = "/tmp/uploads"
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-
+# ✅ PERF: Resume and JDs are read into memory and parsed from the
+# request bytes — nothing goes through /tmp/uploads any more.
 ALLOWED_RESUME_EXTENSIONS = {'pdf', 'docx'}
 ALLOWED_JD_EXTENSIONS     = {'pdf', 'docx', 'txt'}
 
 MAX_JD_FILES  = 10
 MAX_FILE_SIZE = 10 * 1024 * 1024   # 10MB
 
+# Per-JD work (extract → tech check → Gemini) runs in a bounded pool.
+# The deadline covers the whole request and stays under App Engine's 60s
+# limit so we can still rank, save and respond with what finished.
+BATCH_MAX_WORKERS      = int(os.getenv("BATCH_MAX_WORKERS", "5"))
+BATCH_DEADLINE_SECONDS = float(os.getenv("BATCH_DEADLINE_SECONDS", "50"))
+
+# "sync"  → hold the request until every JD is analyzed (original behaviour)
+# "async" → return a batch_id at once; poll GET /batch/<batch_id>
+# Clients can override per request with a `mode` form field or query arg.
+BATCH_DEFAULT_MODE = os.getenv("BATCH_DEFAULT_MODE", "sync").lower()
+
+batch_store = make_batch_store(db)
+
+# A persistent queue may hold tasks from a previous process — start
+# its workers now so those batches finish without a new submit
+if BATCH_QUEUE_BACKEND == "sqlite":
+    get_batch_queue(batch_store)
+
 
 # -------------------------------------------------
 # Helpers
@@ -62,22 +90,6 @@ def generate_batch_id(user_id, resume_text):
     return hashlib.sha256(combined.encode("utf-8")).hexdigest()
 
 
-def unique_filename(user_id, original_name):
-    safe_name = secure_filename(original_name)
-    prefix    = f"{user_id[:8]}_{uuid.uuid4().hex[:8]}_"
-    return prefix + safe_name
-
-
-def cleanup_files(*file_paths):
-    for path in file_paths:
-        try:
-            if path and os.path.exists(path):
-                os.remove(path)
-                print(f"🗑️ Cleaned up: {os.path.basename(path)}")
-        except Exception as e:
-            print(f"⚠️ Cleanup warning for {path}: {e}")
-
-
 # -------------------------------------------------
 # ✅ FIX 1: Centralised token verifier
 # Uses check_revoked=False to prevent false
@@ -91,7 +103,7 @@ def _verify_token(request):
     token = auth_header.split("Bearer ", 1)[1].strip()
 
     try:
-        decoded = auth.verify_id_token(token, check_revoked=False)  # ✅ FIX
+        decoded = verify_id_token(token, check_revoked=False)  # ✅ FIX
         return decoded["uid"], None
     except auth.ExpiredIdTokenError:
         return None, (jsonify({
@@ -104,13 +116,412 @@ def _verify_token(request):
         }), 401)
 
 
+# -------------------------------------------------
+# Per-JD analysis (runs inside the batch worker pool)
+# -------------------------------------------------
+def _extract_jd(jd_name, jd_bytes, timings):
+    """
+    Extract and validate one uploaded JD (raw bytes).
+
+    Returns ((jd_text, profile), None) or (None, skip_reason). Never
+    raises. Extraction and the JD profile (tech verdict, encoding)
+    are memoized per JD, so re-running a batch with an edited
+    resume redoes none of this.
+    """
+    try:
+        jd_text = extract_jd_text(jd_bytes, filename=jd_name, timings=timings)
+    except EncryptedPDFError:
+        return None, f"{jd_name} (password-protected PDF)"
+    except CorruptedFileError:
+        return None, f"{jd_name} (corrupted file)"
+    except ScannedPDFError:
+        return None, f"{jd_name} (scanned PDF — no text)"
+    except (ValueError, RuntimeError):
+        return None, f"{jd_name} (unreadable)"
+
+    if not jd_text or not jd_text.strip() or len(jd_text.strip()) < 50:
+        return None, f"{jd_name} (too short or empty)"
+
+    profile = get_jd_profile(jd_text, timings)
+    if not profile["is_technical"]:
+        print(f"⚠️ Skipping {jd_name} — not technical ({profile['technical_hits']} hits)")
+        return None, f"{jd_name} (not a technical job description)"
+
+    return (jd_text, profile), None
+
+
+def _gemini_result(resume_text, jd_name, jd_text, idx, total, timings):
+    """Gemini-score one extracted JD. Returns (result, None) or (None, skip_reason)."""
+    print(f"🔄 Analyzing {idx + 1}/{total}: {jd_name}")
+
+    # ════════════════════════════════════════
+    # ✅ FIX 2: Gemini call with proper fallback
+    # When Gemini returns empty lists for
+    # missing_keywords or suggestions, we now
+    # guarantee the frontend always gets valid
+    # arrays — never None or missing keys.
+    # This was causing the blank card for
+    # SkyMeric_LLM_SME_JD1.pdf
+    # ════════════════════════════════════════
+    try:
+        gemini_result = analyze_with_gemini(
+            resume_text, jd_text, priority=PRIORITY_BATCH, timings=timings
+        ) or {}
+    except Exception as e:
+        print(f"❌ Gemini error for {jd_name}: {e}")
+        return None, f"{jd_name} (AI analysis failed — please retry)"
+
+    score              = gemini_result.get("score", 0)
+    missing_keywords   = gemini_result.get("missing_keywords") or []   # ✅ None → []
+    suggestions        = gemini_result.get("suggestions") or []        # ✅ None → []
+    learning_resources = gemini_result.get("learning_resources") or [] # ✅ None → []
+    is_fallback        = gemini_result.get("is_fallback", False)
+
+    # ✅ FIX 3: If score came back 0 and everything is
+    # empty, Gemini silently failed — skip this JD
+    # instead of showing a blank card
+    if score == 0 and not missing_keywords and not suggestions:
+        print(f"⚠️ Gemini returned empty result for {jd_name} — skipping")
+        return None, f"{jd_name} (AI returned no data — please retry)"
+
+    print(f"✅ {jd_name} — Score: {score}%"
+          f"{' (estimated)' if is_fallback else ''}")
+
+    return {
+        "jd_name":            jd_name,
+        "jd_text":            jd_text[:500],
+        "score":              score,
+        "score_source":       "fallback" if is_fallback else "gemini",
+        "missing_keywords":   missing_keywords,
+        "suggestions":        suggestions,
+        "learning_resources": learning_resources,
+        "is_fallback_score":  is_fallback,
+        "rank":               0,
+        "match_quality":      get_match_quality(score),
+        "priority":           get_priority_level(score, missing_keywords),
+    }, None
+
+
+def _analyze_jd(resume_text, jd_name, jd_bytes, original_name, idx, total, timings):
+    """
+    Extract, validate and Gemini-score one uploaded JD (raw bytes).
+
+    Returns (result, None) on success or (None, skip_reason) when the JD
+    has to be skipped. Never raises.
+    """
+    try:
+        extracted, skip_reason = _extract_jd(jd_name, jd_bytes, timings)
+        if skip_reason:
+            return None, skip_reason
+        return _gemini_result(resume_text, jd_name, extracted[0], idx, total, timings)
+
+    except Exception as e:
+        print(f"❌ Error processing {original_name}: {e}")
+        traceback.print_exc()
+        return None, f"{original_name} (processing error)"
+
+
+def _rank_key(result):
+    """Gemini-analyzed results first, then locally scored ones; best score first."""
+    return (result.get("score_source") == "local", -result.get("score", 0))
+
+
+# -------------------------------------------------
+# Tiering — score every JD locally, spend Gemini on the best
+# -------------------------------------------------
+# ✅ PERF: every JD that passed is_technical_text used to get a full
+# Gemini call, even ones with almost no overlap with the resume.
+# With tiering on, all JDs are extracted and scored by the free
+# deterministic matcher first (utils/match_engine — each JD is
+# encoded in its worker, then all are scored in one NumPy call); only the top-K (and/or those at or
+# above a local-score threshold) go to Gemini. The rest come back
+# straight away with score_source="local" and is_fallback_score=True
+# so the UI marks them as estimates.
+#
+# Defaults come from the env; a request can override them with
+# `gemini_top_k` / `gemini_min_score` form fields or query args
+# (0 = no limit). Both set → a JD must be in the top-K AND reach
+# the threshold.
+BATCH_GEMINI_TOP_K     = int(os.getenv("BATCH_GEMINI_TOP_K", "0"))
+BATCH_GEMINI_MIN_SCORE = float(os.getenv("BATCH_GEMINI_MIN_SCORE", "0"))
+
+
+def _tiering_options(req):
+    """
+    (top_k, min_score) for this request — (0, 0) means tiering is off.
+    Raises ValueError on a malformed override.
+    """
+    def _option(name, default, cast):
+        raw = req.form.get(name) or req.args.get(name)
+        if raw in (None, ""):
+            return default
+        value = cast(raw)
+        if value < 0:
+            raise ValueError(f"{name} must be >= 0")
+        return value
+
+    return (
+        _option("gemini_top_k",     BATCH_GEMINI_TOP_K,     int),
+        _option("gemini_min_score", BATCH_GEMINI_MIN_SCORE, float),
+    )
+
+
+def _prepare_jd(jd_name, jd_bytes, original_name, timings):
+    """Extract and encode one JD. Returns ((jd_text, vector), None) or (None, skip_reason)."""
+    try:
+        extracted, skip_reason = _extract_jd(jd_name, jd_bytes, timings)
+        if skip_reason:
+            return None, skip_reason
+        jd_text, profile = extracted
+        return (jd_text, jd_vector(profile)), None
+
+    except Exception as e:
+        print(f"❌ Error processing {original_name}: {e}")
+        traceback.print_exc()
+        return None, f"{original_name} (processing error)"
+
+
+def _local_result(jd_name, jd_text, local):
+    score   = int(round(local["final_score"]))
+    missing = local["missing_skills"][:5]
+    return {
+        "jd_name":            jd_name,
+        "jd_text":            jd_text[:500],
+        "score":              score,
+        "score_source":       "local",
+        "missing_keywords":   missing,
+        "suggestions":        [
+            f"Quick estimate from skill overlap ({local['skill_match']:.0f}% of the JD's skills found) — "
+            f"analyze this JD on its own for a full AI review."
+        ],
+        "learning_resources": [],
+        "is_fallback_score":  True,
+        "rank":               0,
+        "match_quality":      get_match_quality(score),
+        "priority":           get_priority_level(score, missing),
+    }
+
+
+def _select_for_gemini(final_scores, top_k, min_score):
+    """Row indices that get a Gemini call."""
+    order = match_engine.rank({"final_score": final_scores}, top_k=top_k)
+    return {int(i) for i in order if final_scores[i] >= min_score}
+
+
+def _prepare_jobs(jobs, outcomes, deadline, timings):
+    """
+    Extract + encode every queued JD in a bounded pool.
+
+    Returns [(idx, jd_name, jd_text, vector)] in upload order; JDs that
+    fail validation or miss the deadline are written to outcomes.
+    """
+    prepared = []
+    if not jobs:
+        return prepared
+
+    workers  = max(1, min(BATCH_MAX_WORKERS, len(jobs)))
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch-prep")
+    futures  = {
+        executor.submit(_prepare_jd, jd_name, jd_bytes, original_name, timings): (idx, jd_name)
+        for idx, jd_name, jd_bytes, original_name in jobs
+    }
+
+    done, not_done = wait(futures, timeout=max(0.0, deadline - time.monotonic()))
+    for future in done:
+        idx, jd_name = futures[future]
+        value, skip_reason = future.result()
+        if value is None:
+            outcomes[idx] = (None, skip_reason)
+        else:
+            prepared.append((idx, jd_name, value[0], value[1]))
+
+    for future in not_done:
+        idx, jd_name = futures[future]
+        future.cancel()
+        outcomes[idx] = (None, f"{jd_name} (analysis timed out — please retry)")
+
+    executor.shutdown(wait=False, cancel_futures=True)
+    prepared.sort(key=lambda p: p[0])
+    return prepared
+
+
+# -------------------------------------------------
+# Task kinds — plain-data payloads, so the batch queue can persist
+# them; sync mode runs the same handlers in its own pool
+# -------------------------------------------------
+TASK_ANALYZE = "analyze"   # extract + validate + Gemini (tiering off)
+TASK_GEMINI  = "gemini"    # Gemini only — JD already extracted by tiering
+TASK_LOCAL   = "local"     # already scored locally — just store the result
+TASK_TIER    = "tier"      # job mode's first stage — tiers the JDs, then
+                           # queues their gemini / local tasks in its place
+
+
+register_task_handler(TASK_ANALYZE, lambda p, timings: _analyze_jd(
+    p["resume_text"], p["jd_name"], p["jd_bytes"], p["original_name"], p["idx"], p["total"], timings
+))
+register_task_handler(TASK_GEMINI, lambda p, timings: _gemini_result(
+    p["resume_text"], p["jd_name"], p["jd_text"], p["idx"], p["total"], timings
+))
+register_task_handler(TASK_LOCAL, lambda p, timings: (p["result"], None))
+
+
+def _tier_stage(payload, timings):
+    """
+    Run tiering off the request thread (job mode). Returns the Gemini /
+    local tasks, the JDs that failed extraction and the tiering summary.
+    """
+    outcomes = {}
+    deadline = time.monotonic() + BATCH_DEADLINE_SECONDS
+    tasks, tiering = _build_tasks(
+        payload["resume_text"], [tuple(job) for job in payload["jobs"]], outcomes,
+        payload["total"], (payload["top_k"], payload["min_score"]), deadline, timings,
+    )
+    skipped = {idx: skip_reason for idx, (_, skip_reason) in outcomes.items()}
+    return tasks, skipped, {"tiering": tiering, "queued_files": len(tasks)}
+
+
+register_task_handler(TASK_TIER, _tier_stage, fans_out=True)
+
+
+def _analyze_tasks(resume_text, jobs, total):
+    """One extract + Gemini task per JD (tiering off)."""
+    return [
+        (idx, jd_name, TASK_ANALYZE, {
+            "resume_text": resume_text, "jd_name": jd_name, "jd_bytes": jd_bytes,
+            "original_name": original_name, "idx": idx, "total": total,
+        })
+        for idx, jd_name, jd_bytes, original_name in jobs
+    ]
+
+
+def _build_tasks(resume_text, jobs, outcomes, total, tiering_options, deadline, timings):
+    """
+    [(idx, jd_name, kind, payload)] for the worker pool / batch queue,
+    plus the tiering summary (None when tiering is off).
+    timings: StageTimings the tiering step records its stages into.
+    """
+    top_k, min_score = tiering_options
+    if not (top_k or min_score):
+        return _analyze_tasks(resume_text, jobs, total), None
+
+    gemini_jobs, local_results, summary = _tier_jobs(
+        resume_text, jobs, outcomes, top_k, min_score, deadline, timings
+    )
+    tasks = [
+        (idx, jd_name, TASK_GEMINI, {
+            "resume_text": resume_text, "jd_name": jd_name, "jd_text": jd_text,
+            "idx": idx, "total": total,
+        })
+        for idx, jd_name, jd_text in gemini_jobs
+    ]
+    tasks += [
+        (idx, jd_name, TASK_LOCAL, {"result": result})
+        for idx, (jd_name, result) in local_results.items()
+    ]
+    return sorted(tasks, key=lambda t: t[0]), summary
+
+
+def _tier_jobs(resume_text, jobs, outcomes, top_k, min_score, deadline, timings):
+    """
+    Local-score every JD, then split them.
+
+    Returns (gemini_jobs, local_results, summary):
+      gemini_jobs   [(idx, jd_name, jd_text)] still to be sent to Gemini
+      local_results {idx: (jd_name, result)} scored locally only
+    """
+    prepared = _prepare_jobs(jobs, outcomes, deadline, timings)
+
+    gemini_jobs, local_results = [], {}
+    if prepared:
+        with timings.stage("local_score"):
+            jd_matrix = match_engine.stack_rows([vector for _, _, _, vector in prepared])
+            scores    = match_engine.score_matrix(resume_text, jd_matrix)
+            chosen    = _select_for_gemini(scores["final_score"], top_k, min_score)
+
+        for row, (idx, jd_name, jd_text, _) in enumerate(prepared):
+            if row in chosen:
+                gemini_jobs.append((idx, jd_name, jd_text))
+            else:
+                local = match_engine.match_result(scores, jd_matrix, row)
+                local_results[idx] = (jd_name, _local_result(jd_name, jd_text, local))
+
+    metrics.increment("batch.tiering.batches")
+    metrics.increment("batch.tiering.gemini_sent", len(gemini_jobs))
+    metrics.increment("batch.tiering.gemini_avoided", len(local_results))
+
+    print(f"🪜 Tiering (top_k={top_k or '∞'}, min_score={min_score:g}): "
+          f"{len(gemini_jobs)} JD(s) → Gemini, {len(local_results)} scored locally")
+
+    summary = {
+        "gemini_top_k":     top_k,
+        "gemini_min_score": min_score,
+        "gemini_analyzed":  len(gemini_jobs),
+        "local_only":       len(local_results),
+    }
+    return gemini_jobs, local_results, summary
+
+
+# -------------------------------------------------
+# Job mode — queue the JDs and return immediately
+# -------------------------------------------------
+def _start_batch_job(user_id, resume_name, resume_text, jobs, outcomes, tiering_options):
+    """
+    Create the batch document in "processing" state, queue the accepted
+    JDs and return 202 with the batch_id the client polls.
+    The queued tasks hold the JD bytes until they run. With tiering on,
+    a single tier task goes first and queues the per-JD tasks itself,
+    so extraction and local scoring stay off the request thread.
+    """
+    total    = len(outcomes)
+    skipped  = {idx: o[1] for idx, o in enumerate(outcomes) if o is not None}
+    batch_id = generate_batch_id(user_id, resume_text)
+
+    top_k, min_score = tiering_options
+    if jobs and (top_k or min_score):
+        tasks = [(-1, "tiering", TASK_TIER, {
+            "resume_text": resume_text, "jobs": jobs, "total": total,
+            "top_k": top_k, "min_score": min_score,
+        })]
+    else:
+        tasks = _analyze_tasks(resume_text, jobs, total)
+
+    fields = {
+        "user_id":         user_id,
+        "resume_name":     resume_name,
+        "mode":            "async",
+        "status":          STATUS_PROCESSING,
+        "total_files":     total,
+        "queued_files":    len(jobs),
+        "completed_files": len(skipped),
+        "total_jobs":      0,
+        "top_score":       0,
+        "skipped_count":   len(skipped),
+        "skipped_files":   [skipped[i] for i in sorted(skipped)],
+        "started_at":      time.time(),
+    }
+    batch_store.create(batch_id, fields)
+
+    get_batch_queue(batch_store).submit(batch_id, tasks, total, skipped)
+
+    print(f"📨 Queued batch {batch_id[:12]}...: {len(jobs)} JD(s), {len(skipped)} skipped up front")
+
+    response_data = {
+        "success":     True,
+        "batch_id":    batch_id,
+        "status":      STATUS_PROCESSING,
+        "resume_name": resume_name,
+        "total_files": total,
+        "poll_url":    f"/api/batch/{batch_id}",
+    }
+    return jsonify(response_data), 202
+
+
 # -------------------------------------------------
 # 🚀 BATCH ANALYZE ROUTE
 # -------------------------------------------------
 @batch_blueprint.route('/batch/analyze', methods=['POST'])
 def batch_analyze():
-    resume_path    = None
-    jd_paths_saved = []
+    deadline = time.monotonic() + BATCH_DEADLINE_SECONDS
 
     try:
 
@@ -123,6 +534,15 @@ def batch_analyze():
 
         print(f"📊 Batch analysis request from user: {user_id}")
 
+        mode = (request.form.get("mode") or request.args.get("mode") or BATCH_DEFAULT_MODE).lower()
+
+        try:
+            tiering_options = _tiering_options(request)
+        except ValueError:
+            return jsonify({
+                "error": "gemini_top_k and gemini_min_score must be non-negative numbers."
+            }), 400
+
         # ════════════════════════════════════════
         # 2. FILE PRESENCE CHECK
         # ════════════════════════════════════════
@@ -174,36 +594,33 @@ def batch_analyze():
             }), 413
 
         # ════════════════════════════════════════
-        # 5. SAVE RESUME
+        # 5. READ RESUME INTO MEMORY
         # ════════════════════════════════════════
-        resume_unique_name = unique_filename(user_id, resume_name)
-        resume_path        = os.path.join(UPLOAD_FOLDER, resume_unique_name)
-        resume.save(resume_path)
+        resume_bytes = resume.read()
 
         # ════════════════════════════════════════
         # 6. EXTRACT RESUME TEXT
         # ════════════════════════════════════════
+        timings = StageTimings("batch")
+
         try:
-            resume_text = extract_text(resume_path)
+            with timings.stage("extract_resume"):
+                resume_text = extract_text(resume_bytes, filename=resume_name)
         except EncryptedPDFError as e:
-            cleanup_files(resume_path)
             return jsonify({"error": str(e)}), 400
         except CorruptedFileError as e:
-            cleanup_files(resume_path)
             return jsonify({"error": str(e)}), 400
         except ScannedPDFError as e:
-            cleanup_files(resume_path)
             return jsonify({"error": str(e)}), 400
         except (ValueError, RuntimeError) as e:
-            cleanup_files(resume_path)
             return jsonify({"error": str(e)}), 400
 
         if not resume_text or not resume_text.strip():
-            cleanup_files(resume_path)
             return jsonify({"error": "Resume appears to be empty or unreadable."}), 400
 
-        if not is_technical_text(resume_text):
-            cleanup_files(resume_path)
+        with timings.stage("validate_resume"):
+            resume_is_tech = is_technical_text(resume_text)
+        if not resume_is_tech:
             return jsonify({
                 "error": "Resume does not appear to contain technical skills. "
                          "Please ensure your resume lists relevant technical skills."
@@ -212,23 +629,27 @@ def batch_analyze():
         print(f"✅ Resume extracted: {len(resume_text)} characters")
 
         # ════════════════════════════════════════
-        # 7. PROCESS EACH JD
+        # 7. PROCESS EACH JD — validate + read here, analyze in a worker pool
         # ════════════════════════════════════════
-        results       = []
-        skipped_files = []
+        # ✅ PERF: Extraction, tech validation and the Gemini call used to
+        # run one JD after another — 10 JDs × (30s timeout + retry) could
+        # far outlast the 60s App Engine limit. Request-bound work (reading
+        # the upload stream) stays on this thread; everything else fans out
+        # to a bounded pool and is collected back in upload order so the
+        # ranked results and skipped_files come out exactly as before.
+        outcomes = [None] * len(jd_files)   # (result, skip_reason) per JD
+        jobs     = []                       # (idx, jd_name, jd_bytes, original_name)
 
         for idx, jd_file in enumerate(jd_files):
-            jd_path = None
-
             try:
                 jd_name = secure_filename(jd_file.filename)
 
                 if not jd_name or jd_file.filename == '':
-                    skipped_files.append(f"File {idx+1} (no filename)")
+                    outcomes[idx] = (None, f"File {idx+1} (no filename)")
                     continue
 
                 if not allowed_file(jd_name, ALLOWED_JD_EXTENSIONS):
-                    skipped_files.append(f"{jd_name} (invalid format — use PDF, DOCX, or TXT)")
+                    outcomes[idx] = (None, f"{jd_name} (invalid format — use PDF, DOCX, or TXT)")
                     print(f"⚠️ Skipping {jd_name} — invalid format")
                     continue
 
@@ -237,107 +658,76 @@ def batch_analyze():
                 jd_file.seek(0)
 
                 if jd_size == 0:
-                    skipped_files.append(f"{jd_name} (empty file)")
+                    outcomes[idx] = (None, f"{jd_name} (empty file)")
                     continue
 
                 if jd_size > MAX_FILE_SIZE:
                     size_mb = jd_size / (1024 * 1024)
-                    skipped_files.append(f"{jd_name} (too large: {size_mb:.1f}MB)")
+                    outcomes[idx] = (None, f"{jd_name} (too large: {size_mb:.1f}MB)")
                     continue
 
-                jd_unique_name = unique_filename(user_id, jd_name)
-                jd_path        = os.path.join(UPLOAD_FOLDER, jd_unique_name)
-                jd_paths_saved.append(jd_path)
-                jd_file.save(jd_path)
+                jobs.append((idx, jd_name, jd_file.read(), jd_file.filename))
 
-                # Extract JD text
-                try:
-                    jd_text = extract_text(jd_path)
-                except EncryptedPDFError:
-                    skipped_files.append(f"{jd_name} (password-protected PDF)")
-                    continue
-                except CorruptedFileError:
-                    skipped_files.append(f"{jd_name} (corrupted file)")
-                    continue
-                except ScannedPDFError:
-                    skipped_files.append(f"{jd_name} (scanned PDF — no text)")
-                    continue
-                except (ValueError, RuntimeError):
-                    skipped_files.append(f"{jd_name} (unreadable)")
-                    continue
+            except Exception as e:
+                print(f"❌ Error processing {jd_file.filename}: {e}")
+                traceback.print_exc()
+                outcomes[idx] = (None, f"{jd_file.filename} (processing error)")
 
-                if not jd_text or not jd_text.strip() or len(jd_text.strip()) < 50:
-                    skipped_files.append(f"{jd_name} (too short or empty)")
-                    continue
+        # ── Job mode: hand the JDs to the background queue (tiering,
+        #    if requested, runs there as the job's first stage) ────
+        if mode == "async":
+            return _start_batch_job(
+                user_id, resume_name, resume_text, jobs, outcomes, tiering_options
+            )
 
-                if not is_technical_text(jd_text):
-                    skipped_files.append(f"{jd_name} (not a technical job description)")
-                    print(f"⚠️ Skipping {jd_name} — not technical")
-                    continue
+        # ── Tiering (if requested) extracts + local-scores every JD
+        #    here so only the chosen ones go to Gemini ─────────────
+        tasks, tiering = _build_tasks(
+            resume_text, jobs, outcomes, len(jd_files), tiering_options, deadline, timings
+        )
 
-                print(f"🔄 Analyzing {idx + 1}/{len(jd_files)}: {jd_name}")
-
-                # ════════════════════════════════════════
-                # ✅ FIX 2: Gemini call with proper fallback
-                # When Gemini returns empty lists for
-                # missing_keywords or suggestions, we now
-                # guarantee the frontend always gets valid
-                # arrays — never None or missing keys.
-                # This was causing the blank card for
-                # SkyMeric_LLM_SME_JD1.pdf
-                # ════════════════════════════════════════
-                try:
-                    gemini_result = analyze_with_gemini(resume_text, jd_text) or {}
-                except Exception as e:
-                    print(f"❌ Gemini error for {jd_name}: {e}")
-                    skipped_files.append(f"{jd_name} (AI analysis failed — please retry)")
-                    continue
+        if tasks:
+            workers  = max(1, min(BATCH_MAX_WORKERS, len(tasks)))
+            executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch-jd")
+            futures  = {
+                executor.submit(run_task, kind, payload, timings): (idx, jd_name)
+                for idx, jd_name, kind, payload in tasks
+            }
 
-                score              = gemini_result.get("score", 0)
-                missing_keywords   = gemini_result.get("missing_keywords") or []   # ✅ None → []
-                suggestions        = gemini_result.get("suggestions") or []        # ✅ None → []
-                learning_resources = gemini_result.get("learning_resources") or [] # ✅ None → []
-                is_fallback        = gemini_result.get("is_fallback", False)
-
-                # ✅ FIX 3: If score came back 0 and everything is
-                # empty, Gemini silently failed — skip this JD
-                # instead of showing a blank card
-                if score == 0 and not missing_keywords and not suggestions:
-                    print(f"⚠️ Gemini returned empty result for {jd_name} — skipping")
-                    skipped_files.append(f"{jd_name} (AI returned no data — please retry)")
-                    continue
+            print(f"⚡ Analyzing {len(tasks)} JD(s) with {workers} worker(s), "
+                  f"{max(0.0, deadline - time.monotonic()):.0f}s left")
 
-                results.append({
-                    "jd_name":            jd_name,
-                    "jd_text":            jd_text[:500],
-                    "score":              score,
-                    "missing_keywords":   missing_keywords,
-                    "suggestions":        suggestions,
-                    "learning_resources": learning_resources,
-                    "is_fallback_score":  is_fallback,
-                    "rank":               0,
-                    "match_quality":      get_match_quality(score),
-                    "priority":           get_priority_level(score, missing_keywords),
-                })
-
-                print(f"✅ {jd_name} — Score: {score}%"
-                      f"{' (estimated)' if is_fallback else ''}")
+            done, not_done = wait(futures, timeout=max(0.0, deadline - time.monotonic()))
 
-            except Exception as e:
-                print(f"❌ Error processing {jd_file.filename}: {e}")
-                traceback.print_exc()
-                skipped_files.append(f"{jd_file.filename} (processing error)")
-                continue
+            for future in done:
+                idx, _ = futures[future]
+                outcomes[idx] = future.result()
+
+            # ── Deadline hit — report unfinished JDs instead of letting
+            #    App Engine kill the whole request with a 502 ──────────
+            for future in not_done:
+                idx, jd_name = futures[future]
+                future.cancel()
+                print(f"⏱️ Batch deadline hit — {jd_name} not finished")
+                outcomes[idx] = (None, f"{jd_name} (analysis timed out — please retry)")
 
-            finally:
-                if jd_path:
-                    cleanup_files(jd_path)
+            # Don't block the response on stragglers
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        results       = []
+        skipped_files = []
+
+        for outcome in outcomes:
+            result, skip_reason = outcome
+            if result is not None:
+                results.append(result)
+            else:
+                skipped_files.append(skip_reason)
 
         # ════════════════════════════════════════
         # 8. VALIDATE RESULTS
         # ════════════════════════════════════════
         if not results:
-            cleanup_files(resume_path)
             error_msg = "No valid job descriptions could be processed."
             if skipped_files:
                 error_msg += " Skipped: " + ", ".join(skipped_files[:5])
@@ -349,11 +739,12 @@ def batch_analyze():
         # ════════════════════════════════════════
         # 9. SORT AND RANK
         # ════════════════════════════════════════
-        results.sort(key=lambda x: x['score'], reverse=True)
+        results.sort(key=_rank_key)
         for idx, result in enumerate(results):
             result['rank'] = idx + 1
 
         print(f"🎯 Batch complete: {len(results)} ranked, {len(skipped_files)} skipped")
+        print(f"⏱️ Stages: {timings.summary()}")
 
         # ════════════════════════════════════════
         # 10. SAVE TO FIRESTORE
@@ -361,37 +752,40 @@ def batch_analyze():
         batch_id = generate_batch_id(user_id, resume_text)
 
         try:
-            db.collection("batch_analysis").document(batch_id).set({
-                "user_id":       user_id,
-                "resume_name":   resume_name,
-                "total_jobs":    len(results),
-                "top_score":     results[0]['score'] if results else 0,
-                "skipped_count": len(skipped_files),
-                "timestamp":     firestore.SERVER_TIMESTAMP,
-            })
-
-            batch_ref = db.collection("batch_analysis").document(batch_id)
-            for i, result in enumerate(results):
-                batch_ref.collection("results").document(str(i)).set(result)
-
-            print(f"💾 Saved batch: {batch_id[:12]}... ({len(results)} results)")
+            save_started = time.time()
+
+            # ✅ PERF: parent + results in one atomic commit (was 1 + N writes)
+            with metrics.timer("batch_store.save_batch"):
+                batch_store.save_batch(batch_id, {
+                    "user_id":       user_id,
+                    "resume_name":   resume_name,
+                    "total_jobs":    len(results),
+                    "top_score":     max(r['score'] for r in results),
+                    "skipped_count": len(skipped_files),
+                    **({"tiering": tiering} if tiering else {}),
+                }, results)
+
+            print(f"💾 Saved batch: {batch_id[:12]}... ({len(results)} results, "
+                  f"{(time.time() - save_started) * 1000:.0f} ms)")
 
         except Exception as e:
             print(f"⚠️ Firestore save failed (non-fatal): {e}")
 
         # ════════════════════════════════════════
-        # 11. CLEANUP + RESPONSE
+        # 11. RESPONSE
         # ════════════════════════════════════════
-        cleanup_files(resume_path)
-
         response_data = {
             "success":             True,
             "batch_id":            batch_id,
             "resume_name":         resume_name,
             "total_jobs_analyzed": len(results),
             "results":             results,
+            "timings":             timings.as_dict(),
         }
 
+        if tiering:
+            response_data["tiering"] = tiering
+
         if skipped_files:
             response_data["warning"]       = (
                 f"{len(skipped_files)} file(s) were skipped "
@@ -402,8 +796,6 @@ def batch_analyze():
         return jsonify(response_data), 200
 
     except Exception as e:
-        cleanup_files(resume_path)
-        cleanup_files(*jd_paths_saved)
         print("❌ Batch analysis unexpected error:")
         traceback.print_exc()
         return jsonify({
@@ -421,19 +813,23 @@ def get_batch_results(batch_id):
         if auth_error:
             return auth_error
 
-        doc_ref = db.collection("batch_analysis").document(batch_id)
-        doc     = doc_ref.get()
+        data = batch_store.get(batch_id)
 
-        if not doc.exists:
+        if data is None:
             return jsonify({"error": "Batch analysis not found."}), 404
 
-        data = doc.to_dict()
-
         if data.get("user_id") != user_id:
             return jsonify({"error": "Unauthorized access."}), 403
 
-        results_docs = doc_ref.collection("results").order_by("__name__").stream()
-        data["results"] = [r.to_dict() for r in results_docs]
+        # ── Job-mode batch: results land in upload order as each JD
+        #    finishes, so rank what we have and report progress ─────
+        if data.get("status"):
+            expire_abandoned(batch_store, batch_id, data)
+            ranked = sorted(data["results"], key=_rank_key)
+            for idx, result in enumerate(ranked):
+                result["rank"] = idx + 1
+            data["results"]  = ranked
+            data["progress"] = progress_summary(data)
 
         return jsonify({"success": True, "data": data}), 200
 
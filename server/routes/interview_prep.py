@@ -3,7 +3,7 @@ import sys
 import traceback
 from datetime import datetime, timedelta
 from flask import Blueprint, request, jsonify
-from firebase_admin import auth, firestore
+from firebase_admin import firestore
 
 # Path setup
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -17,6 +17,7 @@ from utils.interview_utils import (
     get_default_interview_process
 )
 from utils.gemini_utils import generate_interview_questions
+from utils.token_cache import verify_id_token
 
 # ✅ Initialize Firestore client
 db = firestore.client()
@@ -94,7 +95,7 @@ def interview_prep():
         token = auth_header.replace("Bearer ", "").strip()
         
         try:
-            decoded = auth.verify_id_token(token)
+            decoded = verify_id_token(token)
             user_id = decoded.get("uid")
         except Exception as auth_err:
             print(f"❌ Auth verification failed: {auth_err}")
@@ -320,7 +321,7 @@ def clear_interview_cache():
             return jsonify({"error": "Unauthorized"}), 401
 
         token = auth_header.replace("Bearer ", "").strip()
-        decoded = auth.verify_id_token(token)
+        decoded = verify_id_token(token)
         user_id = decoded.get("uid")
 
         if not user_id:
@@ -0,0 +1,299 @@
+# server/routes/jd_library.py
+
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, wait
+from flask import Blueprint, request, jsonify
+from werkzeug.utils import secure_filename
+
+# -------------------------------------------------
+# Path setup
+# -------------------------------------------------
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from firebase_admin import auth, firestore
+
+from utils.extract_text import extract_text, ScannedPDFError, EncryptedPDFError, CorruptedFileError
+from utils.gemini_utils import analyze_with_gemini
+from utils.jd_profile import get_jd_profile
+from utils.jd_library import make_jd_library, rank_library, rank_library_semantic, LibraryFullError
+from utils.semantic_matcher import SEMANTIC_MATCHER_ENABLED, get_semantic_index
+from utils.token_cache import verify_id_token
+
+db = firestore.client()
+
+jd_library_blueprint = Blueprint('jd_library', __name__)
+
+# -------------------------------------------------
+# 📚 JD LIBRARY
+#   POST   /jd-library           ingest JD files (multipart `jds`)
+#                                or JSON {"jds": [{"name", "text"}]}
+#   GET    /jd-library           list saved JDs
+#   DELETE /jd-library/<jd_id>   remove one
+#   POST   /jd-library/rank      rank the library against a resume
+#                                (multipart `resume` or JSON resume_text)
+#
+# Ranking is local (utils/jd_library + match_engine). `semantic`
+# ranks by the semantic_matcher hybrid score instead (saved JDs
+# are embedded into its on-disk index at ingest). `deep_dive`
+# optionally runs the full Gemini analysis on the top N results.
+# -------------------------------------------------
+ALLOWED_RESUME_EXTENSIONS = {'pdf', 'docx'}
+ALLOWED_JD_EXTENSIONS     = {'pdf', 'docx', 'txt'}
+
+MAX_FILE_SIZE        = 10 * 1024 * 1024   # 10MB
+MAX_JD_LENGTH        = 50000
+MAX_INGEST_PER_CALL  = int(os.getenv("JD_LIBRARY_MAX_INGEST", "20"))
+MAX_TOP_K            = 100
+MAX_DEEP_DIVE        = int(os.getenv("JD_LIBRARY_MAX_DEEP_DIVE", "3"))
+DEEP_DIVE_DEADLINE_SECONDS = float(os.getenv("JD_LIBRARY_DEEP_DIVE_DEADLINE", "45"))
+
+jd_library = make_jd_library(db)
+
+
+# -------------------------------------------------
+# Helpers
+# -------------------------------------------------
+
+def allowed_file(filename, allowed_exts):
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in allowed_exts
+
+
+def _verify_token(req):
+    header = req.headers.get("Authorization", "")
+    if not header.startswith("Bearer "):
+        return None, (jsonify({"error": "Unauthorized"}), 401)
+    token = header.split("Bearer ", 1)[1].strip()
+    try:
+        decoded = verify_id_token(token, check_revoked=False)
+        return decoded["uid"], None
+    except auth.ExpiredIdTokenError:
+        return None, (jsonify({"error": "Your session has expired. Please log in again."}), 401)
+    except Exception:
+        return None, (jsonify({"error": "Authentication failed."}), 401)
+
+
+def _file_text(upload, allowed_exts):
+    """(name, text, None) or (name, None, reason) for one uploaded file."""
+    name = secure_filename(upload.filename or "")
+    if not name:
+        return name, None, "no filename"
+    if not allowed_file(name, allowed_exts):
+        return name, None, "invalid format"
+
+    data = upload.read()
+    if not data:
+        return name, None, "empty file"
+    if len(data) > MAX_FILE_SIZE:
+        return name, None, f"too large: {len(data) / (1024 * 1024):.1f}MB"
+
+    try:
+        return name, extract_text(data, filename=name), None
+    except EncryptedPDFError:
+        return name, None, "password-protected PDF"
+    except CorruptedFileError:
+        return name, None, "corrupted file"
+    except ScannedPDFError:
+        return name, None, "scanned PDF — no text"
+    except (ValueError, RuntimeError):
+        return name, None, "unreadable"
+
+
+def _bool_option(data, name):
+    value = data.get(name, False)
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    return bool(value)
+
+
+def _int_option(data, name, default, upper):
+    raw = data.get(name, default)
+    value = int(raw)
+    if value < 0:
+        raise ValueError(name)
+    return min(value, upper)
+
+
+# -------------------------------------------------
+# ➕ INGEST
+# -------------------------------------------------
+@jd_library_blueprint.route('/jd-library', methods=['POST'])
+def add_jds():
+    try:
+        user_id, auth_error = _verify_token(request)
+        if auth_error:
+            return auth_error
+
+        if request.files:
+            items = [_file_text(f, ALLOWED_JD_EXTENSIONS) for f in request.files.getlist('jds')]
+        else:
+            payload = (request.get_json(silent=True) or {}).get("jds") or []
+            items   = [
+                ((jd.get("name") or f"JD {i + 1}").strip()[:200], jd.get("text") or "", None)
+                for i, jd in enumerate(payload) if isinstance(jd, dict)
+            ]
+
+        if not items:
+            return jsonify({"error": "No job descriptions provided."}), 400
+        if len(items) > MAX_INGEST_PER_CALL:
+            return jsonify({
+                "error": f"Too many job descriptions. Maximum is {MAX_INGEST_PER_CALL} per request."
+            }), 400
+
+        added, duplicates, skipped = [], [], []
+        for name, text, reason in items:
+            text = (text or "").strip()
+            if reason is None and len(text) < 50:
+                reason = "too short or empty"
+            elif reason is None and len(text) > MAX_JD_LENGTH:
+                reason = f"too long ({len(text):,} chars)"
+            elif reason is None and not get_jd_profile(text)["is_technical"]:
+                reason = "not a technical job description"
+
+            if reason:
+                skipped.append(f"{name} ({reason})")
+                continue
+
+            try:
+                entry, created = jd_library.add(user_id, name, text)
+            except LibraryFullError as e:
+                skipped.append(f"{name} ({e})")
+                continue
+            (added if created else duplicates).append(entry)
+
+            if created and SEMANTIC_MATCHER_ENABLED:
+                try:
+                    get_semantic_index().add(user_id, entry["jd_id"], text)
+                except Exception as e:
+                    # Not fatal — rank backfills the index from saved text
+                    print(f"⚠️ Semantic index add failed for {name}: {e}")
+
+        print(f"📚 JD library {user_id[:8]}...: {len(added)} added, "
+              f"{len(duplicates)} already saved, {len(skipped)} skipped")
+
+        return jsonify({
+            "success":    True,
+            "added":      added,
+            "duplicates": duplicates,
+            "skipped":    skipped,
+        }), 200 if (added or duplicates) else 400
+
+    except Exception as e:
+        print(f"❌ JD library ingest error: {e}")
+        traceback.print_exc()
+        return jsonify({"error": "Failed to save job descriptions."}), 500
+
+
+# -------------------------------------------------
+# 📋 LIST / 🗑️ DELETE
+# -------------------------------------------------
+@jd_library_blueprint.route('/jd-library', methods=['GET'])
+def list_jds():
+    try:
+        user_id, auth_error = _verify_token(request)
+        if auth_error:
+            return auth_error
+
+        entries = jd_library.list(user_id)
+        return jsonify({"success": True, "count": len(entries), "jds": entries}), 200
+
+    except Exception as e:
+        print(f"❌ JD library list error: {e}")
+        traceback.print_exc()
+        return jsonify({"error": "Failed to load saved job descriptions."}), 500
+
+
+@jd_library_blueprint.route('/jd-library/<jd_id>', methods=['DELETE'])
+def delete_jd(jd_id):
+    try:
+        user_id, auth_error = _verify_token(request)
+        if auth_error:
+            return auth_error
+
+        if not jd_library.delete(user_id, jd_id):
+            return jsonify({"error": "Job description not found."}), 404
+        if SEMANTIC_MATCHER_ENABLED:
+            get_semantic_index().remove(user_id, jd_id)
+        return jsonify({"success": True}), 200
+
+    except Exception as e:
+        print(f"❌ JD library delete error: {e}")
+        traceback.print_exc()
+        return jsonify({"error": "Failed to delete job description."}), 500
+
+
+# -------------------------------------------------
+# 🏆 RANK
+# -------------------------------------------------
+def _deep_dive(user_id, resume_text, results):
+    """Full Gemini analysis for the given results, in parallel, within a deadline."""
+    deadline = time.monotonic() + DEEP_DIVE_DEADLINE_SECONDS
+    executor = ThreadPoolExecutor(max_workers=max(1, len(results)), thread_name_prefix="jd-deep")
+    futures  = {}
+    for result in results:
+        saved = jd_library.get(user_id, result["jd_id"])
+        if saved:
+            futures[executor.submit(analyze_with_gemini, resume_text, saved["text"])] = result
+
+    done, not_done = wait(futures, timeout=max(0.0, deadline - time.monotonic()))
+    for future in done:
+        futures[future]["gemini"] = future.result()
+    for future in not_done:
+        future.cancel()
+        futures[future]["gemini"] = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+@jd_library_blueprint.route('/jd-library/rank', methods=['POST'])
+def rank_jds():
+    try:
+        user_id, auth_error = _verify_token(request)
+        if auth_error:
+            return auth_error
+
+        if 'resume' in request.files:
+            options = request.form
+            name, resume_text, reason = _file_text(request.files['resume'], ALLOWED_RESUME_EXTENSIONS)
+            if reason:
+                return jsonify({"error": f"Resume could not be read ({reason})."}), 400
+        else:
+            options     = request.get_json(silent=True) or {}
+            resume_text = options.get("resume_text") or ""
+
+        resume_text = (resume_text or "").strip()
+        if not resume_text:
+            return jsonify({"error": "Resume is required (file `resume` or `resume_text`)."}), 400
+
+        try:
+            top_k      = _int_option(options, "top_k", 10, MAX_TOP_K) or 10
+            deep_dive  = _int_option(options, "deep_dive", 0, MAX_DEEP_DIVE)
+        except (TypeError, ValueError):
+            return jsonify({"error": "top_k and deep_dive must be non-negative integers."}), 400
+
+        semantic = _bool_option(options, "semantic") and SEMANTIC_MATCHER_ENABLED
+        if semantic:
+            results, stats = rank_library_semantic(
+                jd_library, get_semantic_index(), user_id, resume_text, top_k=top_k
+            )
+        else:
+            results, stats = rank_library(jd_library, user_id, resume_text, top_k=top_k)
+
+        print(f"🏆 JD library rank {user_id[:8]}...: {stats['candidates']} candidate(s), "
+              f"top {len(results)} in {stats['elapsed_ms']} ms{' (semantic)' if semantic else ''}")
+
+        if deep_dive and results:
+            _deep_dive(user_id, resume_text, results[:deep_dive])
+
+        return jsonify({
+            "success": True,
+            "results":  results,
+            "semantic": semantic,
+            "stats":    stats,
+        }), 200
+
+    except Exception as e:
+        print(f"❌ JD library rank error: {e}")
+        traceback.print_exc()
+        return jsonify({"error": "Failed to rank saved job descriptions."}), 500
@@ -1,7 +1,6 @@
 import os
 import sys
 import re
-import uuid
 import traceback
 import hashlib
 from flask import Blueprint, request, jsonify, g
@@ -34,6 +33,9 @@ db = firestore.client()
 from utils.extract_text  import extract_text, ScannedPDFError, EncryptedPDFError, CorruptedFileError
 from utils.gemini_utils  import analyze_with_gemini
 from utils.matcher       import is_technical_text
+from utils.jd_profile    import get_jd_profile, extract_jd_text
+from utils.metrics       import StageTimings
+from utils.token_cache   import verify_id_token
 
 # ✅ REMOVED: verify_session import — it was causing all 401 errors
 # because the frontend never sends X-Session-Id header.
@@ -43,11 +45,11 @@ from utils.matcher       import is_technical_text
 upload_blueprint = Blueprint('upload', __name__)
 
 # -------------------------------------------------
-# Upload folder
+# Upload limits
+# ✅ PERF: Uploads are parsed in memory straight from the request —
+# nothing is written to /tmp/uploads, so there is nothing to clean
+# up (or leak) if a request crashes half-way.
 # -------------------------------------------------
-UPLOAD_FOLDER = "/tmp/uploads"
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-
 ALLOWED_RESUME_EXTENSIONS = {'pdf', 'docx'}
 ALLOWED_JD_EXTENSIONS     = {'pdf', 'docx', 'txt'}
 
@@ -70,15 +72,6 @@ def generate_scan_hash(user_id, resume_text, jd_text):
     return hashlib.sha256(combined.encode("utf-8")).hexdigest()
 
 
-def cleanup_files(*file_paths):
-    for path in file_paths:
-        try:
-            if path and os.path.exists(path):
-                os.remove(path)
-        except Exception as e:
-            print(f"⚠️ Cleanup warning for {path}: {e}")
-
-
 def sanitize_text(text):
     if not text:
         return ""
@@ -87,12 +80,6 @@ def sanitize_text(text):
     return text.strip()
 
 
-def unique_filename(user_id, original_name):
-    safe_name      = secure_filename(original_name)
-    unique_prefix  = f"{user_id[:8]}_{uuid.uuid4().hex[:8]}_"
-    return unique_prefix + safe_name
-
-
 # -------------------------------------------------
 # ✅ Centralised token verifier (self-contained)
 # Works whether or not you use the @require_auth
@@ -115,7 +102,7 @@ def _verify_token(request):
 
     try:
         # check_revoked=False — avoids false "opened on another device" errors
-        decoded  = auth.verify_id_token(token, check_revoked=False)
+        decoded  = verify_id_token(token, check_revoked=False)
         user_id  = decoded["uid"]
         return user_id, None
 
@@ -147,9 +134,6 @@ def _verify_token(request):
 # -------------------------------------------------
 @upload_blueprint.route('/upload', methods=['POST'])
 def upload_files():
-    resume_path = None
-    jd_path     = None
-
     try:
 
         # ════════════════════════════════════════
@@ -221,47 +205,43 @@ def upload_files():
             }), 413
 
         # ════════════════════════════════════════
-        # 5. SAVE FILES with unique names
+        # 5. READ UPLOADS INTO MEMORY
         # ════════════════════════════════════════
-        resume_path = os.path.join(UPLOAD_FOLDER, unique_filename(user_id, resume_name))
-        jd_path     = os.path.join(UPLOAD_FOLDER, unique_filename(user_id, jd_name))
+        resume_bytes = resume.read()
+        jd_bytes     = jd.read()
 
-        resume.save(resume_path)
-        jd.save(jd_path)
-
-        print(f"📁 Saved: {os.path.basename(resume_path)}, {os.path.basename(jd_path)}")
+        print(f"📁 Received: {resume_name} ({resume_size} B), {jd_name} ({jd_size} B)")
 
         # ════════════════════════════════════════
         # 6. TEXT EXTRACTION
+        # ✅ PERF: a re-run with an edited resume and the same JD
+        # serves every JD-side step from memo (extraction cache,
+        # utils/jd_profile); `timings` shows what each stage took
+        # and what the memo saved.
         # ════════════════════════════════════════
+        timings = StageTimings("upload")
+
         try:
-            resume_text = extract_text(resume_path)
+            with timings.stage("extract_resume"):
+                resume_text = extract_text(resume_bytes, filename=resume_name)
         except EncryptedPDFError as e:
-            cleanup_files(resume_path, jd_path)
             return jsonify({"valid": False, "message": str(e)}), 400
         except CorruptedFileError as e:
-            cleanup_files(resume_path, jd_path)
             return jsonify({"valid": False, "message": str(e)}), 400
         except ScannedPDFError as e:
-            cleanup_files(resume_path, jd_path)
             return jsonify({"valid": False, "message": str(e)}), 400
         except (ValueError, RuntimeError) as e:
-            cleanup_files(resume_path, jd_path)
             return jsonify({"valid": False, "message": str(e)}), 400
 
         try:
-            jd_text = extract_text(jd_path)
+            jd_text = extract_jd_text(jd_bytes, filename=jd_name, timings=timings)
         except EncryptedPDFError as e:
-            cleanup_files(resume_path, jd_path)
             return jsonify({"valid": False, "message": f"Job Description error: {e}"}), 400
         except CorruptedFileError as e:
-            cleanup_files(resume_path, jd_path)
             return jsonify({"valid": False, "message": f"Job Description error: {e}"}), 400
         except ScannedPDFError as e:
-            cleanup_files(resume_path, jd_path)
             return jsonify({"valid": False, "message": f"Job Description error: {e}"}), 400
         except (ValueError, RuntimeError) as e:
-            cleanup_files(resume_path, jd_path)
             return jsonify({"valid": False, "message": f"Job Description error: {e}"}), 400
 
         # ════════════════════════════════════════
@@ -274,50 +254,45 @@ def upload_files():
         # 8. TEXT LENGTH VALIDATION
         # ════════════════════════════════════════
         if not resume_text:
-            cleanup_files(resume_path, jd_path)
             return jsonify({
                 "valid":   False,
                 "message": "Resume appears to be empty or image-based. Please upload a text-based resume."
             }), 400
 
         if not jd_text:
-            cleanup_files(resume_path, jd_path)
             return jsonify({
                 "valid":   False,
                 "message": "Job description appears to be empty. Please upload a valid job description."
             }), 400
 
         if len(resume_text) < MIN_RESUME_LENGTH:
-            cleanup_files(resume_path, jd_path)
             return jsonify({
                 "valid":   False,
                 "message": f"Resume is too short ({len(resume_text)} chars). Minimum is {MIN_RESUME_LENGTH}."
             }), 400
 
         if len(jd_text) < MIN_JD_LENGTH:
-            cleanup_files(resume_path, jd_path)
             return jsonify({
                 "valid":   False,
                 "message": f"Job description is too short ({len(jd_text)} chars). Minimum is {MIN_JD_LENGTH}."
             }), 400
 
         if len(jd_text) > MAX_JD_LENGTH:
-            cleanup_files(resume_path, jd_path)
             return jsonify({
                 "valid":   False,
                 "message": f"Job description is too long ({len(jd_text):,} chars). Maximum is {MAX_JD_LENGTH:,}."
             }), 400
 
         # ════════════════════════════════════════
-        # 9. TECH VALIDATION
+        # 9. TECH VALIDATION (JD verdict from its memoized profile)
         # ════════════════════════════════════════
-        resume_is_tech = is_technical_text(resume_text)
-        jd_is_tech     = is_technical_text(jd_text)
+        with timings.stage("validate_resume"):
+            resume_is_tech = is_technical_text(resume_text)
+        jd_is_tech = get_jd_profile(jd_text, timings)["is_technical"]
 
         print(f"🔎 resume_is_tech={resume_is_tech} | jd_is_tech={jd_is_tech}")
 
         if not resume_is_tech and not jd_is_tech:
-            cleanup_files(resume_path, jd_path)
             return jsonify({
                 "valid":   False,
                 "message": "Both your resume and job description appear to be for non-technical roles. "
@@ -325,14 +300,12 @@ def upload_files():
             }), 400
 
         if not resume_is_tech and jd_is_tech:
-            cleanup_files(resume_path, jd_path)
             return jsonify({
                 "valid":   False,
                 "message": "Your resume does not appear to contain technical skills matching this job description."
             }), 400
 
         if resume_is_tech and not jd_is_tech:
-            cleanup_files(resume_path, jd_path)
             return jsonify({
                 "valid":   False,
                 "message": "The job description does not appear to be for a technical role."
@@ -342,10 +315,9 @@ def upload_files():
         # 10. GEMINI ANALYSIS
         # ════════════════════════════════════════
         try:
-            gemini_result = analyze_with_gemini(resume_text, jd_text) or {}
+            gemini_result = analyze_with_gemini(resume_text, jd_text, timings=timings) or {}
         except Exception as e:
             print(f"❌ Gemini API error: {e}")
-            cleanup_files(resume_path, jd_path)
             return jsonify({
                 "valid":   False,
                 "message": "AI analysis service is temporarily unavailable. Please try again in a moment."
@@ -379,7 +351,6 @@ def upload_files():
             })
         except Exception as e:
             print(f"❌ Firestore save error: {e}")
-            cleanup_files(resume_path, jd_path)
             return jsonify({
                 "valid":   False,
                 "message": "Failed to save results. Please try again."
@@ -388,18 +359,18 @@ def upload_files():
         # ════════════════════════════════════════
         # 12. SUCCESS
         # ════════════════════════════════════════
-        cleanup_files(resume_path, jd_path)
         print(f"✅ Analysis complete — score: {gemini_score}, doc: {scan_hash[:12]}...")
+        print(f"⏱️ Stages: {timings.summary()}")
 
         return jsonify({
-            "valid":  True,
-            "doc_id": scan_hash,
+            "valid":   True,
+            "doc_id":  scan_hash,
+            "timings": timings.as_dict(),
         }), 200
 
     except Exception as e:
         print(f"❌ Unexpected error in upload: {e}")
         traceback.print_exc()
-        cleanup_files(resume_path, jd_path)
         return jsonify({
             "valid":   False,
             "message": "An unexpected error occurred. Please try again or contact support."
@@ -1,12 +1,12 @@
 # server/routes/verify_cert.py
 
-import os
 import re
 import json
-import threading
 from flask import Blueprint, request, jsonify
 from firebase_admin import auth
-import google.generativeai as genai
+
+from utils.gemini_client import get_model, generate
+from utils.token_cache import verify_id_token
 
 verify_cert_blueprint = Blueprint('verify_cert', __name__)
 
@@ -116,33 +116,16 @@ Return ONLY valid JSON:
 """
 
 
+GEMINI_MODEL = "gemini-2.5-flash"
+
 def _get_model():
-    key = os.getenv("GEMINI_API_KEY")
-    if not key:
-        return None
-    try:
-        genai.configure(api_key=key)
-        return genai.GenerativeModel("gemini-2.5-flash")
-    except Exception as e:
-        print(f"❌ Gemini init failed: {e}")
-        return None
+    return get_model(GEMINI_MODEL)
 
 def _call_gemini(model, prompt: str, timeout: int = 20):
-    result = {"text": None, "error": None}
-    def target():
-        try:
-            response = model.generate_content(prompt)
-            result["text"] = getattr(response, "text", "")
-        except Exception as e:
-            result["error"] = str(e)
-    t = threading.Thread(target=target, daemon=True)
-    t.start()
-    t.join(timeout=timeout)
-    if t.is_alive():
-        return None, "Gemini timed out"
-    if result["error"]:
-        return None, result["error"]
-    return result["text"], None
+    """Shared Gemini pool (utils/gemini_client) — returns (text, error)."""
+    if not model:
+        return None, "Gemini unavailable"
+    return generate(prompt, timeout_seconds=timeout, model_name=GEMINI_MODEL)
 
 def _extract_json(raw: str):
     if not raw:
@@ -166,7 +149,7 @@ def _verify_token(req):
         return None, (jsonify({"error": "Unauthorized"}), 401)
     token = header.split("Bearer ", 1)[1].strip()
     try:
-        decoded = auth.verify_id_token(token, check_revoked=False)
+        decoded = verify_id_token(token, check_revoked=False)
         return decoded["uid"], None
     except auth.ExpiredIdTokenError:
         return None, (jsonify({"error": "Session expired."}), 401)
@@ -1,6 +1,5 @@
 import os
 import re
-from PyPDF2 import PdfReader
 from reportlab.lib.pagesizes import letter
 from reportlab.lib.units import inch
 import docx
@@ -8,20 +7,21 @@ from docx import Document
 from docx.shared import Pt, RGBColor, Inches
 from io import BytesIO
 
+from utils.parsed_document import ParsedDocument, as_parsed_document
+
 # ======================================================
 # RESUME VALIDATION (NEW!)
 # ======================================================
 
-def validate_resume_content(file_path):
+def validate_resume_content(source, filename=None):
     """
     Validate that uploaded file is actually a resume.
+    source: file path, raw upload (bytes / file-like + filename) or ParsedDocument
     Returns: (is_valid, error_message)
     """
     
-    from utils.extract_text import extract_text
-    
     try:
-        text = extract_text(file_path)
+        text = as_parsed_document(source, filename).text
         
         if not text or len(text.strip()) < 100:
             return False, "File appears to be empty or too short to be a resume"
@@ -80,14 +80,21 @@ def validate_resume_content(file_path):
 # ATS ISSUE DETECTION (IMPROVED)
 # ======================================================
 
-def detect_ats_issues(file_path):
+def detect_ats_issues(source, filename=None):
     """
     Analyze resume file and detect ATS-breaking issues.
     NOW WITH VALIDATION!
+
+    ✅ PERF: source may be a path, the raw upload (bytes / file-like
+    + filename — parsed in memory) or a ParsedDocument. Every check
+    below shares one ParsedDocument, so the file is opened and its
+    text extracted once instead of once per check.
     """
     
+    document = as_parsed_document(source, filename)
+    
     # 1. VALIDATE FIRST
-    is_valid, error_msg = validate_resume_content(file_path)
+    is_valid, error_msg = validate_resume_content(document)
     if not is_valid:
         return {
             'score': 0,
@@ -101,7 +108,7 @@ def detect_ats_issues(file_path):
             }],
             'warnings': [],
             'passed': False,
-            'file_format': os.path.splitext(file_path)[1].lower(),
+            'file_format': document.ext,
             'is_valid_resume': False
         }
     
@@ -110,21 +117,21 @@ def detect_ats_issues(file_path):
     warnings = []
     score = 100
     
-    ext = os.path.splitext(file_path)[1].lower()
+    ext = document.ext
     
     # Check file format specific issues
     if ext == '.pdf':
-        pdf_issues = check_pdf_issues(file_path)
+        pdf_issues = check_pdf_issues(document)
         issues.extend(pdf_issues)
         score -= len(pdf_issues) * 15
         
     elif ext in ['.docx', '.doc']:
-        docx_issues = check_docx_issues(file_path)
+        docx_issues = check_docx_issues(document)
         issues.extend(docx_issues)
         score -= len(docx_issues) * 15
     
     # Check content-based issues
-    content_issues, content_warnings = check_content_issues(file_path)
+    content_issues, content_warnings = check_content_issues(document)
     issues.extend(content_issues)
     warnings.extend(content_warnings)
     score -= len(content_issues) * 10
@@ -143,17 +150,14 @@ def detect_ats_issues(file_path):
     }
 
 
-def check_pdf_issues(pdf_path):
-    """Check PDF-specific ATS issues"""
+def check_pdf_issues(source, filename=None):
+    """Check PDF-specific ATS issues (source: see detect_ats_issues)"""
     issues = []
+    document = as_parsed_document(source, filename)
     
     try:
-        reader = PdfReader(pdf_path)
-        
         # Check for scanned/image-only PDFs
-        text_content = ""
-        for page in reader.pages:
-            text_content += page.extract_text()
+        text_content = "".join(document.page_texts)
         
         if len(text_content.strip()) < 100:
             issues.append({
@@ -166,7 +170,7 @@ def check_pdf_issues(pdf_path):
             })
         
         # Check for form fields
-        if '/AcroForm' in reader.trailer.get('/Root', {}):
+        if '/AcroForm' in document.trailer.get('/Root', {}):
             issues.append({
                 'type': 'form_fields',
                 'severity': 'high',
@@ -182,12 +186,13 @@ def check_pdf_issues(pdf_path):
     return issues
 
 
-def check_docx_issues(docx_path):
-    """Check DOCX-specific ATS issues"""
+def check_docx_issues(source, filename=None):
+    """Check DOCX-specific ATS issues (source: see detect_ats_issues)"""
     issues = []
+    document = as_parsed_document(source, filename)
     
     try:
-        doc = Document(docx_path)
+        doc = document.docx
         
         # 1. Check for tables
         if len(doc.tables) > 0:
@@ -202,10 +207,7 @@ def check_docx_issues(docx_path):
             })
         
         # 2. Check for images
-        image_count = 0
-        for rel in doc.part.rels.values():
-            if "image" in rel.target_ref:
-                image_count += 1
+        image_count = len(document.images)
         
         if image_count > 0:
             issues.append({
@@ -219,7 +221,7 @@ def check_docx_issues(docx_path):
             })
         
         # 3. Check for non-standard fonts
-        non_standard_fonts = check_fonts(doc)
+        non_standard_fonts = check_fonts(document)
         if non_standard_fonts:
             issues.append({
                 'type': 'fonts',
@@ -256,27 +258,33 @@ def check_docx_issues(docx_path):
 
 
 def check_fonts(doc):
-    """Check for non-standard fonts"""
+    """Check for non-standard fonts (doc: ParsedDocument or docx.Document)"""
     standard_fonts = {'calibri', 'arial', 'times new roman', 'georgia', 'helvetica', 'verdana'}
-    found_fonts = set()
     
-    for paragraph in doc.paragraphs:
-        for run in paragraph.runs:
-            if run.font.name:
-                font_name = run.font.name.lower()
-                if font_name not in standard_fonts:
-                    found_fonts.add(run.font.name)
+    if isinstance(doc, ParsedDocument):
+        font_names = doc.fonts
+    else:
+        font_names = [
+            run.font.name
+            for paragraph in doc.paragraphs
+            for run in paragraph.runs
+            if run.font.name
+        ]
+    
+    found_fonts = []
+    for font_name in font_names:
+        if font_name.lower() not in standard_fonts and font_name not in found_fonts:
+            found_fonts.append(font_name)
     
-    return list(found_fonts)[:5]  # Return max 5 fonts
+    return found_fonts[:5]  # Return max 5 fonts
 
 
-def check_content_issues(file_path):
-    """Check content-based issues"""
+def check_content_issues(source, filename=None):
+    """Check content-based issues (source: see detect_ats_issues)"""
     issues = []
     warnings = []
     
-    from utils.extract_text import extract_text
-    text = extract_text(file_path)
+    text = as_parsed_document(source, filename).text
     
     if not text:
         return issues, warnings
@@ -565,16 +573,21 @@ def fix_pdf_preserve_format(pdf_path, output_path):
 # COMPARISON DATA
 # ======================================================
 
-def get_before_after_comparison(original_path, fixed_path):
-    """Generate comparison data"""
+def get_before_after_comparison(original, fixed):
+    """
+    Generate comparison data.
+    original / fixed: paths or ParsedDocuments — the text used for
+    the snippets is the same extraction detect_ats_issues ran.
+    """
     
-    from utils.extract_text import extract_text
+    original_doc = as_parsed_document(original)
+    fixed_doc    = as_parsed_document(fixed)
     
-    original_issues = detect_ats_issues(original_path)
-    original_text = extract_text(original_path)
+    original_issues = detect_ats_issues(original_doc)
+    original_text = original_doc.text
     
-    fixed_issues = detect_ats_issues(fixed_path)
-    fixed_text = extract_text(fixed_path)
+    fixed_issues = detect_ats_issues(fixed_doc)
+    fixed_text = fixed_doc.text
     
     improvements = []
     original_issue_types = {issue['type'] for issue in original_issues['issues']}
@@ -0,0 +1,689 @@
+# server/utils/batch_queue.py
+
+import os
+import json
+import time
+import uuid
+import base64
+import sqlite3
+import threading
+import traceback
+from collections import deque, OrderedDict
+
+from utils import metrics
+from utils.cache_store import cache_path
+from utils.metrics import StageTimings
+
+# ======================================================
+# BACKGROUND BATCH QUEUE
+# Job mode for /batch/analyze: the request returns a batch_id at once
+# and JD tasks run here. Every finished JD is written to the batch
+# store straight away, so GET /batch/<id> can show partial results,
+# a progress counter and an ETA while the rest are still running.
+#
+# Tasks are plain data — (index, label, kind, payload) — run by the
+# handler registered for `kind`, so a backend can persist them. A
+# fan-out task (e.g. tiering) runs first and queues the batch's real
+# JD tasks in its place.
+#
+#   BATCH_QUEUE_BACKEND = "memory" (default — lost on restart)
+#                       | "sqlite" (under JOBMORPH_CACHE_DIR; pending
+#                                   tasks survive a worker restart)
+# A backend hands out tasks with claim() and takes them back with
+# ack(), which also keeps the batch's progress counters. A claimed
+# SQLite task whose worker died is handed out again after
+# BATCH_QUEUE_LEASE_SECONDS (at most BATCH_QUEUE_MAX_ATTEMPTS times).
+#
+# JD tasks from all jobs share BATCH_QUEUE_WORKERS threads so a burst
+# of batches can't open unbounded Gemini connections.
+#
+# A batch can still be orphaned (e.g. the instance and its /tmp go
+# away); expire_abandoned() fails it once it has been "processing"
+# for BATCH_JOB_TIMEOUT_SECONDS.
+# ======================================================
+
+BATCH_QUEUE_BACKEND       = os.getenv("BATCH_QUEUE_BACKEND", "memory").lower()
+BATCH_QUEUE_WORKERS       = int(os.getenv("BATCH_QUEUE_WORKERS", "4"))
+BATCH_QUEUE_LEASE_SECONDS = float(os.getenv("BATCH_QUEUE_LEASE_SECONDS", "300"))
+BATCH_QUEUE_MAX_ATTEMPTS  = int(os.getenv("BATCH_QUEUE_MAX_ATTEMPTS", "3"))
+BATCH_QUEUE_POLL_SECONDS  = float(os.getenv("BATCH_QUEUE_POLL_SECONDS", "1.0"))
+BATCH_JOB_TIMEOUT_SECONDS = float(os.getenv("BATCH_JOB_TIMEOUT_SECONDS", "1800"))
+
+STATUS_PROCESSING = "processing"
+STATUS_COMPLETE   = "complete"
+STATUS_FAILED     = "failed"
+
+
+# ======================================================
+# TASK HANDLERS
+# ======================================================
+
+_handlers = {}    # kind → (fn, fans_out)
+
+
+def register_task_handler(kind, fn, fans_out=False):
+    """
+    fn(payload, timings) runs every task of this kind and returns
+    (result, skip_reason) — or, with fans_out=True, (tasks, skipped, fields):
+    the tasks to queue in its place, {index: reason} for JDs it rejected,
+    and extra fields for the batch document. A fan-out task doesn't
+    count toward the batch's progress.
+    """
+    _handlers[kind] = (fn, fans_out)
+
+
+def _handler(kind):
+    handler = _handlers.get(kind)
+    if handler is None:
+        raise KeyError(f"No batch task handler registered for {kind!r}")
+    return handler
+
+
+def _fans_out(kind):
+    return kind in _handlers and _handlers[kind][1]
+
+
+def run_task(kind, payload, timings):
+    """Run one task in the calling thread (sync mode uses this too)."""
+    return _handler(kind)[0](payload, timings)
+
+
+class QueuedTask:
+    """One claimed task."""
+
+    def __init__(self, task_id, batch_id, index, label, kind, payload, attempts, token=None):
+        self.task_id  = task_id
+        self.batch_id = batch_id
+        self.index    = index
+        self.label    = label
+        self.kind     = kind
+        self.payload  = payload
+        self.attempts = attempts
+        self.token    = token
+
+
+def _new_batch(total, skipped):
+    return {
+        "total":     total,
+        "completed": len(skipped),
+        "results":   0,
+        "top_score": 0,
+        "skipped":   {int(i): r for i, r in skipped.items()},
+        "finished":  False,
+    }
+
+
+def _record(batch, score, skip_reason, index):
+    """Count one finished task. Returns True if that finished the batch."""
+    if skip_reason is None:
+        batch["results"]  += 1
+        batch["top_score"] = max(batch["top_score"], score or 0)
+    else:
+        batch["skipped"][index] = skip_reason
+    batch["completed"] += 1
+    if batch["completed"] >= batch["total"] and not batch["finished"]:
+        batch["finished"] = True
+        return True
+    return False
+
+
+def _record_skipped(batch, skipped):
+    finished_now = False
+    for index, reason in skipped.items():
+        finished_now = _record(batch, None, reason, index) or finished_now
+    return finished_now
+
+
+def _snapshot(batch_id, batch, finished_now=False):
+    return {
+        "batch_id":     batch_id,
+        "total":        batch["total"],
+        "completed":    batch["completed"],
+        "results":      batch["results"],
+        "top_score":    batch["top_score"],
+        "skipped":      dict(batch["skipped"]),
+        "finished_now": finished_now,
+    }
+
+
+# ======================================================
+# BACKENDS
+#   put(batch_id, tasks, total, skipped) → snapshot
+#   claim()                             → QueuedTask | None
+#   ack(task, score, skip_reason)       → snapshot | None (lease lost)
+#   expand(task, tasks, skipped)        → snapshot | None (lease lost)
+#   drop(task)                          → forget the task and its batch
+# ======================================================
+
+class MemoryTaskQueue:
+    """In-process stand-in — pending tasks are lost on restart."""
+
+    def __init__(self):
+        self._lock    = threading.Lock()
+        self._pending = deque()
+        self._batches = {}
+        self._next_id = 0
+
+    def put(self, batch_id, tasks, total, skipped):
+        with self._lock:
+            batch = self._batches[batch_id] = _new_batch(total, skipped)
+            for index, label, kind, payload in tasks:
+                self._next_id += 1
+                self._pending.append(QueuedTask(self._next_id, batch_id, index, label, kind, payload, 0))
+            return _snapshot(batch_id, batch)
+
+    def claim(self):
+        with self._lock:
+            if not self._pending:
+                return None
+            task = self._pending.popleft()
+            task.attempts += 1
+            return task
+
+    def ack(self, task, score=None, skip_reason=None):
+        with self._lock:
+            batch = self._batches.get(task.batch_id)
+            if batch is None:
+                return None
+            finished_now = _record(batch, score, skip_reason, task.index)
+            snapshot     = _snapshot(task.batch_id, batch, finished_now)
+            if batch["finished"]:
+                del self._batches[task.batch_id]
+            return snapshot
+
+    def expand(self, task, tasks, skipped):
+        with self._lock:
+            batch = self._batches.get(task.batch_id)
+            if batch is None:
+                return None
+            for index, label, kind, payload in tasks:
+                self._next_id += 1
+                self._pending.append(QueuedTask(self._next_id, task.batch_id, index, label, kind, payload, 0))
+            finished_now = _record_skipped(batch, skipped)
+            snapshot     = _snapshot(task.batch_id, batch, finished_now)
+            if batch["finished"]:
+                del self._batches[task.batch_id]
+            return snapshot
+
+    def drop(self, task):
+        with self._lock:
+            self._batches.pop(task.batch_id, None)
+
+
+def _encode_payload(payload):
+    def _default(value):
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            return {"__b64__": base64.b64encode(bytes(value)).decode("ascii")}
+        raise TypeError(f"Unserialisable task payload value: {type(value).__name__}")
+    return json.dumps(payload, default=_default)
+
+
+def _decode_payload(text):
+    def _hook(obj):
+        if len(obj) == 1 and "__b64__" in obj:
+            return base64.b64decode(obj["__b64__"])
+        return obj
+    return json.loads(text, object_hook=_hook)
+
+
+class SQLiteTaskQueue:
+    """
+    Local file-backed queue — pending tasks and progress counters
+    survive a restart and are shared by gunicorn workers on one host.
+    """
+
+    def __init__(self, path, lease_seconds=BATCH_QUEUE_LEASE_SECONDS):
+        self.path          = path
+        self.lease_seconds = lease_seconds
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS tasks ("
+                " task_id INTEGER PRIMARY KEY AUTOINCREMENT, batch_id TEXT NOT NULL,"
+                " idx INTEGER NOT NULL, label TEXT NOT NULL, kind TEXT NOT NULL,"
+                " payload TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0,"
+                " claimed_at REAL, token TEXT)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS batches ("
+                " batch_id TEXT PRIMARY KEY, state TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=5)
+
+    @staticmethod
+    def _load_batch(conn, batch_id):
+        row = conn.execute("SELECT state FROM batches WHERE batch_id = ?", (batch_id,)).fetchone()
+        if row is None:
+            return None
+        batch = json.loads(row[0])
+        batch["skipped"] = {int(i): r for i, r in batch["skipped"].items()}
+        return batch
+
+    @staticmethod
+    def _save_batch(conn, batch_id, batch):
+        conn.execute(
+            "INSERT OR REPLACE INTO batches (batch_id, state, updated_at) VALUES (?, ?, ?)",
+            (batch_id, json.dumps(batch), time.time()),
+        )
+
+    def put(self, batch_id, tasks, total, skipped):
+        rows = [(batch_id, index, label, kind, _encode_payload(payload))
+                for index, label, kind, payload in tasks]
+        batch = _new_batch(total, skipped)
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            self._save_batch(conn, batch_id, batch)
+            conn.executemany(
+                "INSERT INTO tasks (batch_id, idx, label, kind, payload) VALUES (?, ?, ?, ?, ?)", rows
+            )
+        return _snapshot(batch_id, batch)
+
+    def claim(self):
+        now   = time.time()
+        token = uuid.uuid4().hex
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT task_id, batch_id, idx, label, kind, payload, attempts FROM tasks"
+                " WHERE claimed_at IS NULL OR claimed_at < ? ORDER BY task_id LIMIT 1",
+                (now - self.lease_seconds,),
+            ).fetchone()
+            if row is None:
+                return None
+            task_id, batch_id, index, label, kind, payload, attempts = row
+            if attempts:
+                metrics.increment("batch_queue.reclaimed")
+            conn.execute(
+                "UPDATE tasks SET claimed_at = ?, token = ?, attempts = attempts + 1 WHERE task_id = ?",
+                (now, token, task_id),
+            )
+        return QueuedTask(task_id, batch_id, index, label, kind, _decode_payload(payload),
+                          attempts + 1, token)
+
+    def ack(self, task, score=None, skip_reason=None):
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            deleted = conn.execute(
+                "DELETE FROM tasks WHERE task_id = ? AND token = ?", (task.task_id, task.token)
+            ).rowcount
+            if not deleted:
+                return None                 # lease expired and another worker took it
+            batch = self._load_batch(conn, task.batch_id)
+            if batch is None:
+                return None
+            finished_now = _record(batch, score, skip_reason, task.index)
+            self._store_batch(conn, task.batch_id, batch)
+            return _snapshot(task.batch_id, batch, finished_now)
+
+    def expand(self, task, tasks, skipped):
+        rows = [(task.batch_id, index, label, kind, _encode_payload(payload))
+                for index, label, kind, payload in tasks]
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            deleted = conn.execute(
+                "DELETE FROM tasks WHERE task_id = ? AND token = ?", (task.task_id, task.token)
+            ).rowcount
+            if not deleted:
+                return None
+            batch = self._load_batch(conn, task.batch_id)
+            if batch is None:
+                return None
+            conn.executemany(
+                "INSERT INTO tasks (batch_id, idx, label, kind, payload) VALUES (?, ?, ?, ?, ?)", rows
+            )
+            finished_now = _record_skipped(batch, skipped)
+            self._store_batch(conn, task.batch_id, batch)
+            return _snapshot(task.batch_id, batch, finished_now)
+
+    def drop(self, task):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM tasks WHERE task_id = ?", (task.task_id,))
+            conn.execute("DELETE FROM batches WHERE batch_id = ?", (task.batch_id,))
+
+    def _store_batch(self, conn, batch_id, batch):
+        if batch["finished"]:
+            conn.execute("DELETE FROM batches WHERE batch_id = ?", (batch_id,))
+        else:
+            self._save_batch(conn, batch_id, batch)
+
+
+def make_task_queue():
+    """Build the backend selected by BATCH_QUEUE_BACKEND."""
+    if BATCH_QUEUE_BACKEND == "sqlite":
+        try:
+            return SQLiteTaskQueue(cache_path("batch_queue.sqlite3"))
+        except Exception as e:
+            print(f"⚠️ SQLite batch queue unavailable, using memory queue: {e}")
+    return MemoryTaskQueue()
+
+
+# ======================================================
+# WORKERS
+# ======================================================
+
+class _BatchWriter:
+    """Orders one batch's store writes within this process."""
+
+    def __init__(self):
+        self.lock     = threading.Lock()
+        self.written  = -1        # completed count of the last progress write
+        self.finished = False
+
+
+class BatchJobQueue:
+
+    # Finished batches' writers are remembered so a late progress
+    # write still sees `finished`
+    MAX_WRITERS = 1024
+
+    def __init__(self, store, backend=None, max_workers=BATCH_QUEUE_WORKERS):
+        self.store         = store
+        self.backend       = backend or make_task_queue()
+        self._wake         = threading.Condition()
+        self._writers      = OrderedDict()
+        self._writers_lock = threading.Lock()
+
+        # Workers start at once so tasks left pending by a previous
+        # process (SQLite backend) resume without a new submit
+        for n in range(max(1, max_workers)):
+            threading.Thread(target=self._work, name=f"batch-job-{n}", daemon=True).start()
+
+    def submit(self, batch_id, tasks, total, skipped=None):
+        """
+        Queue a batch.
+
+        Args:
+            batch_id: parent document id (already created by the caller)
+            tasks:    list of (index, label, kind, payload) — payload
+                      JSON-serialisable (bytes allowed), run by the
+                      handler registered for kind
+            total:    number of JDs in the upload (progress denominator)
+            skipped:  {index: reason} for JDs rejected before queueing
+        """
+        snapshot = self.backend.put(batch_id, tasks, total, skipped or {})
+        if not tasks:
+            self._finish(snapshot)
+            return
+        self._notify(len(tasks))
+
+    def _notify(self, count):
+        with self._wake:
+            self._wake.notify(count)
+
+    def _work(self):
+        while True:
+            try:
+                task = self.backend.claim()
+            except Exception as e:
+                print(f"⚠️ Batch queue claim failed: {e}")
+                metrics.increment("batch_queue.store_errors")
+                task = None
+
+            if task is None:
+                with self._wake:
+                    self._wake.wait(BATCH_QUEUE_POLL_SECONDS)
+                continue
+            self._run_task(task)
+
+    def _run_task(self, task):
+        started = time.time()
+        label   = task.label
+        result, skip_reason = None, f"{label} (processing error)"
+        if _fans_out(task.kind):
+            self._run_fan_out(task)
+            return
+
+        try:
+            if task.attempts > BATCH_QUEUE_MAX_ATTEMPTS:
+                print(f"❌ Batch task {label} gave up after {task.attempts - 1} attempt(s)")
+            else:
+                result, skip_reason = run_task(task.kind, task.payload, StageTimings("batch"))
+
+            # Store round-trips run outside any lock so one slow write
+            # doesn't stall every other task of the batch
+            if result is not None:
+                with metrics.timer("batch_store.add_result"):
+                    self.store.add_result(task.batch_id, task.index, result)
+
+        except Exception as e:
+            if result is not None:
+                print(f"❌ Batch result write failed for {label}: {e}")
+                result, skip_reason = None, f"{label} (could not save result)"
+            else:
+                print(f"❌ Batch task {label} crashed: {e}")
+            traceback.print_exc()
+            metrics.increment("batch_queue.task_errors")
+
+        finally:
+            # Always count the task, or the batch never leaves "processing"
+            try:
+                snapshot = self.backend.ack(
+                    task,
+                    score=result.get("score", 0) if result is not None else None,
+                    skip_reason=None if result is not None else skip_reason,
+                )
+            except Exception as e:
+                # Left claimed — handed out again once its lease runs out
+                print(f"❌ Batch queue ack failed for {label}: {e}")
+                metrics.increment("batch_queue.store_errors")
+                snapshot = None
+
+        if snapshot is None:
+            return
+
+        print(f"📥 Batch {task.batch_id[:12]}... {snapshot['completed']}/{snapshot['total']} "
+              f"({label}, {time.time() - started:.1f}s)")
+
+        if snapshot["finished_now"]:
+            self._finish(snapshot)
+        else:
+            self._write_progress(snapshot)
+
+    def _run_fan_out(self, task):
+        """Run a fan-out task and queue the tasks it produced in its place."""
+        try:
+            if task.attempts > BATCH_QUEUE_MAX_ATTEMPTS:
+                raise RuntimeError(f"gave up after {task.attempts - 1} attempt(s)")
+            tasks, skipped, fields = run_task(task.kind, task.payload, StageTimings("batch"))
+        except Exception as e:
+            # Nothing to count JDs against — fail the whole batch
+            print(f"❌ Batch stage {task.label} failed for {task.batch_id[:12]}...: {e}")
+            traceback.print_exc()
+            metrics.increment("batch_queue.task_errors")
+            self._abort(task, "This batch could not be prepared. Please try again.")
+            return
+
+        try:
+            snapshot = self.backend.expand(task, tasks, skipped)
+        except Exception as e:
+            # Left claimed — run again once its lease runs out
+            print(f"❌ Batch queue expand failed for {task.label}: {e}")
+            metrics.increment("batch_queue.store_errors")
+            return
+        if snapshot is None:
+            return
+
+        print(f"🪄 Batch {task.batch_id[:12]}... {task.label}: {len(tasks)} task(s) queued, "
+              f"{len(skipped)} skipped")
+
+        if fields:
+            try:
+                self.store.update(task.batch_id, fields)
+            except Exception as e:
+                print(f"⚠️ Batch stage fields write failed for {task.batch_id[:12]}...: {e}")
+                metrics.increment("batch_queue.store_errors")
+
+        if snapshot["finished_now"]:
+            self._finish(snapshot)
+        else:
+            self._write_progress(snapshot)
+            self._notify(len(tasks))
+
+    def _abort(self, task, error):
+        try:
+            self.backend.drop(task)
+        except Exception as e:
+            print(f"⚠️ Batch queue drop failed for {task.batch_id[:12]}...: {e}")
+            metrics.increment("batch_queue.store_errors")
+
+        writer = self._writer(task.batch_id)
+        with writer.lock:
+            writer.finished = True
+            try:
+                self.store.update(task.batch_id, {
+                    "status":      STATUS_FAILED,
+                    "finished_at": time.time(),
+                    "error":       error,
+                })
+            except Exception as e:
+                print(f"❌ Batch {task.batch_id[:12]}... status write failed: {e}")
+
+    def _writer(self, batch_id):
+        with self._writers_lock:
+            writer = self._writers.get(batch_id)
+            if writer is None:
+                writer = self._writers[batch_id] = _BatchWriter()
+                while len(self._writers) > self.MAX_WRITERS:
+                    self._writers.popitem(last=False)
+            return writer
+
+    def _write_progress(self, snapshot):
+        writer = self._writer(snapshot["batch_id"])
+        with writer.lock:
+            # A newer snapshot was written already, or the batch is
+            # finished — this one would only move the counters back
+            if writer.finished or snapshot["completed"] <= writer.written:
+                return
+            try:
+                with metrics.timer("batch_store.update"):
+                    self.store.update(snapshot["batch_id"], _progress_fields(snapshot))
+                writer.written = snapshot["completed"]
+            except Exception as e:
+                print(f"⚠️ Batch progress write failed for {snapshot['batch_id'][:12]}...: {e}")
+                metrics.increment("batch_queue.store_errors")
+
+    def _finish(self, snapshot):
+        writer = self._writer(snapshot["batch_id"])
+        with writer.lock:
+            writer.finished = True
+            self._write_final(snapshot)
+
+    def _write_final(self, snapshot):
+        batch_id = snapshot["batch_id"]
+        fields   = _progress_fields(snapshot)
+        fields["status"]      = STATUS_COMPLETE if snapshot["results"] else STATUS_FAILED
+        fields["finished_at"] = time.time()
+        if not snapshot["results"]:
+            fields["error"] = "No valid job descriptions could be processed."
+
+        try:
+            self.store.update(batch_id, fields)
+        except Exception as e:
+            print(f"❌ Batch {batch_id[:12]}... final write failed: {e}")
+            traceback.print_exc()
+            metrics.increment("batch_queue.store_errors")
+            # Last try with just the status, so pollers stop waiting
+            try:
+                self.store.update(batch_id, {
+                    "status":      STATUS_FAILED,
+                    "finished_at": fields["finished_at"],
+                    "error":       "Batch results could not be saved. Please try again.",
+                })
+            except Exception as e:
+                print(f"❌ Batch {batch_id[:12]}... status write failed: {e}")
+            return
+
+        # Inline layout: pack the finished results onto the parent doc
+        # (on failure they stay readable from the results subcollection)
+        compact = getattr(self.store, "compact", None)
+        if compact is not None and snapshot["results"]:
+            try:
+                compact(batch_id)
+            except Exception as e:
+                print(f"⚠️ Batch {batch_id[:12]}... compaction failed: {e}")
+                metrics.increment("batch_queue.store_errors")
+
+        print(f"🎯 Batch job {batch_id[:12]}... {fields['status']}: "
+              f"{snapshot['results']} ranked, {len(snapshot['skipped'])} skipped")
+
+
+def _progress_fields(snapshot):
+    skipped = snapshot["skipped"]
+    return {
+        "completed_files": snapshot["completed"],
+        "total_jobs":      snapshot["results"],
+        "top_score":       snapshot["top_score"],
+        "skipped_count":   len(skipped),
+        "skipped_files":   [skipped[i] for i in sorted(skipped)],
+    }
+
+
+_queue      = None
+_queue_lock = threading.Lock()
+
+
+def get_batch_queue(store):
+    """Process-wide queue writing to `store`; created, and its workers started, on first use."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = BatchJobQueue(store)
+        return _queue
+
+
+def expire_abandoned(store, batch_id, data):
+    """
+    Fail a batch that has been "processing" for longer than
+    BATCH_JOB_TIMEOUT_SECONDS — its tasks were lost (instance gone,
+    memory queue restarted). Updates `data` in place; True if expired.
+    """
+    started = data.get("started_at")
+    if data.get("status") != STATUS_PROCESSING or not started:
+        return False
+    if time.time() - started <= BATCH_JOB_TIMEOUT_SECONDS:
+        return False
+
+    fields = {
+        "status":      STATUS_FAILED,
+        "finished_at": time.time(),
+        "error":       "This batch stopped before it finished. Please run it again.",
+    }
+    try:
+        store.update(batch_id, fields)
+    except Exception as e:
+        print(f"⚠️ Could not mark abandoned batch {batch_id[:12]}... failed: {e}")
+    metrics.increment("batch_queue.abandoned")
+    print(f"⏱️ Batch {batch_id[:12]}... abandoned after {BATCH_JOB_TIMEOUT_SECONDS:g}s — marked failed")
+    data.update(fields)
+    return True
+
+
+def progress_summary(data):
+    """
+    Progress + ETA for a job-mode batch document.
+    ETA extrapolates the wall-clock time per analyzed JD over the queued
+    JDs still running (JDs rejected up front don't count — they're instant).
+    """
+    total     = data.get("total_files", 0) or 0
+    completed = data.get("completed_files", 0) or 0
+    queued    = data.get("queued_files", total) or 0
+    started   = data.get("started_at")
+
+    analyzed  = completed - (total - queued)
+    remaining = total - completed
+
+    eta_seconds = None
+    if data.get("status") == STATUS_PROCESSING and started and analyzed > 0 and remaining > 0:
+        elapsed     = max(0.0, time.time() - started)
+        eta_seconds = round(elapsed / analyzed * remaining, 1)
+    elif data.get("status") != STATUS_PROCESSING:
+        eta_seconds = 0
+
+    return {
+        "completed":   completed,
+        "total":       total,
+        "percent":     round(completed / total * 100) if total else 100,
+        "eta_seconds": eta_seconds,
+    }
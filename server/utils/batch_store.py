@@ -0,0 +1,387 @@
+# server/utils/batch_store.py
+
+import os
+import sys
+import json
+import time
+import zlib
+import sqlite3
+import argparse
+import threading
+
+from utils.cache_store import cache_path
+
+# ======================================================
+# BATCH ANALYSIS STORAGE
+# One interface over where batch_analysis documents live:
+#   BATCH_STORE_BACKEND = "firestore" (default, production)
+#                       | "sqlite"    (local, survives restarts)
+#                       | "memory"    (local testing)
+#
+# Layout mirrors Firestore in every backend:
+#   batch_analysis/{batch_id}                 → parent fields
+#   batch_analysis/{batch_id}/results/{index} → one result per JD
+#
+# save_batch() writes a finished batch (parent + every result) in
+# one atomic commit — one round-trip instead of 1 + N.
+# ======================================================
+
+BATCH_STORE_BACKEND = os.getenv("BATCH_STORE_BACKEND", "firestore").lower()
+
+COLLECTION = "batch_analysis"
+
+# Firestore's per-commit write limit
+FIRESTORE_MAX_BATCH_WRITES = 500
+
+
+# ======================================================
+# RESULTS LAYOUT (Firestore)
+#   BATCH_RESULTS_LAYOUT = "subcollection" (default — one doc per result)
+#                        | "inline"        (results on the parent doc)
+#
+# ✅ PERF: Every GET /batch/<id> on the subcollection layout costs
+# the parent read + a query + N result reads. Inline keeps the
+# ranked results (jd_text already truncated) on the parent, so a
+# dashboard reload is one document read. Large result sets are
+# stored as a zlib-compressed JSON blob; anything still too big
+# for Firestore's 1 MiB document limit stays in the subcollection.
+#
+# Reads handle every layout, so both can coexist;
+# migrate_batches() / `python -m utils.batch_store migrate`
+# converts existing batches.
+# ======================================================
+
+BATCH_RESULTS_LAYOUT = os.getenv("BATCH_RESULTS_LAYOUT", "subcollection").lower()
+
+LAYOUT_INLINE = "inline"   # results: [...]
+LAYOUT_ZLIB   = "zlib"     # results_blob: zlib(JSON)
+
+INLINE_RESULTS_MAX_BYTES = 256 * 1024   # raw JSON kept as a plain array up to this
+PARENT_DOC_MAX_BYTES     = 900 * 1024   # headroom under Firestore's 1 MiB
+
+
+def pack_results(results):
+    """
+    Parent-document fields holding `results`, or None if they can't fit.
+    """
+    raw = json.dumps(results, separators=(",", ":")).encode("utf-8")
+    if len(raw) <= INLINE_RESULTS_MAX_BYTES:
+        return {"results_layout": LAYOUT_INLINE, "results": results}
+
+    blob = zlib.compress(raw, 6)
+    if len(blob) <= PARENT_DOC_MAX_BYTES:
+        return {"results_layout": LAYOUT_ZLIB, "results_blob": blob}
+
+    return None
+
+
+def unpack_results(data):
+    """
+    Pop packed results out of parent fields (in place).
+    Returns the list, or None if the batch uses the subcollection.
+    """
+    layout = data.pop("results_layout", None)
+    blob   = data.pop("results_blob", None)
+
+    if layout == LAYOUT_INLINE:
+        return data.get("results", [])
+    if layout == LAYOUT_ZLIB and blob is not None:
+        return json.loads(zlib.decompress(blob).decode("utf-8"))
+    return None
+
+
+class FirestoreBatchStore:
+    """Production store — the existing batch_analysis collection."""
+
+    def __init__(self, db, layout=None):
+        self.db     = db
+        self.layout = (layout or BATCH_RESULTS_LAYOUT).lower()
+
+    def _doc(self, batch_id):
+        return self.db.collection(COLLECTION).document(batch_id)
+
+    def create(self, batch_id, fields):
+        from firebase_admin import firestore
+        self._doc(batch_id).set({**fields, "timestamp": firestore.SERVER_TIMESTAMP})
+
+    def update(self, batch_id, fields):
+        self._doc(batch_id).set(fields, merge=True)
+
+    def add_result(self, batch_id, index, result):
+        self._doc(batch_id).collection("results").document(str(index)).set(result)
+
+    def save_batch(self, batch_id, fields, results):
+        """
+        ✅ PERF: Parent + all results in one WriteBatch — one atomic
+        commit instead of 1 + N sequential set() round-trips.
+        """
+        from firebase_admin import firestore
+
+        doc_ref = self._doc(batch_id)
+
+        # Inline layout: the whole batch is a single document write
+        packed = pack_results(results) if self.layout == LAYOUT_INLINE else None
+        if packed is not None:
+            doc_ref.set({**fields, **packed, "timestamp": firestore.SERVER_TIMESTAMP})
+            return
+
+        if len(results) + 1 > FIRESTORE_MAX_BATCH_WRITES:
+            raise ValueError(
+                f"Batch too large for one commit ({len(results) + 1} writes, "
+                f"max {FIRESTORE_MAX_BATCH_WRITES})"
+            )
+
+        batch = self.db.batch()
+        batch.set(doc_ref, {**fields, "timestamp": firestore.SERVER_TIMESTAMP})
+        for index, result in enumerate(results):
+            batch.set(doc_ref.collection("results").document(str(index)), result)
+        batch.commit()
+
+    def get(self, batch_id):
+        doc_ref = self._doc(batch_id)
+        doc     = doc_ref.get()
+        if not doc.exists:
+            return None
+
+        data    = doc.to_dict()
+        results = unpack_results(data)
+
+        if results is None:
+            # Subcollection layout (or a batch still being filled in)
+            results_docs = doc_ref.collection("results").order_by("__name__").stream()
+            results      = [r.to_dict() for r in results_docs]
+
+        data["results"] = results
+        return data
+
+    def compact(self, batch_id, delete_legacy=False, force=False):
+        """
+        Move a finished batch's results onto the parent document.
+
+        No-op unless the store is in inline mode (or force=True), the
+        batch exists, isn't processing and isn't packed already.
+        Legacy result docs are kept unless delete_legacy — a reader
+        that fetched the parent just before the switch can still
+        stream them. Returns True if the batch was converted.
+        """
+        if self.layout != LAYOUT_INLINE and not force:
+            return False
+
+        doc_ref = self._doc(batch_id)
+        doc     = doc_ref.get()
+        if not doc.exists:
+            return False
+
+        data = doc.to_dict()
+        if data.get("results_layout") or data.get("status") == "processing":
+            return False
+
+        result_docs = list(doc_ref.collection("results").order_by("__name__").stream())
+        packed      = pack_results([r.to_dict() for r in result_docs])
+        if packed is None:
+            return False
+
+        doc_ref.set(packed, merge=True)
+
+        if delete_legacy:
+            for start in range(0, len(result_docs), FIRESTORE_MAX_BATCH_WRITES):
+                batch = self.db.batch()
+                for result_doc in result_docs[start:start + FIRESTORE_MAX_BATCH_WRITES]:
+                    batch.delete(result_doc.reference)
+                batch.commit()
+
+        return True
+
+
+class MemoryBatchStore:
+    """In-process stand-in — state is lost on restart."""
+
+    def __init__(self):
+        self._docs = {}
+        self._lock = threading.Lock()
+
+    def create(self, batch_id, fields):
+        with self._lock:
+            self._docs[batch_id] = {"fields": {**fields, "timestamp": time.time()}, "results": {}}
+
+    def update(self, batch_id, fields):
+        with self._lock:
+            doc = self._docs.setdefault(batch_id, {"fields": {}, "results": {}})
+            doc["fields"].update(fields)
+
+    def add_result(self, batch_id, index, result):
+        with self._lock:
+            doc = self._docs.setdefault(batch_id, {"fields": {}, "results": {}})
+            doc["results"][str(index)] = json.loads(json.dumps(result))
+
+    def save_batch(self, batch_id, fields, results):
+        with self._lock:
+            self._docs[batch_id] = {
+                "fields":  {**fields, "timestamp": time.time()},
+                "results": {str(i): json.loads(json.dumps(r)) for i, r in enumerate(results)},
+            }
+
+    def get(self, batch_id):
+        with self._lock:
+            doc = self._docs.get(batch_id)
+            if doc is None:
+                return None
+            data = json.loads(json.dumps(doc["fields"]))
+            data["results"] = [
+                json.loads(json.dumps(doc["results"][k])) for k in sorted(doc["results"])
+            ]
+            return data
+
+
+class SQLiteBatchStore:
+    """Local file-backed stand-in — shared by gunicorn workers on one host."""
+
+    def __init__(self, path):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS batches "
+                "(batch_id TEXT PRIMARY KEY, fields TEXT NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results "
+                "(batch_id TEXT NOT NULL, idx TEXT NOT NULL, result TEXT NOT NULL, "
+                "PRIMARY KEY (batch_id, idx))"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=5)
+
+    def create(self, batch_id, fields):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO batches (batch_id, fields) VALUES (?, ?)",
+                (batch_id, json.dumps({**fields, "timestamp": time.time()})),
+            )
+
+    def update(self, batch_id, fields):
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT fields FROM batches WHERE batch_id = ?", (batch_id,)
+            ).fetchone()
+            merged = {**(json.loads(row[0]) if row else {}), **fields}
+            conn.execute(
+                "INSERT OR REPLACE INTO batches (batch_id, fields) VALUES (?, ?)",
+                (batch_id, json.dumps(merged)),
+            )
+
+    def add_result(self, batch_id, index, result):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO results (batch_id, idx, result) VALUES (?, ?, ?)",
+                (batch_id, str(index), json.dumps(result)),
+            )
+
+    def save_batch(self, batch_id, fields, results):
+        # One transaction — readers never see the parent without its results
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO batches (batch_id, fields) VALUES (?, ?)",
+                (batch_id, json.dumps({**fields, "timestamp": time.time()})),
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO results (batch_id, idx, result) VALUES (?, ?, ?)",
+                [(batch_id, str(i), json.dumps(r)) for i, r in enumerate(results)],
+            )
+
+    def get(self, batch_id):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT fields FROM batches WHERE batch_id = ?", (batch_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            data = json.loads(row[0])
+            data["results"] = [
+                json.loads(r[0]) for r in conn.execute(
+                    "SELECT result FROM results WHERE batch_id = ? ORDER BY idx", (batch_id,)
+                )
+            ]
+            return data
+
+
+def make_batch_store(db=None):
+    """
+    Build the store selected by BATCH_STORE_BACKEND.
+    Falls back to memory if Firestore is selected but no client is given.
+    """
+    if BATCH_STORE_BACKEND == "memory":
+        return MemoryBatchStore()
+
+    if BATCH_STORE_BACKEND == "sqlite":
+        return SQLiteBatchStore(cache_path("batch_store.sqlite3"))
+
+    if db is None:
+        print("⚠️ BATCH_STORE_BACKEND=firestore but no Firestore client — using memory store")
+        return MemoryBatchStore()
+
+    return FirestoreBatchStore(db)
+
+
+# ======================================================
+# MIGRATION
+# ======================================================
+
+def migrate_batches(store, limit=None, delete_legacy=False, dry_run=False):
+    """
+    Convert existing Firestore batches to the inline layout.
+    Safe to re-run: packed and in-progress batches are skipped.
+    """
+    stats = {"scanned": 0, "converted": 0, "skipped": 0}
+
+    for doc in store.db.collection(COLLECTION).stream():
+        if limit is not None and stats["scanned"] >= limit:
+            break
+        stats["scanned"] += 1
+
+        if dry_run:
+            data = doc.to_dict() or {}
+            if data.get("results_layout") or data.get("status") == "processing":
+                stats["skipped"] += 1
+            else:
+                stats["converted"] += 1
+            continue
+
+        if store.compact(doc.id, delete_legacy=delete_legacy, force=True):
+            stats["converted"] += 1
+        else:
+            stats["skipped"] += 1
+
+    print(f"🔁 Batch layout migration{' (dry run)' if dry_run else ''}: "
+          f"{stats['converted']} converted, {stats['skipped']} skipped, "
+          f"{stats['scanned']} scanned")
+    return stats
+
+
+def _main(argv=None):
+    """cd server && python -m utils.batch_store migrate [--limit N] [--delete-legacy] [--dry-run]"""
+    parser = argparse.ArgumentParser(prog="python -m utils.batch_store")
+    parser.add_argument("command", choices=["migrate"])
+    parser.add_argument("--limit",         type=int, default=None)
+    parser.add_argument("--delete-legacy", action="store_true",
+                        help="delete results/ subcollection docs after packing")
+    parser.add_argument("--dry-run",       action="store_true")
+    args = parser.parse_args(argv)
+
+    import firebase_admin
+    from firebase_admin import credentials, firestore
+
+    if not firebase_admin._apps:
+        key_path = os.path.abspath(
+            os.path.join(os.path.dirname(__file__), '..', 'serviceAccountKey.json')
+        )
+        firebase_admin.initialize_app(credentials.Certificate(key_path))
+
+    store = FirestoreBatchStore(firestore.client(), layout=LAYOUT_INLINE)
+    migrate_batches(store, limit=args.limit, delete_legacy=args.delete_legacy, dry_run=args.dry_run)
+
+
+if __name__ == "__main__":
+    sys.exit(_main())
@@ -0,0 +1,322 @@
+# server/utils/cache_store.py
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+# ======================================================
+# CONFIG
+# /tmp is the only writable location on App Engine, so every
+# on-disk cache lives under one directory there by default.
+# ======================================================
+
+CACHE_DIR = os.getenv("JOBMORPH_CACHE_DIR", "/tmp/jobmorph_cache")
+
+
+def cache_path(filename):
+    """Absolute path for a cache file inside CACHE_DIR (created on demand)."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    return os.path.join(CACHE_DIR, filename)
+
+
+# ======================================================
+# IN-PROCESS LRU (TIER 1)
+# ======================================================
+
+class LRUCache:
+    """
+    Thread-safe in-memory LRU with optional TTL.
+
+    get() returns None on miss or expiry — callers never see stale data.
+    """
+
+    def __init__(self, max_entries=512, ttl_seconds=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._data = OrderedDict()   # key -> (expires_at | None, value)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self._data[key]
+                return None
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl_seconds=None):
+        ttl = ttl_seconds if ttl_seconds is not None else self.ttl_seconds
+        expires_at = time.time() + ttl if ttl else None
+
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def __len__(self):
+        return len(self._data)
+
+
+# ======================================================
+# ON-DISK SQLITE CACHE (TIER 2 — LOCAL)
+# ======================================================
+
+class SQLiteCache:
+    """
+    Bounded key/value store in a local SQLite file.
+
+    - Values are JSON-serialisable objects or raw bytes
+    - LRU eviction by entry count and/or total stored bytes
+    - Optional TTL; expired rows are treated as misses and purged
+    - Safe across threads and gunicorn workers (one connection per call)
+    """
+
+    def __init__(self, path, max_entries=None, max_bytes=None, ttl_seconds=None):
+        self.path        = path
+        self.max_entries = max_entries
+        self.max_bytes   = max_bytes
+        self.ttl_seconds = ttl_seconds
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS cache (
+                    key         TEXT PRIMARY KEY,
+                    value       BLOB NOT NULL,
+                    is_json     INTEGER NOT NULL,
+                    size        INTEGER NOT NULL,
+                    created_at  REAL NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    expires_at  REAL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_accessed ON cache(accessed_at)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=5)
+
+    def get(self, key):
+        return self.get_with_expiry(key)[0]
+
+    def get_with_expiry(self, key):
+        """(value, expires_at epoch or None) — (None, None) on miss."""
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT value, is_json, expires_at FROM cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None, None
+
+                value, is_json, expires_at = row
+                if expires_at is not None and expires_at <= now:
+                    conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                    return None, None
+
+                conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+
+            return (json.loads(value) if is_json else bytes(value)), expires_at
+
+        except Exception as e:
+            print(f"⚠️ SQLite cache read failed ({os.path.basename(self.path)}): {e}")
+            return None, None
+
+    def set(self, key, value, ttl_seconds=None):
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            blob, is_json = bytes(value), 0
+        else:
+            blob, is_json = json.dumps(value).encode("utf-8"), 1
+
+        now = time.time()
+        ttl = ttl_seconds if ttl_seconds is not None else self.ttl_seconds
+        expires_at = now + ttl if ttl else None
+
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache "
+                    "(key, value, is_json, size, created_at, accessed_at, expires_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, blob, is_json, len(blob), now, now, expires_at),
+                )
+                self._evict(conn, now)
+        except Exception as e:
+            print(f"⚠️ SQLite cache write failed ({os.path.basename(self.path)}): {e}")
+
+    def delete(self, key):
+        try:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+        except Exception as e:
+            print(f"⚠️ SQLite cache delete failed ({os.path.basename(self.path)}): {e}")
+
+    def _evict(self, conn, now):
+        conn.execute("DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+
+        count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache").fetchone()
+
+        if self.max_entries and count > self.max_entries:
+            conn.execute(
+                "DELETE FROM cache WHERE key IN "
+                "(SELECT key FROM cache ORDER BY accessed_at ASC LIMIT ?)",
+                (count - self.max_entries,),
+            )
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+
+        if self.max_bytes and total > self.max_bytes:
+            # Walk oldest-first until we're back under budget
+            excess  = total - self.max_bytes
+            victims = []
+            for key, size in conn.execute("SELECT key, size FROM cache ORDER BY accessed_at ASC"):
+                victims.append((key,))
+                excess -= size
+                if excess <= 0:
+                    break
+            conn.executemany("DELETE FROM cache WHERE key = ?", victims)
+
+    def stats(self):
+        try:
+            with self._connect() as conn:
+                count, total = conn.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache"
+                ).fetchone()
+            return {"entries": count, "bytes": total}
+        except Exception:
+            return {"entries": 0, "bytes": 0}
+
+
+# ======================================================
+# FIRESTORE CACHE (TIER 2 — SHARED ACROSS INSTANCES)
+# ======================================================
+
+class FirestoreCache:
+    """
+    Key/value cache backed by a Firestore collection.
+
+    Only JSON-serialisable values. TTL is enforced on read; pair it with a
+    Firestore TTL policy on `expires_at` (a UTC Timestamp) if you want
+    storage reclaimed.
+    Size-based eviction is left to that policy — Firestore has no cheap
+    "oldest N" delete.
+    """
+
+    def __init__(self, collection, ttl_seconds=None):
+        self.collection  = collection
+        self.ttl_seconds = ttl_seconds
+        self._db         = None
+
+    def _client(self):
+        if self._db is None:
+            from firebase_admin import firestore
+            self._db = firestore.client()
+        return self._db
+
+    def get(self, key):
+        return self.get_with_expiry(key)[0]
+
+    def get_with_expiry(self, key):
+        """(value, expires_at epoch or None) — (None, None) on miss."""
+        try:
+            doc = self._client().collection(self.collection).document(key).get()
+            if not doc.exists:
+                return None, None
+
+            data = doc.to_dict()
+            expires_at = data.get("expires_at")
+            if isinstance(expires_at, datetime):
+                expires_at = expires_at.timestamp()   # older entries stored a float epoch
+            if expires_at is not None and expires_at <= time.time():
+                return None, None
+
+            return json.loads(data["value"]), expires_at
+
+        except Exception as e:
+            print(f"⚠️ Firestore cache read failed ({self.collection}): {e}")
+            return None, None
+
+    def set(self, key, value, ttl_seconds=None):
+        ttl = ttl_seconds if ttl_seconds is not None else self.ttl_seconds
+        now = time.time()
+        try:
+            # Firestore TTL policies only act on Timestamp fields
+            self._client().collection(self.collection).document(key).set({
+                "value":      json.dumps(value),
+                "created_at": now,
+                "expires_at": datetime.fromtimestamp(now + ttl, timezone.utc) if ttl else None,
+            })
+        except Exception as e:
+            print(f"⚠️ Firestore cache write failed ({self.collection}): {e}")
+
+    def delete(self, key):
+        try:
+            self._client().collection(self.collection).document(key).delete()
+        except Exception as e:
+            print(f"⚠️ Firestore cache delete failed ({self.collection}): {e}")
+
+
+# ======================================================
+# TWO-TIER CACHE
+# ======================================================
+
+class TieredCache:
+    """
+    In-process LRU in front of an optional persistent tier.
+    Persistent hits are promoted into memory for no longer than the
+    persistent entry has left.
+    """
+
+    def __init__(self, memory, persistent=None):
+        self.memory     = memory
+        self.persistent = persistent
+
+    def get(self, key):
+        value = self.memory.get(key)
+        if value is not None:
+            return value
+
+        if self.persistent is None:
+            return None
+
+        get_with_expiry = getattr(self.persistent, "get_with_expiry", None)
+        if get_with_expiry is None:
+            value, expires_at = self.persistent.get(key), None
+        else:
+            value, expires_at = get_with_expiry(key)
+        if value is None:
+            return None
+
+        ttl = None                        # memory tier's own default
+        if expires_at is not None:
+            ttl = expires_at - time.time()
+            if ttl <= 0:
+                return value              # expiring right now — don't promote
+            if self.memory.ttl_seconds:
+                ttl = min(ttl, self.memory.ttl_seconds)
+        self.memory.set(key, value, ttl)
+        return value
+
+    def set(self, key, value, ttl_seconds=None):
+        self.memory.set(key, value, ttl_seconds)
+        if self.persistent is not None:
+            self.persistent.set(key, value, ttl_seconds)
+
+    def delete(self, key):
+        self.memory.delete(key)
+        if self.persistent is not None:
+            self.persistent.delete(key)
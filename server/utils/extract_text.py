@@ -1,20 +1,39 @@
 # server/utils/extract_text.py
 
+import io
 import os
 import re
+import time
+import hashlib
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, wait
 from PyPDF2 import PdfReader
 from PyPDF2.errors import PdfReadError
 import docx
 
-# Try to import OCR libraries (Google Cloud Vision API)
+from utils import metrics
+from utils.cache_store import LRUCache, SQLiteCache, TieredCache, cache_path
+
+# OCR building blocks are optional — each backend below checks its own.
+# PyMuPDF renders pages for every backend.
 try:
-    from google.cloud import vision
     import fitz  # PyMuPDF
-    OCR_AVAILABLE = True
-    print("✅ OCR available via Google Cloud Vision API")
-except ImportError as e:
-    OCR_AVAILABLE = False
-    print(f"⚠️ OCR not available: {e}")
+except ImportError:
+    fitz = None
+
+# Google Cloud Vision API
+try:
+    from google.cloud import vision
+except ImportError:
+    vision = None
+
+# Local Tesseract (pip install pytesseract + the tesseract binary)
+try:
+    import pytesseract
+    from PIL import Image
+except ImportError:
+    pytesseract = None
 
 
 # ======================================================
@@ -33,6 +52,14 @@ class CorruptedFileError(Exception):
     """Raised when a file is corrupted or unreadable"""
     pass
 
+class OCRFailedError(ScannedPDFError):
+    """OCR itself errored (quota, auth, network) — transient, never cached"""
+    pass
+
+class _FatalOCRError(Exception):
+    """Quota/auth failure on one page — no point OCR-ing the rest"""
+    pass
+
 
 # ======================================================
 # CONSTANTS
@@ -42,18 +69,194 @@ MAX_OCR_PAGES = 10          # Prevent Vision API cost overrun
 MIN_TEXT_LENGTH = 50        # Minimum chars to consider extraction successful
 MAX_FILE_SIZE_BYTES = 10 * 1024 * 1024  # 10MB hard limit
 
+# OCR pipeline: pages render on the calling thread and are handed to a
+# shared, bounded per-backend pool as soon as each is ready.
+OCR_MAX_WORKERS      = int(os.getenv("OCR_MAX_WORKERS", "4"))
+OCR_DEADLINE_SECONDS = float(os.getenv("OCR_DEADLINE_SECONDS", "25"))
+OCR_DPI              = 200  # good quality, reasonable size for Vision API
+
+# "auto" (Vision if importable, else Tesseract) | "vision" | "tesseract"
+OCR_BACKEND            = os.getenv("OCR_BACKEND", "auto").lower()
+OCR_TESSERACT_LANG     = os.getenv("OCR_TESSERACT_LANG", "eng")
+OCR_TESSERACT_WORKERS  = int(os.getenv("OCR_TESSERACT_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+
+# ======================================================
+# INPUT SOURCES
+# ✅ PERF: Every extractor accepts a filesystem path OR the upload
+# itself (bytes / bytearray / memoryview / file-like such as a
+# werkzeug FileStorage), so routes parse straight from the request
+# instead of save → reopen → delete through /tmp/uploads.
+# Raw input needs a `filename` for the extension.
+# ======================================================
+
+def is_path(source):
+    return isinstance(source, (str, os.PathLike))
+
+
+def read_source(source, filename=None):
+    """
+    Normalise an input to (source, name):
+        path      → (path, path)          — stays on disk
+        bytes-ish → (bytes, filename)
+        file-like → (its bytes, filename or its .filename / .name)
+    """
+    if is_path(source):
+        return source, os.fspath(source)
+
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(source), filename
+
+    if hasattr(source, "read"):
+        name = filename or getattr(source, "filename", None) or getattr(source, "name", None)
+        if hasattr(source, "seek"):
+            source.seek(0)
+        return source.read(), name
+
+    raise TypeError(f"Unsupported source type: {type(source).__name__}")
+
+
+def open_stream(source):
+    """What PdfReader / docx.Document accept: the path itself, or a BytesIO."""
+    return source if is_path(source) else io.BytesIO(source)
+
+
+# ======================================================
+# EXTRACTION CACHE
+# ✅ PERF: The same resume is uploaded again and again across
+# /upload, /batch/analyze and /ats/check. Results are keyed by
+# SHA-256 of the file bytes (+ extension, extractor version and
+# whether OCR is available), so a repeat upload skips PyPDF2,
+# python-docx and Vision OCR entirely.
+#   Stored: {"text": ...} or {"issue": "encrypted" | "corrupted"
+#           | "scanned", "message": ...}
+# Bump EXTRACTOR_VERSION whenever extraction output changes.
+# ======================================================
+
+EXTRACTOR_VERSION = "extract-v1"
+
+EXTRACTION_CACHE_BACKEND     = os.getenv("EXTRACTION_CACHE_BACKEND", "sqlite").lower()
+EXTRACTION_CACHE_MEMORY_SIZE = int(os.getenv("EXTRACTION_CACHE_MEMORY_SIZE", "128"))
+EXTRACTION_CACHE_DISK_SIZE   = int(os.getenv("EXTRACTION_CACHE_DISK_SIZE", "2000"))
+EXTRACTION_CACHE_MAX_BYTES   = int(os.getenv("EXTRACTION_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+_ISSUE_ERRORS = {
+    "encrypted": EncryptedPDFError,
+    "corrupted": CorruptedFileError,
+    "scanned":   ScannedPDFError,
+}
+
+
+def _build_extraction_cache():
+    if EXTRACTION_CACHE_BACKEND == "none":
+        return None
+
+    persistent = None
+    try:
+        if EXTRACTION_CACHE_BACKEND == "sqlite":
+            persistent = SQLiteCache(
+                cache_path("extraction_cache.sqlite3"),
+                max_entries=EXTRACTION_CACHE_DISK_SIZE,
+                max_bytes=EXTRACTION_CACHE_MAX_BYTES,
+            )
+    except Exception as e:
+        print(f"⚠️ Persistent extraction cache unavailable: {e}")
+
+    return TieredCache(LRUCache(max_entries=EXTRACTION_CACHE_MEMORY_SIZE), persistent)
+
+
+_extraction_cache = _build_extraction_cache()
+
+
+def content_sha256(source):
+    """SHA-256 hex digest of a path's file bytes (read in 1MB chunks) or of raw bytes."""
+    if not is_path(source):
+        return hashlib.sha256(source).hexdigest()
+
+    digest = hashlib.sha256()
+    with open(source, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def extraction_cache_key(content_hash, ext):
+    # Different engines give different text — never mix their results
+    ocr_flag = f"ocr-{_ocr_backend.name}" if OCR_AVAILABLE else "no-ocr"
+    return f"{EXTRACTOR_VERSION}:{ocr_flag}:{ext}:{content_hash}"
+
+
+def _cached_extraction(source, ext, document, extract, info=None):
+    """
+    Serve extract() from the cache, or run it and store the outcome.
+    Cached issues are re-raised as the same exception type + message.
+    info: optional dict, filled with {"cached": bool, "cost_ms": the
+    original extraction time} for callers reporting stage timings.
+    """
+    info = info if info is not None else {}
+    info.update({"cached": False, "cost_ms": 0.0})
+
+    if _extraction_cache is None:
+        return extract({})
+
+    content_hash = document.content_hash if document is not None else content_sha256(source)
+    key          = extraction_cache_key(content_hash, ext)
+
+    cached = _extraction_cache.get(key)
+    if cached is not None:
+        metrics.increment("extraction_cache.hit")
+        print(f"⚡ Extraction cache hit ({content_hash[:12]}...)")
+        if "issue" in cached:
+            raise _ISSUE_ERRORS[cached["issue"]](cached["message"])
+        info.update({"cached": True, "cost_ms": cached.get("cost_ms", 0.0)})
+        return cached["text"]
+
+    metrics.increment("extraction_cache.miss")
+
+    notes   = {}
+    started = time.perf_counter()
+    try:
+        text = extract(notes)
+    except OCRFailedError:
+        raise
+    except (EncryptedPDFError, CorruptedFileError, ScannedPDFError) as e:
+        if notes.get("partial"):
+            # Too little text from a cut-short OCR run — not a verdict
+            print("⚠️ Partial OCR result — issue not cached")
+            raise
+        issue = next(name for name, cls in _ISSUE_ERRORS.items() if isinstance(e, cls))
+        _extraction_cache.set(key, {"issue": issue, "message": str(e)})
+        raise
+
+    if notes.get("partial"):
+        # OCR ran out of time on some pages — a retry may do better
+        print("⚠️ Partial OCR result — not cached")
+        return text
+
+    info["cost_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    _extraction_cache.set(key, {"text": text, "cost_ms": info["cost_ms"]})
+    return text
+
 
 # ======================================================
 # MAIN ENTRY
 # ======================================================
 
-def extract_text(file_path):
+def extract_text(source, document=None, filename=None, info=None):
     """
     Extract text from PDF, DOCX, or TXT.
 
+    source:   path, bytes/memoryview or file-like (see read_source);
+              raw input needs `filename` unless it carries one
+    document: optional ParsedDocument for the same file — its
+              already-open PdfReader / page texts / docx.Document
+              are reused instead of parsing the file again
+    info:     optional dict — set to {"cached", "cost_ms"} (see
+              _cached_extraction)
+
     Handles:
     - Text-based PDFs (fast extraction)
-    - Scanned PDFs (OCR fallback if Vision API available)
+    - Scanned PDFs (OCR fallback if an OCR backend is available)
     - Encrypted/password-protected PDFs (clear error)
     - Corrupted files (clear error)
     - DOCX including table text (fix for Issue #17)
@@ -68,13 +271,15 @@ def extract_text(file_path):
         RuntimeError       – extraction failed for other reasons
     """
 
+    source, name = read_source(source, filename)
+
     # ── File existence check ──────────────────────────────────────
-    if not os.path.exists(file_path):
-        raise FileNotFoundError(f"File not found: {file_path}")
+    if is_path(source) and not os.path.exists(source):
+        raise FileNotFoundError(f"File not found: {source}")
 
     # ── File size check ───────────────────────────────────────────
     # Fixes T1.7, T2.1 — catches >10MB before any processing
-    file_size = os.path.getsize(file_path)
+    file_size = os.path.getsize(source) if is_path(source) else len(source)
     if file_size == 0:
         raise ValueError(
             "The uploaded file is empty (0 bytes). "
@@ -88,33 +293,56 @@ def extract_text(file_path):
             f"Tip: Compress your PDF or remove embedded images to reduce size."
         )
 
-    # ── Route by extension ────────────────────────────────────────
-    ext = os.path.splitext(file_path)[1].lower()
+    # ── Route by extension (through the content-hash cache) ──────
+    ext = os.path.splitext(name or "")[1].lower()
+
+    if ext not in {".pdf", ".docx", ".doc", ".txt"}:
+        raise ValueError(
+            f"Unsupported file type: '{ext}'. "
+            "Please upload a PDF, DOCX, or TXT file."
+        )
 
+    return _cached_extraction(
+        source, ext, document,
+        lambda notes: _extract_uncached(source, ext, document, notes),
+        info,
+    )
+
+
+def _extract_uncached(source, ext, document=None, notes=None):
     if ext == ".pdf":
-        return extract_from_pdf_with_ocr(file_path)
+        if document is not None and document.pdf_readable:
+            return extract_from_pdf_with_ocr(
+                source,
+                reader=document.pdf_reader,
+                page_texts=document.page_texts,
+                notes=notes,
+            )
+        # Unreadable/encrypted: re-open so the error is classified below
+        return extract_from_pdf_with_ocr(source, notes=notes)
 
     elif ext in {".docx", ".doc"}:
-        return extract_from_docx(file_path)
-
-    elif ext == ".txt":
-        return extract_from_txt(file_path)
+        if document is not None and document.docx_readable:
+            return extract_from_docx(source, document=document.docx)
+        return extract_from_docx(source)
 
     else:
-        raise ValueError(
-            f"Unsupported file type: '{ext}'. "
-            "Please upload a PDF, DOCX, or TXT file."
-        )
+        return extract_from_txt(source)
 
 
 # ======================================================
 # PDF EXTRACTION (TEXT → OCR FALLBACK)
 # ======================================================
 
-def extract_from_pdf_with_ocr(pdf_path):
+def extract_from_pdf_with_ocr(pdf_source, reader=None, page_texts=None, notes=None):
     """
     Step 1: Try normal text extraction (fast, free)
-    Step 2: If empty → OCR fallback with Vision API
+    Step 2: If empty → OCR fallback (OCR_BACKEND: Vision or Tesseract)
+
+    reader / page_texts: optional pre-parsed PdfReader and its
+    per-page text (see extract_from_pdf_text).
+    notes: optional dict; OCR sets notes["partial"] = True when the
+    deadline cut it short or a page failed.
 
     Correctly distinguishes between:
     - Encrypted PDFs  → EncryptedPDFError
@@ -124,7 +352,7 @@ def extract_from_pdf_with_ocr(pdf_path):
     """
 
     # ── Step 1: Try text extraction ───────────────────────────────
-    text, pdf_issue = extract_from_pdf_text(pdf_path)
+    text, pdf_issue = extract_from_pdf_text(pdf_source, reader=reader, page_texts=page_texts)
 
     # If we got a specific error type, raise immediately — don't try OCR
     if pdf_issue == "encrypted":
@@ -146,9 +374,8 @@ def extract_from_pdf_with_ocr(pdf_path):
         return text.strip()
 
     # ── Step 2: OCR Fallback (scanned/image-only PDF) ────────────
-    print("⚠️ No extractable text found. Attempting OCR with Vision API...")
-
     if not OCR_AVAILABLE:
+        print("⚠️ No extractable text found and no OCR backend available")
         raise ScannedPDFError(
             "This PDF appears to be scanned or image-based — "
             "it contains no readable text. "
@@ -156,8 +383,10 @@ def extract_from_pdf_with_ocr(pdf_path):
             "Tip: If you only have a scanned copy, try retyping it in Word and saving as PDF."
         )
 
+    print(f"⚠️ No extractable text found. Attempting OCR with {_ocr_backend.name}...")
+
     try:
-        ocr_text = extract_from_pdf_ocr(pdf_path)
+        ocr_text = extract_from_pdf_ocr(pdf_source, notes=notes)
 
         if not ocr_text.strip() or len(ocr_text.strip()) < MIN_TEXT_LENGTH:
             raise ScannedPDFError(
@@ -172,16 +401,20 @@ def extract_from_pdf_with_ocr(pdf_path):
         raise
     except Exception as e:
         print(f"❌ OCR failed: {e}")
-        raise ScannedPDFError(
+        raise OCRFailedError(
             f"OCR processing failed for this scanned PDF. "
             "Please upload a text-based PDF instead."
         )
 
 
-def extract_from_pdf_text(pdf_path):
+def extract_from_pdf_text(pdf_source, reader=None, page_texts=None):
     """
     Extract text from text-based PDFs.
 
+    pdf_source: path or raw PDF bytes
+    reader:     already-open PdfReader for pdf_source (skips re-parsing)
+    page_texts: output of extract_pdf_page_texts(reader) if already known
+
     Returns:
         (text: str, issue: str | None)
         issue is one of: None, "encrypted", "corrupted"
@@ -194,7 +427,8 @@ def extract_from_pdf_text(pdf_path):
     text = ""
 
     try:
-        reader = PdfReader(pdf_path)
+        if reader is None:
+            reader = PdfReader(open_stream(pdf_source))
 
         # ── Encrypted PDF check ───────────────────────────────────
         # Must check BEFORE accessing pages
@@ -208,15 +442,12 @@ def extract_from_pdf_text(pdf_path):
             return "", None
 
         # ── Extract text from all pages ───────────────────────────
-        for i, page in enumerate(reader.pages):
-            try:
-                content = page.extract_text()
-                if content:
-                    text += content + "\n"
-            except Exception as page_err:
-                # Single page failure — skip it, continue with rest
-                print(f"⚠️ Page {i+1} extraction failed: {page_err}")
-                continue
+        if page_texts is None:
+            page_texts = extract_pdf_page_texts(reader)
+
+        for content in page_texts:
+            if content:
+                text += content + "\n"
 
     except PdfReadError as e:
         # PyPDF2-specific error = corrupted file
@@ -235,22 +466,227 @@ def extract_from_pdf_text(pdf_path):
     return text, None
 
 
-def extract_from_pdf_ocr(pdf_path):
+def extract_pdf_page_texts(reader):
+    """
+    Text of every page of an open PdfReader, in order.
+    A page that fails to extract yields "" — one bad page
+    shouldn't lose the rest of the resume.
+    """
+    page_texts = []
+    for i, page in enumerate(reader.pages):
+        try:
+            page_texts.append(page.extract_text() or "")
+        except Exception as page_err:
+            print(f"⚠️ Page {i+1} extraction failed: {page_err}")
+            page_texts.append("")
+    return page_texts
+
+
+# ======================================================
+# OCR BACKENDS
+# A backend turns one rendered page into text:
+#   prepare(pix)      → payload   (runs on the rendering thread —
+#                                  PyMuPDF objects aren't thread-safe)
+#   recognize(payload, page_num) → str   (runs in the backend's pool)
+# Pick one with OCR_BACKEND; add more via OCR_BACKENDS.
+# ======================================================
+
+class OCRBackend(ABC):
+    name        = "base"
+    max_workers = 1
+
+    def available(self):
+        return False
+
+    @abstractmethod
+    def prepare(self, pix):
+        """Rendered page → payload for recognize()."""
+
+    @abstractmethod
+    def recognize(self, payload, page_num):
+        """Payload → page text."""
+
+
+class VisionOCRBackend(OCRBackend):
+    """Google Cloud Vision text_detection — network-bound, billed per page."""
+
+    name = "vision"
+
+    def __init__(self, client=None):
+        self.max_workers = OCR_MAX_WORKERS
+        self._client     = client      # injectable (e.g. a fake for offline runs)
+        self._lock       = threading.Lock()
+
+    def available(self):
+        return vision is not None or self._client is not None
+
+    def client(self):
+        # The Vision client is thread-safe and slow to build — create it once
+        with self._lock:
+            if self._client is None:
+                self._client = vision.ImageAnnotatorClient()
+            return self._client
+
+    def prepare(self, pix):
+        return pix.tobytes("png")
+
+    def recognize(self, payload, page_num):
+        image    = vision.Image(content=payload) if vision is not None else payload
+        response = self.client().text_detection(image=image)
+
+        # ── Vision API error handling ─────────────────────────────
+        if response.error.message:
+            error_msg = response.error.message
+            if "quota" in error_msg.lower():
+                raise _FatalOCRError(
+                    "OCR quota exceeded. Please try again later."
+                )
+            elif any(w in error_msg.lower() for w in ["permission", "authentication", "auth"]):
+                raise _FatalOCRError(
+                    "OCR authentication failed. Please contact support."
+                )
+            else:
+                raise Exception(f"OCR error on page {page_num + 1}: {error_msg}")
+
+        if response.text_annotations:
+            return response.text_annotations[0].description
+        return ""
+
+
+class TesseractOCRBackend(OCRBackend):
+    """
+    Local Tesseract via pytesseract — free, offline, CPU-bound.
+    Each call is a tesseract subprocess, so threads give real parallelism.
     """
-    OCR fallback using Google Cloud Vision API.
-    Works on GCP App Engine (no poppler/tesseract needed).
+
+    name = "tesseract"
+
+    def __init__(self, lang=None):
+        self.lang        = lang or OCR_TESSERACT_LANG
+        self.max_workers = OCR_TESSERACT_WORKERS
+        self._available  = None
+
+    def available(self):
+        if self._available is None:
+            try:
+                pytesseract.get_tesseract_version()
+                self._available = True
+            except Exception:
+                self._available = False
+        return self._available
+
+    def prepare(self, pix):
+        # Raw samples straight into PIL — no PNG encode/decode round-trip
+        mode = "RGBA" if pix.alpha else "RGB"
+        return Image.frombytes(mode, (pix.width, pix.height), pix.samples)
+
+    def recognize(self, payload, page_num):
+        try:
+            return pytesseract.image_to_string(
+                payload, lang=self.lang, timeout=OCR_DEADLINE_SECONDS
+            )
+        except RuntimeError as e:
+            # pytesseract raises RuntimeError when its timeout kills the process
+            raise Exception(f"Tesseract timed out on page {page_num + 1}: {e}")
+
+
+OCR_BACKENDS = {
+    "vision":    VisionOCRBackend,
+    "tesseract": TesseractOCRBackend,
+}
+
+
+def _select_ocr_backend():
+    """Build the OCR_BACKEND backend, or None if it (or PyMuPDF) is unavailable."""
+    if fitz is None:
+        print("⚠️ OCR not available: PyMuPDF (fitz) not installed")
+        return None
+
+    if OCR_BACKEND == "auto":
+        candidates = ["vision", "tesseract"]
+    elif OCR_BACKEND in OCR_BACKENDS:
+        candidates = [OCR_BACKEND]
+    else:
+        print(f"⚠️ Unknown OCR_BACKEND '{OCR_BACKEND}' — OCR disabled")
+        return None
+
+    for name in candidates:
+        backend = OCR_BACKENDS[name]()
+        if backend.available():
+            print(f"✅ OCR available via {name} backend")
+            return backend
+
+    print(f"⚠️ OCR not available: no usable backend for OCR_BACKEND={OCR_BACKEND}")
+    return None
+
+
+_ocr_backend  = _select_ocr_backend()
+OCR_AVAILABLE = _ocr_backend is not None
+
+_ocr_executors     = {}   # backend name -> ThreadPoolExecutor
+_ocr_executor_lock = threading.Lock()
+
+
+def _get_ocr_executor(backend):
+    """Process-wide pool per backend — bounds concurrent OCR work across requests."""
+    with _ocr_executor_lock:
+        executor = _ocr_executors.get(backend.name)
+        if executor is None:
+            executor = ThreadPoolExecutor(
+                max_workers=max(1, backend.max_workers),
+                thread_name_prefix=f"ocr-{backend.name}",
+            )
+            _ocr_executors[backend.name] = executor
+        return executor
+
+
+def _ocr_page(backend, page_num, payload):
+    """Recognize one page in the pool; per-backend timing/pages/errors in /metrics."""
+    metrics.increment(f"ocr.{backend.name}.pages")
+    try:
+        with metrics.timer(f"ocr.{backend.name}.page"):
+            return backend.recognize(payload, page_num) or ""
+    except Exception:
+        metrics.increment(f"ocr.{backend.name}.errors")
+        raise
+
+
+def extract_from_pdf_ocr(pdf_source, backend=None, notes=None, deadline_seconds=None):
+    """
+    OCR fallback for scanned PDFs via the configured OCR backend
+    (Google Cloud Vision by default — works on GCP App Engine with
+    no poppler/tesseract needed; OCR_BACKEND=tesseract runs locally).
 
     Fixes:
         Issue #25 – added MAX_OCR_PAGES limit to prevent cost overrun
+
+    ✅ PERF: Pages used to be rendered and sent one after another —
+    ten serial Vision round-trips for a 10-page scan. Now each page
+    is rendered here (PyMuPDF documents aren't thread-safe) and its
+    OCR call handed straight to the backend's pool, so rendering
+    overlaps the requests in flight. Text is joined in page order.
+
+    Deadline: after deadline_seconds (OCR_DEADLINE_SECONDS) whatever
+    pages finished are returned and notes["partial"] is set, so the
+    result isn't cached. Quota/auth errors still fail the whole
+    document; any other page error drops that page and marks the
+    result partial too, so a flaky call is never cached.
+
+    backend: injectable OCRBackend, e.g. VisionOCRBackend(client=fake)
+    for running offline. Defaults to the OCR_BACKEND selection.
     """
-    if not OCR_AVAILABLE:
-        raise ImportError("Google Cloud Vision API not configured")
+    backend = backend or _ocr_backend
+    if backend is None or fitz is None:
+        raise ImportError("No OCR backend configured")
 
-    text = ""
+    deadline = time.monotonic() + (deadline_seconds or OCR_DEADLINE_SECONDS)
+    futures  = []   # (page_num, future) in page order
 
     try:
-        client = vision.ImageAnnotatorClient()
-        pdf_document = fitz.open(pdf_path)
+        if is_path(pdf_source):
+            pdf_document = fitz.open(pdf_source)
+        else:
+            pdf_document = fitz.open(stream=pdf_source, filetype="pdf")
         total_pages = len(pdf_document)
 
         # ── Page limit to prevent cost/timeout overrun ────────────
@@ -259,48 +695,72 @@ def extract_from_pdf_ocr(pdf_path):
         if total_pages > MAX_OCR_PAGES:
             print(f"⚠️ PDF has {total_pages} pages — processing first {MAX_OCR_PAGES} only")
 
-        print(f"📄 Processing {pages_to_process}/{total_pages} page(s) with Vision API...")
-
-        for page_num in range(pages_to_process):
-            page = pdf_document[page_num]
-
-            # 200 DPI = good quality, reasonable size for Vision API
-            pix = page.get_pixmap(dpi=200)
-            img_bytes = pix.tobytes("png")
-
-            image = vision.Image(content=img_bytes)
-            response = client.text_detection(image=image)
-
-            # ── Vision API error handling ─────────────────────────
-            if response.error.message:
-                error_msg = response.error.message
-                if "quota" in error_msg.lower():
-                    raise Exception(
-                        "OCR quota exceeded. Please try again later."
-                    )
-                elif any(w in error_msg.lower() for w in ["permission", "authentication", "auth"]):
-                    raise Exception(
-                        "OCR authentication failed. Please contact support."
-                    )
-                else:
-                    raise Exception(f"OCR error on page {page_num + 1}: {error_msg}")
-
-            # ── Extract text ──────────────────────────────────────
-            if response.text_annotations:
-                page_text = response.text_annotations[0].description
-                text += page_text + "\n\n"
+        print(f"📄 Processing {pages_to_process}/{total_pages} page(s) with {backend.name} OCR "
+              f"({backend.max_workers} in parallel)...")
+
+        executor = _get_ocr_executor(backend)
+        try:
+            for page_num in range(pages_to_process):
+                if time.monotonic() >= deadline:
+                    print(f"⏱️ OCR deadline hit while rendering — stopped at page {page_num + 1}")
+                    break
+
+                with metrics.timer(f"ocr.{backend.name}.render"):
+                    pix     = pdf_document[page_num].get_pixmap(dpi=OCR_DPI)
+                    payload = backend.prepare(pix)
+
+                futures.append((page_num, executor.submit(_ocr_page, backend, page_num, payload)))
+        finally:
+            pdf_document.close()
+
+        done, not_done = wait(
+            [f for _, f in futures], timeout=max(0.0, deadline - time.monotonic())
+        )
+        for future in not_done:
+            future.cancel()
+
+        # ── Collect in page order ─────────────────────────────────
+        page_texts = []
+        failed     = 0
+        for page_num, future in futures:
+            if future not in done:
+                print(f"⏱️ Page {page_num + 1}/{pages_to_process} — OCR timed out")
+                continue
+
+            try:
+                page_text = future.result()
+            except _FatalOCRError:
+                raise
+            except Exception as e:
+                failed += 1
+                print(f"⚠️ Page {page_num + 1}/{pages_to_process} — {e}")
+                continue
+
+            if page_text:
+                page_texts.append(page_text)
                 print(f"✅ Page {page_num + 1}/{pages_to_process} — {len(page_text)} chars")
             else:
                 print(f"⚠️ Page {page_num + 1}/{pages_to_process} — no text found")
 
-        pdf_document.close()
+        # A page that raised isn't finished — the text is incomplete
+        finished = len(done) - failed
+        if finished < pages_to_process:
+            metrics.increment(f"ocr.{backend.name}.partial")
+            if notes is not None:
+                notes["partial"] = True
+            print(f"⚠️ OCR partial: {finished}/{pages_to_process} page(s) OK within "
+                  f"{deadline_seconds or OCR_DEADLINE_SECONDS:g}s ({failed} failed)")
+
+        text = "".join(page_text + "\n\n" for page_text in page_texts)
 
         if not text.strip():
             raise Exception("No text found in any page after OCR")
 
-        print(f"✅ Vision API OCR complete: {len(text)} chars from {pages_to_process} pages")
+        print(f"✅ {backend.name} OCR complete: {len(text)} chars from {finished} pages")
 
     except Exception as e:
+        for _, future in futures:
+            future.cancel()
         print(f"❌ OCR processing failed: {e}")
         raise
 
@@ -311,7 +771,7 @@ def extract_from_pdf_ocr(pdf_path):
 # DOCX EXTRACTION
 # ======================================================
 
-def extract_from_docx(docx_path):
+def extract_from_docx(docx_source, document=None):
     """
     Extract text from DOCX including:
     - Regular paragraphs
@@ -325,9 +785,13 @@ def extract_from_docx(docx_path):
 
     Test coverage:
         T1.3 — DOCX extraction now includes table text
+
+    docx_source: path or raw DOCX bytes
+    document:    already-open docx.Document for docx_source (skips re-parsing)
     """
     try:
-        document = docx.Document(docx_path)
+        if document is None:
+            document = docx.Document(open_stream(docx_source))
         text_parts = []
 
         # ── 1. Paragraphs ─────────────────────────────────────────
@@ -392,24 +856,30 @@ def extract_from_docx(docx_path):
 # TXT EXTRACTION
 # ======================================================
 
-def extract_from_txt(txt_path):
+def extract_from_txt(txt_source):
     """
-    Extract text from TXT files.
+    Extract text from TXT files (path or raw bytes).
     Tries UTF-8 first, falls back to latin-1 for older files.
 
     Test coverage:
         T1.4 — TXT extraction
         T2.4 — Special characters (emoji, Chinese, accented)
     """
+    def read_as(encoding):
+        # Text-mode read either way → identical newline handling
+        if is_path(txt_source):
+            with open(txt_source, "r", encoding=encoding, errors="ignore") as f:
+                return f.read().strip()
+        with io.TextIOWrapper(io.BytesIO(txt_source), encoding=encoding, errors="ignore") as f:
+            return f.read().strip()
+
     # ── Try UTF-8 first ───────────────────────────────────────────
     try:
-        with open(txt_path, "r", encoding="utf-8", errors="ignore") as f:
-            content = f.read().strip()
+        content = read_as("utf-8")
     except Exception:
         # ── Fallback to latin-1 ───────────────────────────────────
         try:
-            with open(txt_path, "r", encoding="latin-1", errors="ignore") as f:
-                content = f.read().strip()
+            content = read_as("latin-1")
         except Exception as e:
             raise RuntimeError(
                 f"Could not read TXT file: {str(e)}. "
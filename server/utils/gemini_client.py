@@ -0,0 +1,347 @@
+# server/utils/gemini_client.py
+
+import os
+import time
+import heapq
+import hashlib
+import itertools
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+import google.generativeai as genai
+
+from utils import metrics
+from utils.rate_limiter import get_scheduler, estimate_tokens, PRIORITY_INTERACTIVE
+
+# ======================================================
+# SHARED GEMINI CLIENT
+# Every Gemini call in the app goes through generate().
+#
+# ✅ PERF: gemini_utils and verify_cert used to start a fresh
+# daemon thread per call and simply stop waiting on timeout —
+# the stuck thread kept running and holding a connection, and
+# a slow upstream piled up unbounded threads. _get_model()
+# also re-ran genai.configure() and built a new GenerativeModel
+# on every request.
+#
+# Now:
+#   - one fixed-size pool (GEMINI_MAX_CONCURRENCY) bounds
+#     concurrent calls process-wide
+#   - the configured model is built once per (API key, model)
+#   - the caller's deadline is passed down as the request
+#     timeout, so the HTTP call itself gives up instead of
+#     lingering; a call still queued at its deadline is
+#     cancelled before it ever starts
+#   - a call the caller stopped waiting on but which is still
+#     running is counted as gemini.abandoned and tracked in
+#     gemini.abandoned_in_flight until it actually finishes
+#
+# ✅ PERF: single-flight — a double-clicked upload, or two batch
+# jobs sharing a JD, used to send the identical prompt twice
+# at once and pay for both. Concurrent generate() calls with
+# the same (model, prompt) now share one in-flight call:
+#   - the first caller submits; later callers wait on the same
+#     future (counted as gemini.coalesced)
+#   - every caller keeps its own timeout, but can't outwait the
+#     shared call's deadline — it ends with the first caller's
+#   - the call is only cancelled/abandoned once every waiter
+#     has given up
+#   - the flight is forgotten as soon as it finishes; finished
+#     results are not cached here (gemini_utils owns that)
+#
+# ✅ PERF: quota — before submitting, the caller reserves one
+# request plus the prompt's estimated tokens from the shared
+# rate_limiter buckets, queued by priority until its deadline.
+# Callers that join an existing flight reserve nothing. If the
+# bucket store itself fails the call goes out unthrottled
+# (counted as ratelimit.store_errors).
+#
+# ✅ PERF: priority also orders the pool itself — quota alone
+# didn't help once a burst of batch calls filled every worker
+# and /upload queued behind them FIFO. Queued calls start in
+# priority order, and GEMINI_INTERACTIVE_SLOTS workers only
+# ever run PRIORITY_INTERACTIVE calls.
+# ======================================================
+
+DEFAULT_MODEL           = "gemini-2.5-flash"
+GEMINI_MAX_CONCURRENCY  = int(os.getenv("GEMINI_MAX_CONCURRENCY", "8"))
+DEFAULT_TIMEOUT_SECONDS = 30   # Issue #12: clean fallback before GCP kills the request at 60s
+
+# Extra wait on top of the request timeout before the caller gives up —
+# lets the SDK raise its own deadline error rather than us racing it.
+_RESULT_GRACE_SECONDS = 2
+
+GEMINI_SINGLE_FLIGHT = os.getenv("GEMINI_SINGLE_FLIGHT", "1") != "0"
+
+# Workers kept free for PRIORITY_INTERACTIVE calls (always leaves ≥1 for the rest)
+GEMINI_INTERACTIVE_SLOTS = int(os.getenv("GEMINI_INTERACTIVE_SLOTS", "2"))
+
+
+class _PriorityExecutor:
+    """
+    Fixed-size pool that starts queued calls lowest priority number
+    first (then in arrival order). Non-interactive calls may use at
+    most max_workers - reserved workers at once.
+    """
+
+    def __init__(self, max_workers, reserved):
+        self.max_workers = max(1, max_workers)
+        self.reserved    = max(0, min(reserved, self.max_workers - 1))
+        self._cond       = threading.Condition()
+        self._queue      = []                   # heap of (priority, seq, future, fn, args)
+        self._seq        = itertools.count()
+        self._deferrable = 0                    # non-interactive calls running now
+        self._started    = False
+
+    def submit(self, priority, fn, *args):
+        future = Future()
+        with self._cond:
+            if not self._started:
+                for n in range(self.max_workers):
+                    threading.Thread(target=self._work, name=f"gemini-{n}", daemon=True).start()
+                self._started = True
+            heapq.heappush(self._queue, (priority, next(self._seq), future, fn, args))
+            self._cond.notify()
+        return future
+
+    def promote(self, future, priority):
+        """Move a still-queued call up to `priority` (a more urgent caller joined it)."""
+        with self._cond:
+            for i, item in enumerate(self._queue):
+                if item[2] is future and item[0] > priority:
+                    self._queue[i] = (priority,) + item[1:]
+                    heapq.heapify(self._queue)
+                    self._cond.notify()
+                    return
+
+    def _next(self):
+        with self._cond:
+            while True:
+                if self._queue:
+                    priority = self._queue[0][0]
+                    if priority == PRIORITY_INTERACTIVE:
+                        return heapq.heappop(self._queue)
+                    if self._deferrable < self.max_workers - self.reserved:
+                        self._deferrable += 1
+                        return heapq.heappop(self._queue)
+                self._cond.wait()
+
+    def _work(self):
+        while True:
+            priority, _, future, fn, args = self._next()
+            try:
+                if future.set_running_or_notify_cancel():
+                    try:
+                        future.set_result(fn(*args))
+                    except BaseException as e:
+                        future.set_exception(e)
+            finally:
+                if priority != PRIORITY_INTERACTIVE:
+                    with self._cond:
+                        self._deferrable -= 1
+                        self._cond.notify()
+
+
+_executor   = _PriorityExecutor(GEMINI_MAX_CONCURRENCY, GEMINI_INTERACTIVE_SLOTS)
+_lock       = threading.Lock()
+_models     = {}      # model name -> GenerativeModel
+_models_key = None    # API key the cached models were configured with
+
+_flights_lock = threading.Lock()
+_flights      = {}    # prompt key -> _Flight still running
+
+
+def get_model(model_name=DEFAULT_MODEL):
+    """
+    Configured, reused GenerativeModel — or None if GEMINI_API_KEY is
+    missing or init fails. Reads the key lazily (Issue #16) and
+    reconfigures only if it changes.
+    """
+    global _models_key
+
+    key = os.getenv("GEMINI_API_KEY")
+    if not key:
+        return None
+
+    with _lock:
+        if key != _models_key:
+            try:
+                genai.configure(api_key=key)
+            except Exception as e:
+                print(f"❌ Gemini configure failed: {e}")
+                return None
+            _models.clear()
+            _models_key = key
+
+        model = _models.get(model_name)
+        if model is None:
+            try:
+                model = genai.GenerativeModel(model_name)
+            except Exception as e:
+                print(f"❌ Gemini model init failed: {e}")
+                return None
+            _models[model_name] = model
+        return model
+
+
+def is_available():
+    return get_model() is not None
+
+
+def _run(model, prompt, deadline):
+    """Pool worker: one generate_content call bounded by the caller's deadline."""
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        # Sat in the queue past its deadline — nobody is waiting any more
+        metrics.increment("gemini.expired_in_queue")
+        raise RuntimeError("Gemini call timed out in the queue before it started")
+
+    metrics.increment("gemini.calls")
+    with metrics.timer("gemini.call"):
+        response = model.generate_content(prompt, request_options={"timeout": remaining})
+    return getattr(response, "text", "")
+
+
+def _release_abandoned(_future):
+    metrics.increment("gemini.abandoned_in_flight", -1)
+
+
+class _Flight:
+    """One submitted call plus the callers still waiting on it."""
+
+    def __init__(self, future, deadline, key=None):
+        self.future   = future
+        self.deadline = deadline
+        self.key      = key
+        self.waiters  = 1
+
+
+def _prompt_key(model_name, prompt):
+    return hashlib.sha256(f"{model_name}\0{prompt}".encode("utf-8")).hexdigest()
+
+
+def _join_flight(model, model_name, prompt, deadline, priority):
+    """Return (flight, coalesced) — an existing call for this prompt, or a new one."""
+    if not GEMINI_SINGLE_FLIGHT:
+        return _Flight(_executor.submit(priority, _run, model, prompt, deadline), deadline), False
+
+    key = _prompt_key(model_name, prompt)
+    with _flights_lock:
+        flight = _flights.get(key)
+        if flight is not None and not flight.future.done():
+            flight.waiters += 1
+            _executor.promote(flight.future, priority)
+            return flight, True
+
+        flight = _Flight(_executor.submit(priority, _run, model, prompt, deadline), deadline, key)
+        _flights[key] = flight
+
+    def _forget(_future):
+        with _flights_lock:
+            if _flights.get(key) is flight:
+                del _flights[key]
+
+    flight.future.add_done_callback(_forget)
+    return flight, False
+
+
+def _in_flight(model_name, prompt):
+    if not GEMINI_SINGLE_FLIGHT:
+        return False
+    with _flights_lock:
+        flight = _flights.get(_prompt_key(model_name, prompt))
+        return flight is not None and not flight.future.done()
+
+
+def _is_quota_error(message):
+    message = message.lower()
+    return any(w in message for w in ("429", "quota", "resource_exhausted"))
+
+
+def _leave_flight(flight):
+    """Caller stopped waiting; cancel/abandon the call if it was the last one."""
+    with _flights_lock:
+        flight.waiters -= 1
+        if flight.waiters > 0:
+            return
+        # Nobody left — don't let a new caller join a call we're giving up on
+        if _flights.get(flight.key) is flight:
+            del _flights[flight.key]
+
+    if not flight.future.cancel() and not flight.future.done():
+        # Already running — it will end at its request timeout, but
+        # until then it occupies a pool slot. Make that visible.
+        metrics.increment("gemini.abandoned")
+        metrics.increment("gemini.abandoned_in_flight")
+        flight.future.add_done_callback(_release_abandoned)
+
+
+def _scheduler_call(fn, *args):
+    # Bookkeeping only — a bucket store error must not turn a result into one
+    try:
+        fn(*args)
+    except Exception as e:
+        print(f"⚠️ Rate limiter update failed: {e}")
+        metrics.increment("ratelimit.store_errors")
+
+
+def generate(prompt, timeout_seconds=DEFAULT_TIMEOUT_SECONDS, model_name=DEFAULT_MODEL,
+             priority=PRIORITY_INTERACTIVE):
+    """
+    Run prompt through Gemini on the shared pool.
+
+    Returns (response_text, error_message) — exactly one is None.
+    Never raises. Timeout errors say "timed out" and quota refusals
+    say "rate limit" so gemini_utils._classify_gemini_error() files
+    them correctly. Identical prompts already in flight are shared,
+    not re-sent. priority is a rate_limiter.PRIORITY_* class.
+    """
+    model = get_model(model_name)
+    if model is None:
+        return None, "Gemini unavailable (GEMINI_API_KEY missing or model init failed)"
+
+    deadline  = time.monotonic() + timeout_seconds
+    scheduler = get_scheduler()
+    reserved  = 0
+    if scheduler is not None and not _in_flight(model_name, prompt):
+        reserved = estimate_tokens(prompt)
+        try:
+            granted = scheduler.acquire(reserved, priority=priority, deadline=deadline)
+        except Exception as e:
+            # Bucket store down (e.g. SQLite "database is locked") —
+            # send the call unthrottled rather than fail the request
+            print(f"⚠️ Rate limiter unavailable, calling Gemini unthrottled: {e}")
+            metrics.increment("ratelimit.store_errors")
+            granted, reserved = True, 0
+        if not granted:
+            return None, f"Gemini rate limit: no quota free within {timeout_seconds}s"
+
+    flight, coalesced = _join_flight(model, model_name, prompt, deadline, priority)
+    if coalesced:
+        metrics.increment("gemini.coalesced")
+        if reserved:
+            _scheduler_call(scheduler.refund, reserved)   # someone beat us to it while we queued
+
+    # Never wait past the shared call's own deadline (+ grace for the SDK's error)
+    wait_until = min(deadline, flight.deadline) + _RESULT_GRACE_SECONDS
+
+    try:
+        text = flight.future.result(timeout=max(0, wait_until - time.monotonic()))
+        with _flights_lock:
+            flight.waiters -= 1
+        return text, None
+
+    except FutureTimeoutError:
+        metrics.increment("gemini.timeouts")
+        if coalesced:
+            metrics.increment("gemini.coalesced_timeouts")
+        _leave_flight(flight)
+        return None, f"Gemini API timed out after {timeout_seconds}s"
+
+    except Exception as e:
+        with _flights_lock:
+            flight.waiters -= 1
+        metrics.increment("gemini.errors")
+        if scheduler is not None and _is_quota_error(str(e)):
+            _scheduler_call(scheduler.drain)
+        return None, str(e)
@@ -1,15 +1,22 @@
 import os
 import re
 import json
+import copy
+import time
 import hashlib
-import threading
 from dotenv import load_dotenv
-import google.generativeai as genai
+
+from utils.gemini_client import get_model, generate
+from utils.rate_limiter import PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND
+from utils.prompt_budget import budget_prompt_inputs, PROMPT_TOKEN_BUDGET
+from utils.jd_profile import get_jd_profile, prompt_clean
+from utils.metrics import StageTimings
+from utils.cache_store import LRUCache, SQLiteCache, FirestoreCache, TieredCache, cache_path
 
 # -------------------------------------------------
 # ENV + CONFIG
-# ✅ FIX (Issue #16): genai.configure() now inside _get_model()
-# so it runs lazily after .env is fully loaded, not at import time.
+# ✅ FIX (Issue #16): genai.configure() runs lazily inside
+# gemini_client.get_model(), after .env is fully loaded.
 # Module-level variables are kept minimal — only API_KEY check.
 # -------------------------------------------------
 load_dotenv()
@@ -25,22 +32,9 @@ else:
 # -------------------------------------------------
 MODEL_NAME = "gemini-2.5-flash"
 
-
-def _get_model():
-    """
-    ✅ FIX (Issue #16): Lazily create model only when needed.
-    Configures Gemini fresh using current env var value.
-    Returns None safely if key missing — never raises.
-    """
-    key = os.getenv("GEMINI_API_KEY")
-    if not key:
-        return None
-    try:
-        genai.configure(api_key=key)
-        return genai.GenerativeModel(MODEL_NAME)
-    except Exception as e:
-        print(f"❌ Gemini model init failed: {e}")
-        return None
+# Bump whenever the analysis prompt template changes so cached results
+# produced by the old prompt are never served for the new one.
+PROMPT_VERSION = "analysis-v2"   # v2: resume/JD trimmed by utils/prompt_budget
 
 
 # -------------------------------------------------
@@ -67,6 +61,66 @@ def stable_fallback_score(resume: str, jd: str) -> int:
     return int(h[:2], 16) % 31 + 40
 
 
+# -------------------------------------------------
+# ANALYSIS CACHE
+# ✅ PERF: Users re-upload the same resume/JD pair constantly and batch
+# users re-run the same JD set. Results are cached by a content hash of
+# (model, prompt version, redacted resume, normalized JD).
+#   Tier 1: in-process LRU
+#   Tier 2: ANALYSIS_CACHE_BACKEND = "sqlite" (default) | "firestore" | "none"
+# Only real Gemini results (is_fallback=False) are ever stored.
+# -------------------------------------------------
+
+ANALYSIS_CACHE_BACKEND     = os.getenv("ANALYSIS_CACHE_BACKEND", "sqlite").lower()
+ANALYSIS_CACHE_TTL_SECONDS = int(os.getenv("ANALYSIS_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+ANALYSIS_CACHE_MEMORY_SIZE = int(os.getenv("ANALYSIS_CACHE_MEMORY_SIZE", "256"))
+ANALYSIS_CACHE_DISK_SIZE   = int(os.getenv("ANALYSIS_CACHE_DISK_SIZE", "5000"))
+
+
+def _build_analysis_cache():
+    persistent = None
+    try:
+        if ANALYSIS_CACHE_BACKEND == "sqlite":
+            persistent = SQLiteCache(
+                cache_path("analysis_cache.sqlite3"),
+                max_entries=ANALYSIS_CACHE_DISK_SIZE,
+                ttl_seconds=ANALYSIS_CACHE_TTL_SECONDS,
+            )
+        elif ANALYSIS_CACHE_BACKEND == "firestore":
+            persistent = FirestoreCache("analysis_cache", ttl_seconds=ANALYSIS_CACHE_TTL_SECONDS)
+    except Exception as e:
+        print(f"⚠️ Persistent analysis cache unavailable ({ANALYSIS_CACHE_BACKEND}): {e}")
+
+    return TieredCache(
+        LRUCache(max_entries=ANALYSIS_CACHE_MEMORY_SIZE, ttl_seconds=ANALYSIS_CACHE_TTL_SECONDS),
+        persistent,
+    )
+
+
+_analysis_cache = _build_analysis_cache()
+
+
+def normalize_jd_for_cache(jd_text: str) -> str:
+    """Collapse whitespace so re-extracted copies of the same JD hash equal."""
+    return re.sub(r"\s+", " ", jd_text or "").strip()
+
+
+def analysis_cache_key(resume_text: str, jd_text: str) -> str:
+    """
+    resume_text must already be redacted. The key is taken before
+    prompt_budget trims the inputs, so the budget is part of it —
+    a result produced from a tighter trim is not served for a wider one.
+    """
+    payload = "\x1f".join([
+        MODEL_NAME,
+        PROMPT_VERSION,
+        str(PROMPT_TOKEN_BUDGET),
+        resume_text,
+        normalize_jd_for_cache(jd_text),
+    ])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
 # -------------------------------------------------
 # SAFE JSON EXTRACTION
 # -------------------------------------------------
@@ -100,43 +154,6 @@ def try_extract_json(raw: str):
     return None
 
 
-# -------------------------------------------------
-# GEMINI CALL WITH TIMEOUT
-# ✅ FIX (Issue #12): Added 30-second timeout on every Gemini call.
-# On GCP, requests timeout at 60s — this gives us a clean
-# fallback before GCP kills the request with a 502 error.
-# Uses threading.Timer which works on GCP App Engine
-# (signal.alarm does NOT work on App Engine).
-# -------------------------------------------------
-
-def _call_gemini_with_timeout(model, prompt: str, timeout_seconds: int = 30):
-    """
-    Call model.generate_content() with a timeout.
-    Returns (response_text, error_message)
-    """
-    result = {"text": None, "error": None}
-
-    def target():
-        try:
-            response = model.generate_content(prompt)
-            result["text"] = getattr(response, "text", "")
-        except Exception as e:
-            result["error"] = str(e)
-
-    thread = threading.Thread(target=target, daemon=True)
-    thread.start()
-    thread.join(timeout=timeout_seconds)
-
-    if thread.is_alive():
-        # Thread is still running — timeout hit
-        return None, f"Gemini API timed out after {timeout_seconds}s"
-
-    if result["error"]:
-        return None, result["error"]
-
-    return result["text"], None
-
-
 # -------------------------------------------------
 # GEMINI ERROR CLASSIFIER
 # -------------------------------------------------
@@ -163,51 +180,12 @@ def _classify_gemini_error(error_msg: str) -> str:
 
 
 # -------------------------------------------------
-# ✅ RESUME ANALYSIS (NEVER FAILS)
+# ANALYSIS PROMPT
+# Any change to this template must bump PROMPT_VERSION.
 # -------------------------------------------------
 
-def analyze_with_gemini(resume_text: str, jd_text: str):
-    """
-    Analyze resume against job description using Gemini.
-
-    GUARANTEES:
-    - Never raises an exception
-    - Always returns a valid dict with all 4 keys
-    - Falls back gracefully on quota, timeout, auth, or parse errors
-    - is_fallback flag is set True when real Gemini data not available
-
-    ✅ FIX (Issue #4): Added is_fallback flag so frontend/ResultPage
-    can show a warning instead of presenting fake score as real.
-
-    Returns:
-        {
-            "score": int (0-100),
-            "missing_keywords": list,
-            "suggestions": list,
-            "learning_resources": list,
-            "is_fallback": bool   ← NEW
-        }
-    """
-    resume_text = redact_personal_info(resume_text)
-    jd_text     = jd_text.strip()
-
-    # ── Absolute fallback — guaranteed return ────────────────────
-    fallback = {
-        "score":              stable_fallback_score(resume_text, jd_text),
-        "missing_keywords":   [],
-        "suggestions":        [],
-        "learning_resources": [],
-        "is_fallback":        True    # ✅ FIX: Frontend knows this is estimated
-    }
-
-    # ── Get model — return fallback if unavailable ────────────────
-    model = _get_model()
-    if not model:
-        print("⚠️ Gemini model unavailable — using fallback score")
-        return fallback
-
-    # ── Build prompt ──────────────────────────────────────────────
-    prompt = f"""
+def _build_analysis_prompt(resume_text: str, jd_text: str) -> str:
+    return f"""
 You are an expert ATS (Applicant Tracking System) evaluator and hiring mentor.
 
 Your goal is to give a REALISTIC and TRUSTWORTHY evaluation.
@@ -269,9 +247,88 @@ JOB DESCRIPTION:
 {jd_text}
 """
 
+
+# -------------------------------------------------
+# ✅ RESUME ANALYSIS (NEVER FAILS)
+# -------------------------------------------------
+
+def analyze_with_gemini(resume_text: str, jd_text: str, priority: int = PRIORITY_INTERACTIVE,
+                        timings: StageTimings = None):
+    """
+    Analyze resume against job description using Gemini.
+
+    GUARANTEES:
+    - Never raises an exception
+    - Always returns a valid dict with all 4 keys
+    - Falls back gracefully on quota, timeout, auth, or parse errors
+    - is_fallback flag is set True when real Gemini data not available
+
+    ✅ FIX (Issue #4): Added is_fallback flag so frontend/ResultPage
+    can show a warning instead of presenting fake score as real.
+
+    Returns:
+        {
+            "score": int (0-100),
+            "missing_keywords": list,
+            "suggestions": list,
+            "learning_resources": list,
+            "is_fallback": bool   ← NEW
+        }
+
+    priority: rate_limiter.PRIORITY_* class — /upload is interactive,
+    batch workers pass PRIORITY_BATCH so they yield quota to it.
+
+    timings: the caller's StageTimings — records "analysis_cache",
+    "jd_profile", "prompt" and "gemini" stages.
+    """
+    timings = timings or StageTimings("analysis")
+
+    with timings.stage("redact_resume"):
+        resume_text = redact_personal_info(resume_text)
+    jd_text = jd_text.strip()
+
+    # ── Absolute fallback — guaranteed return ────────────────────
+    fallback = {
+        "score":              stable_fallback_score(resume_text, jd_text),
+        "missing_keywords":   [],
+        "suggestions":        [],
+        "learning_resources": [],
+        "is_fallback":        True    # ✅ FIX: Frontend knows this is estimated
+    }
+
+    # ── Cache lookup — identical inputs never hit Gemini twice ───
+    started   = time.perf_counter()
+    cache_key = analysis_cache_key(resume_text, jd_text)
+    cached    = _analysis_cache.get(cache_key)
+    timings.record("analysis_cache", (time.perf_counter() - started) * 1000,
+                   memoized=cached is not None)
+    if cached is not None:
+        print(f"⚡ Analysis cache hit ({cache_key[:12]}...) — score: {cached.get('score')}")
+        return copy.deepcopy(cached)
+
+    # ── Get model — return fallback if unavailable ────────────────
+    if not get_model(MODEL_NAME):
+        print("⚠️ Gemini model unavailable — using fallback score")
+        return fallback
+
+    # ── Build prompt — boilerplate stripped, fitted to the token budget.
+    #    The JD side comes from the JD profile memo; only the resume
+    #    side is recomputed ──
+    profile = get_jd_profile(jd_text, timings)
+    with timings.stage("prompt"):
+        prompt_resume, prompt_jd, budget = budget_prompt_inputs(
+            resume_text, jd_text, jd_clean=prompt_clean(profile)
+        )
+    if budget["tokens_saved"]:
+        print(f"✂️ Prompt budget: {budget['tokens_before']} → {budget['tokens_after']} tokens "
+              f"({budget['sections_dropped']} JD section(s) dropped"
+              f"{', truncated' if budget['truncated'] else ''})")
+    prompt = _build_analysis_prompt(prompt_resume, prompt_jd)
+
     # ── First attempt ─────────────────────────────────────────────
     try:
-        raw, error = _call_gemini_with_timeout(model, prompt, timeout_seconds=30)
+        with timings.stage("gemini"):
+            raw, error = generate(prompt, timeout_seconds=30, model_name=MODEL_NAME, priority=priority)
 
         if error:
             error_type = _classify_gemini_error(error)
@@ -295,7 +352,8 @@ JOB DESCRIPTION:
         # ── Retry once if parse failed or response was empty ─────
         if not data:
             print("⚠️ Gemini attempt 1 returned no valid JSON — retrying once...")
-            raw2, error2 = _call_gemini_with_timeout(model, prompt, timeout_seconds=30)
+            with timings.stage("gemini"):
+                raw2, error2 = generate(prompt, timeout_seconds=30, model_name=MODEL_NAME, priority=priority)
 
             if error2:
                 error_type = _classify_gemini_error(error2)
@@ -336,7 +394,7 @@ JOB DESCRIPTION:
         print(f"✅ Gemini analysis complete — score: {score}, "
               f"keywords: {len(missing_keywords)}, suggestions: {len(suggestions)}")
 
-        return {
+        result = {
             "score":              score,
             "missing_keywords":   missing_keywords[:5],
             "suggestions":        suggestions[:5],
@@ -344,6 +402,11 @@ JOB DESCRIPTION:
             "is_fallback":        False     # ✅ Real Gemini data
         }
 
+        # Only real results are cached — a fallback must never stick
+        _analysis_cache.set(cache_key, copy.deepcopy(result))
+
+        return result
+
     except Exception as e:
         print(f"⚠️ Gemini analyze_with_gemini unexpected error: {e}")
         return fallback
@@ -373,8 +436,7 @@ def generate_interview_questions(jd_text: str, experience: str, role_type: str):
     if not jd_text or not jd_text.strip():
         return empty_response
 
-    model = _get_model()
-    if not model:
+    if not get_model(MODEL_NAME):
         print("⚠️ Gemini unavailable — returning empty interview questions")
         return empty_response
 
@@ -453,7 +515,8 @@ JOB DESCRIPTION:
 
     # ── Call with timeout ─────────────────────────────────────────
     try:
-        raw, error = _call_gemini_with_timeout(model, prompt, timeout_seconds=30)
+        raw, error = generate(prompt, timeout_seconds=30, model_name=MODEL_NAME,
+                              priority=PRIORITY_BACKGROUND)
 
         if error:
             error_type = _classify_gemini_error(error)
@@ -465,7 +528,8 @@ JOB DESCRIPTION:
         # ── Retry once if parse failed ────────────────────────────
         if not data:
             print("⚠️ Interview questions attempt 1 no JSON — retrying...")
-            raw2, error2 = _call_gemini_with_timeout(model, prompt, timeout_seconds=30)
+            raw2, error2 = generate(prompt, timeout_seconds=30, model_name=MODEL_NAME,
+                                    priority=PRIORITY_BACKGROUND)
 
             if error2:
                 print(f"⚠️ Interview questions retry failed: {error2}")
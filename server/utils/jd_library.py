@@ -0,0 +1,482 @@
+# server/utils/jd_library.py
+
+import os
+import time
+import hashlib
+import sqlite3
+
+from utils import metrics
+from utils import match_engine
+from utils import semantic_matcher
+from utils.cache_store import LRUCache, cache_path
+from utils.jd_profile import get_jd_profile, jd_vector
+from utils.matcher import scan_text
+
+# ======================================================
+# JD LIBRARY
+# Saved job descriptions, ingested once per user and ranked
+# against a resume without re-uploading or re-extracting.
+#
+# ✅ PERF: /batch/analyze makes the user re-upload every JD
+# file each time, then re-extracts and re-scores all of them.
+# Library JDs keep their extracted text plus the match_engine
+# bit vector, and an inverted index (skill → JD ids) picks the
+# candidates that share at least one skill with the resume;
+# the best-covered ones (JD_LIBRARY_CANDIDATE_POOL) are loaded
+# and scored in one NumPy call.
+#
+#   JD_LIBRARY_BACKEND = "firestore" (default, production)
+#                      | "sqlite"    (local, survives restarts)
+#
+# Firestore layout: jd_library/{user_id}/jds/{jd_id} with a
+# `skills` array field — array_contains_any on that field is
+# the inverted index (single-field index, no composite needed).
+# SQLite keeps the same postings in a jd_skills table.
+#
+# jd_id = sha256(user_id + normalised text) so the same JD
+# ingested twice is stored once.
+#
+# rank_library_semantic() adds the semantic_matcher view:
+# candidates also come from the on-disk LSH index (so a JD
+# asking for "k8s" is found for a kubernetes resume) and
+# results are ordered by hybrid_score.
+# ======================================================
+
+JD_LIBRARY_BACKEND        = os.getenv("JD_LIBRARY_BACKEND", "firestore").lower()
+JD_LIBRARY_MAX_PER_USER   = int(os.getenv("JD_LIBRARY_MAX_PER_USER", "1000"))
+JD_LIBRARY_CANDIDATE_POOL = int(os.getenv("JD_LIBRARY_CANDIDATE_POOL", "500"))
+
+# Size / TTL of _semantic_synced below — an expired user's library
+# is re-checked, which also picks up JDs saved on another host
+JD_LIBRARY_SEMANTIC_SYNC_USERS       = int(os.getenv("JD_LIBRARY_SEMANTIC_SYNC_USERS", "1000"))
+JD_LIBRARY_SEMANTIC_SYNC_TTL_SECONDS = int(os.getenv("JD_LIBRARY_SEMANTIC_SYNC_TTL_SECONDS", "3600"))
+
+COLLECTION = "jd_library"
+
+# Firestore caps array_contains_any at 30 values per query
+_FIRESTORE_ANY_LIMIT = 30
+
+
+def content_hash(text):
+    return hashlib.sha256(" ".join((text or "").split()).encode("utf-8")).hexdigest()
+
+
+def make_jd_id(user_id, text):
+    return hashlib.sha256(f"{user_id}|{content_hash(text)}".encode("utf-8")).hexdigest()[:32]
+
+
+def _encode_entry(text):
+    # Same JD-hash memo as /upload and /batch — ingest already profiled it
+    vector = jd_vector(get_jd_profile(text))
+    return vector, match_engine.skills_of(vector)
+
+
+class LibraryFullError(Exception):
+    """User already has JD_LIBRARY_MAX_PER_USER saved JDs."""
+
+
+# ======================================================
+# SQLITE BACKEND
+# ======================================================
+
+class SQLiteJDLibrary:
+    """Local file-backed library — shared by gunicorn workers on one host."""
+
+    def __init__(self, path):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jds ("
+                " jd_id TEXT PRIMARY KEY, user_id TEXT NOT NULL, name TEXT NOT NULL,"
+                " text TEXT NOT NULL, vector BLOB NOT NULL, vocab TEXT NOT NULL,"
+                " skills_count INTEGER NOT NULL, created_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS jds_user ON jds (user_id, created_at)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jd_skills ("
+                " user_id TEXT NOT NULL, skill TEXT NOT NULL, jd_id TEXT NOT NULL,"
+                " PRIMARY KEY (user_id, skill, jd_id))"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=5)
+
+    def add(self, user_id, name, text):
+        """Returns (entry, created). Raises LibraryFullError."""
+        jd_id  = make_jd_id(user_id, text)
+        vector, skills = _encode_entry(text)
+        entry  = {"jd_id": jd_id, "name": name, "skills_count": len(skills),
+                  "created_at": time.time()}
+
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if conn.execute("SELECT 1 FROM jds WHERE jd_id = ?", (jd_id,)).fetchone():
+                return entry, False
+
+            count = conn.execute("SELECT COUNT(*) FROM jds WHERE user_id = ?", (user_id,)).fetchone()[0]
+            if count >= JD_LIBRARY_MAX_PER_USER:
+                raise LibraryFullError(f"JD library is full ({JD_LIBRARY_MAX_PER_USER} JDs)")
+
+            conn.execute(
+                "INSERT INTO jds (jd_id, user_id, name, text, vector, vocab, skills_count, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (jd_id, user_id, name, text, match_engine.pack_row(vector),
+                 match_engine.VOCAB_VERSION, len(skills), entry["created_at"]),
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO jd_skills (user_id, skill, jd_id) VALUES (?, ?, ?)",
+                [(user_id, skill, jd_id) for skill in skills],
+            )
+        return entry, True
+
+    def list(self, user_id):
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT jd_id, name, skills_count, created_at FROM jds"
+                " WHERE user_id = ? ORDER BY created_at DESC",
+                (user_id,),
+            ).fetchall()
+        return [{"jd_id": r[0], "name": r[1], "skills_count": r[2], "created_at": r[3]}
+                for r in rows]
+
+    def get(self, user_id, jd_id):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT name, text, skills_count, created_at FROM jds"
+                " WHERE jd_id = ? AND user_id = ?",
+                (jd_id, user_id),
+            ).fetchone()
+        if row is None:
+            return None
+        return {"jd_id": jd_id, "name": row[0], "text": row[1],
+                "skills_count": row[2], "created_at": row[3]}
+
+    def delete(self, user_id, jd_id):
+        with self._connect() as conn:
+            deleted = conn.execute(
+                "DELETE FROM jds WHERE jd_id = ? AND user_id = ?", (jd_id, user_id)
+            ).rowcount
+            conn.execute("DELETE FROM jd_skills WHERE user_id = ? AND jd_id = ?", (user_id, jd_id))
+        return bool(deleted)
+
+    def candidates(self, user_id, skills, limit):
+        """JD ids sharing at least one skill, best skill coverage first."""
+        if not skills:
+            return []
+        marks = ",".join("?" * len(skills))
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT p.jd_id, COUNT(*) AS hits, j.skills_count FROM jd_skills p"
+                f" JOIN jds j ON j.jd_id = p.jd_id"
+                f" WHERE p.user_id = ? AND p.skill IN ({marks})"
+                f" GROUP BY p.jd_id"
+                f" ORDER BY CAST(hits AS REAL) / j.skills_count DESC, hits DESC, p.jd_id LIMIT ?",
+                (user_id, *skills, limit),
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def names(self, user_id, jd_ids):
+        """{jd_id: name} for the ids that exist."""
+        if not jd_ids:
+            return {}
+        marks = ",".join("?" * len(jd_ids))
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT jd_id, name FROM jds WHERE user_id = ? AND jd_id IN ({marks})",
+                (user_id, *jd_ids),
+            ).fetchall()
+        return dict(rows)
+
+    def load_vectors(self, user_id, jd_ids):
+        """[(jd_id, name, vector)] — re-encodes rows stored under an older vocabulary."""
+        if not jd_ids:
+            return []
+        marks = ",".join("?" * len(jd_ids))
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT jd_id, name, vector, vocab FROM jds"
+                f" WHERE user_id = ? AND jd_id IN ({marks})",
+                (user_id, *jd_ids),
+            ).fetchall()
+
+        loaded = []
+        for jd_id, name, packed, vocab in rows:
+            if vocab == match_engine.VOCAB_VERSION:
+                vector = match_engine.unpack_rows([packed])[0]
+            else:
+                vector = self._reencode(user_id, jd_id)
+            loaded.append((jd_id, name, vector))
+        return loaded
+
+    def _reencode(self, user_id, jd_id):
+        metrics.increment("jd_library.reencoded")
+        text = self.get(user_id, jd_id)["text"]
+        vector, skills = _encode_entry(text)
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jds SET vector = ?, vocab = ?, skills_count = ? WHERE jd_id = ?",
+                (match_engine.pack_row(vector), match_engine.VOCAB_VERSION, len(skills), jd_id),
+            )
+            conn.execute("DELETE FROM jd_skills WHERE user_id = ? AND jd_id = ?", (user_id, jd_id))
+            conn.executemany(
+                "INSERT OR IGNORE INTO jd_skills (user_id, skill, jd_id) VALUES (?, ?, ?)",
+                [(user_id, skill, jd_id) for skill in skills],
+            )
+        return vector
+
+
+# ======================================================
+# FIRESTORE BACKEND
+# ======================================================
+
+class FirestoreJDLibrary:
+
+    def __init__(self, db):
+        self.db = db
+
+    def _jds(self, user_id):
+        return self.db.collection(COLLECTION).document(user_id).collection("jds")
+
+    def add(self, user_id, name, text):
+        """Returns (entry, created). Raises LibraryFullError."""
+        jd_id = make_jd_id(user_id, text)
+        ref   = self._jds(user_id).document(jd_id)
+        if ref.get().exists:
+            return {"jd_id": jd_id, "name": name}, False
+
+        # Not transactional — the cap is a soft limit
+        if self._count(user_id) >= JD_LIBRARY_MAX_PER_USER:
+            raise LibraryFullError(f"JD library is full ({JD_LIBRARY_MAX_PER_USER} JDs)")
+
+        vector, skills = _encode_entry(text)
+        entry = {"jd_id": jd_id, "name": name, "skills_count": len(skills),
+                 "created_at": time.time()}
+        ref.set({
+            **entry,
+            "text":   text,
+            "skills": skills,
+            "vector": match_engine.pack_row(vector),
+            "vocab":  match_engine.VOCAB_VERSION,
+        })
+        return entry, True
+
+    def _count(self, user_id):
+        # Aggregation query — billed as one read per 1000 docs,
+        # not one per saved JD like streaming the collection
+        return int(self._jds(user_id).count().get()[0][0].value)
+
+    def list(self, user_id):
+        docs = self._jds(user_id).select(["name", "skills_count", "created_at"]).stream()
+        entries = [{"jd_id": d.id, **d.to_dict()} for d in docs]
+        return sorted(entries, key=lambda e: e.get("created_at", 0), reverse=True)
+
+    def get(self, user_id, jd_id):
+        doc = self._jds(user_id).document(jd_id).get()
+        if not doc.exists:
+            return None
+        data = doc.to_dict()
+        return {"jd_id": jd_id, "name": data.get("name"), "text": data.get("text", ""),
+                "skills_count": data.get("skills_count", 0), "created_at": data.get("created_at")}
+
+    def delete(self, user_id, jd_id):
+        ref = self._jds(user_id).document(jd_id)
+        if not ref.get().exists:
+            return False
+        ref.delete()
+        return True
+
+    def candidates(self, user_id, skills, limit):
+        """JD ids sharing at least one skill, best skill coverage first."""
+        wanted, coverage = set(skills), {}
+        for start in range(0, len(skills), _FIRESTORE_ANY_LIMIT):
+            chunk = list(skills[start:start + _FIRESTORE_ANY_LIMIT])
+            query = self._jds(user_id).where("skills", "array_contains_any", chunk).select(["skills"])
+            for doc in query.stream():
+                if doc.id not in coverage:
+                    jd_skills = set(doc.to_dict().get("skills", []))
+                    hits      = len(jd_skills & wanted)
+                    coverage[doc.id] = (hits / max(1, len(jd_skills)), hits)
+        ranked = sorted(coverage, key=lambda jd_id: (-coverage[jd_id][0], -coverage[jd_id][1], jd_id))
+        return ranked[:limit]
+
+    def names(self, user_id, jd_ids):
+        """{jd_id: name} for the ids that exist."""
+        refs = [self._jds(user_id).document(jd_id) for jd_id in jd_ids]
+        return {
+            doc.id: doc.to_dict().get("name")
+            for doc in self.db.get_all(refs, field_paths=["name"]) if doc.exists
+        }
+
+    def load_vectors(self, user_id, jd_ids):
+        """[(jd_id, name, vector)] — re-encodes docs stored under an older vocabulary."""
+        refs   = [self._jds(user_id).document(jd_id) for jd_id in jd_ids]
+        loaded = []
+        for doc in self.db.get_all(refs, field_paths=["name", "vector", "vocab"]):
+            if not doc.exists:
+                continue
+            data = doc.to_dict()
+            if data.get("vocab") == match_engine.VOCAB_VERSION:
+                vector = match_engine.unpack_rows([bytes(data["vector"])])[0]
+            else:
+                metrics.increment("jd_library.reencoded")
+                text = self.get(user_id, doc.id)["text"]
+                vector, skills = _encode_entry(text)
+                doc.reference.update({
+                    "vector":       match_engine.pack_row(vector),
+                    "vocab":        match_engine.VOCAB_VERSION,
+                    "skills":       skills,
+                    "skills_count": len(skills),
+                })
+            loaded.append((doc.id, data.get("name"), vector))
+        return loaded
+
+
+def make_jd_library(db=None):
+    """
+    Build the library selected by JD_LIBRARY_BACKEND.
+    Falls back to SQLite if Firestore is selected but no client is given.
+    """
+    if JD_LIBRARY_BACKEND == "sqlite" or db is None:
+        if JD_LIBRARY_BACKEND != "sqlite":
+            print("⚠️ JD_LIBRARY_BACKEND=firestore but no Firestore client — using SQLite library")
+        return SQLiteJDLibrary(cache_path("jd_library.sqlite3"))
+
+    return FirestoreJDLibrary(db)
+
+
+# ======================================================
+# RANKING
+# ======================================================
+
+def rank_library(library, user_id, resume_text, top_k=10,
+                 candidate_pool=JD_LIBRARY_CANDIDATE_POOL):
+    """
+    Rank the user's saved JDs against a resume.
+
+    JDs sharing no skill with the resume are never candidates; of
+    the rest, the candidate_pool with the best skill coverage (the
+    dominant term of the score) are scored exactly.
+    Returns (results, stats); each result is the
+    calculate_match_score() dict plus jd_id, name and rank.
+    """
+    started     = time.perf_counter()
+    resume_scan = scan_text(resume_text)
+
+    with metrics.timer("jd_library.candidates"):
+        jd_ids = library.candidates(user_id, sorted(resume_scan["skills"]), candidate_pool)
+    with metrics.timer("jd_library.load_vectors"):
+        loaded = library.load_vectors(user_id, jd_ids)
+
+    results = []
+    if loaded:
+        with metrics.timer("jd_library.score"):
+            jd_matrix = match_engine.stack_rows([vector for _, _, vector in loaded])
+            scores    = match_engine.score_matrix(resume_text, jd_matrix, resume_scan=resume_scan)
+            order     = match_engine.rank(scores, top_k=top_k)
+
+        for rank_no, row in enumerate(order, start=1):
+            jd_id, name, _ = loaded[row]
+            results.append({
+                "jd_id": jd_id,
+                "name":  name,
+                "rank":  rank_no,
+                **match_engine.match_result(scores, jd_matrix, row),
+            })
+
+    metrics.increment("jd_library.rank_requests")
+    metrics.increment("jd_library.candidates_scored", len(loaded))
+    stats = {
+        "candidates": len(loaded),
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
+    return results, stats
+
+
+# Users whose whole library this process has checked against the
+# semantic index; later JDs are indexed at ingest.
+_semantic_synced = LRUCache(
+    max_entries=JD_LIBRARY_SEMANTIC_SYNC_USERS, ttl_seconds=JD_LIBRARY_SEMANTIC_SYNC_TTL_SECONDS
+)
+
+
+def _sync_semantic_index(library, index, user_id, jd_ids):
+    """Embed saved JDs the index doesn't have yet; returns how many."""
+    items = []
+    for jd_id in index.missing(user_id, jd_ids):
+        saved = library.get(user_id, jd_id)
+        if saved:
+            items.append((jd_id, saved["text"]))
+    if items:
+        index.add_many(user_id, items)
+    metrics.increment("semantic.index.backfilled", len(items))
+    return len(items)
+
+
+def rank_library_semantic(library, index, user_id, resume_text, top_k=10,
+                          candidate_pool=JD_LIBRARY_CANDIDATE_POOL):
+    """
+    rank_library() ordered by semantic_matcher.hybrid_score.
+
+    Candidates = skill-index hits (on the canonicalized resume) ∪
+    the candidate_pool nearest JDs in the semantic index. JDs the
+    index hasn't seen yet (saved before it existed, or on another
+    host) are embedded from their text — the whole library on a
+    user's first semantic rank in this process (and again once
+    that's JD_LIBRARY_SEMANTIC_SYNC_TTL_SECONDS old), then any stray
+    candidate.
+    """
+    started    = time.perf_counter()
+    backfilled = 0
+    if _semantic_synced.get(user_id) is None:
+        backfilled = _sync_semantic_index(library, index, user_id,
+                                          [entry["jd_id"] for entry in library.list(user_id)])
+        _semantic_synced.set(user_id, True)
+    resume = semantic_matcher.prepare(resume_text, "resume", index.embedder)
+
+    with metrics.timer("jd_library.candidates"):
+        nearest  = [jd_id for jd_id, _ in index.query(user_id, resume.document, candidate_pool)]
+        by_skill = library.candidates(user_id, match_engine.skills_of(resume.skills), candidate_pool)
+        jd_ids   = list(dict.fromkeys(by_skill + nearest))
+
+    backfilled += _sync_semantic_index(library, index, user_id, jd_ids)
+
+    with metrics.timer("jd_library.load_vectors"):
+        names    = library.names(user_id, jd_ids)
+        prepared = index.load(user_id, [jd_id for jd_id in jd_ids if jd_id in names])
+        loaded   = [(jd_id, names[jd_id], prepared[jd_id]) for jd_id in jd_ids if jd_id in prepared]
+
+    results = []
+    if loaded:
+        with metrics.timer("jd_library.score"):
+            jd_matrix = match_engine.stack_rows([jd.skills for _, _, jd in loaded])
+            scores    = match_engine.score_matrix(semantic_matcher.canonicalize(resume_text), jd_matrix)
+            semantic  = [semantic_matcher.semantic_score(resume, jd) for _, _, jd in loaded]
+            hybrid    = [
+                semantic_matcher.hybrid(float(scores["final_score"][row]), semantic[row][0])
+                for row in range(len(loaded))
+            ]
+            order = sorted(range(len(loaded)), key=lambda row: -hybrid[row])[:top_k]
+
+        for rank_no, row in enumerate(order, start=1):
+            jd_id, name, _ = loaded[row]
+            score, coverage, document = semantic[row]
+            results.append({
+                "jd_id": jd_id,
+                "name":  name,
+                "rank":  rank_no,
+                **match_engine.match_result(scores, jd_matrix, row),
+                "semantic_score":      score,
+                "coverage":            coverage,
+                "document_similarity": document,
+                "hybrid_score":        hybrid[row],
+            })
+
+    metrics.increment("jd_library.semantic_rank_requests")
+    metrics.increment("jd_library.candidates_scored", len(loaded))
+    stats = {
+        "candidates": len(loaded),
+        "backfilled": backfilled,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
+    return results, stats
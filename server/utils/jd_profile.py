@@ -0,0 +1,162 @@
+# server/utils/jd_profile.py
+
+import os
+import time
+import hashlib
+
+from utils import metrics
+from utils import match_engine
+from utils.cache_store import LRUCache, SQLiteCache, TieredCache, cache_path
+from utils.extract_text import extract_text
+from utils.matcher import scan_text, TECHNICAL_HITS_THRESHOLD
+from utils.prompt_budget import clean_jd, count_tokens
+
+# ======================================================
+# JD PROFILE MEMO
+# ✅ PERF: the usual loop is "edit the resume, re-run the same
+# JD (or the same batch)". Every run redid all the JD-side
+# work — extraction, the is_technical_text scan, skill/domain
+# scans, match_engine encoding and prompt_budget's JD cleaning
+# — although none of it depends on the resume.
+#
+# Everything derived from the JD alone is computed once per JD
+# hash (whitespace normalised within lines; line breaks kept):
+#   normalized, skills, domain, technical_hits, is_technical,
+#   vector (match_engine, packed hex), prompt_sections /
+#   sections_dropped / prompt_tokens (clean_jd output)
+# plus cost_ms — what computing it took, reported as "saved"
+# on later hits. Extraction itself is memoized by file hash in
+# extract_text's cache; extract_jd_text() reports its saving
+# the same way.
+#
+#   Tier 1: in-process LRU
+#   Tier 2: JD_PROFILE_CACHE_BACKEND = "sqlite" (default) | "none"
+#
+# Bump JD_PROFILE_VERSION when a profile field changes; the
+# match_engine vocabulary version is part of the key already.
+# ======================================================
+
+JD_PROFILE_VERSION = "jdp-v2"   # v2: boilerplate headings matched as whole phrases
+
+JD_PROFILE_CACHE_BACKEND     = os.getenv("JD_PROFILE_CACHE_BACKEND", "sqlite").lower()
+JD_PROFILE_CACHE_MEMORY_SIZE = int(os.getenv("JD_PROFILE_CACHE_MEMORY_SIZE", "256"))
+JD_PROFILE_CACHE_DISK_SIZE   = int(os.getenv("JD_PROFILE_CACHE_DISK_SIZE", "5000"))
+JD_PROFILE_CACHE_TTL_SECONDS = int(os.getenv("JD_PROFILE_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+
+
+def _build_profile_cache():
+    persistent = None
+    try:
+        if JD_PROFILE_CACHE_BACKEND == "sqlite":
+            persistent = SQLiteCache(
+                cache_path("jd_profile_cache.sqlite3"),
+                max_entries=JD_PROFILE_CACHE_DISK_SIZE,
+                ttl_seconds=JD_PROFILE_CACHE_TTL_SECONDS,
+            )
+    except Exception as e:
+        print(f"⚠️ Persistent JD profile cache unavailable: {e}")
+
+    return TieredCache(
+        LRUCache(max_entries=JD_PROFILE_CACHE_MEMORY_SIZE, ttl_seconds=JD_PROFILE_CACHE_TTL_SECONDS),
+        persistent,
+    )
+
+
+_profile_cache = _build_profile_cache()
+
+
+def jd_hash(jd_text):
+    """
+    Whitespace is collapsed within each line only — line breaks decide
+    the sections clean_jd() finds, so JDs that differ in them must not
+    share a profile.
+    """
+    lines = (" ".join(line.split()) for line in (jd_text or "").strip().splitlines())
+    return hashlib.sha256("\n".join(lines).encode("utf-8")).hexdigest()
+
+
+def _profile_key(digest):
+    return f"{JD_PROFILE_VERSION}:{match_engine.VOCAB_VERSION}:{digest}"
+
+
+def _build_profile(jd_text, digest):
+    started = time.perf_counter()
+    scan    = scan_text(jd_text)
+    vector  = match_engine.encode_scan(scan)
+    scanned = time.perf_counter()
+
+    sections, dropped = clean_jd(jd_text)
+    prompt_text       = "\n".join(line for _, lines in sections for line in lines)
+    cleaned           = time.perf_counter()
+
+    return {
+        "jd_hash":          digest,
+        "normalized":       scan["normalized"],
+        "skills":           sorted(scan["skills"]),
+        "domain":           match_engine.domain_of(vector),
+        "technical_hits":   scan["technical_hits"],
+        "is_technical":     scan["technical_hits"] >= TECHNICAL_HITS_THRESHOLD,
+        "vector":           match_engine.pack_row(vector).hex(),
+        "prompt_sections":  [[kind, lines] for kind, lines in sections],
+        "sections_dropped": dropped,
+        "prompt_tokens":    count_tokens(prompt_text),
+        "cost_ms": {
+            "scan":            round((scanned - started) * 1000, 3),
+            "prompt_sections": round((cleaned - scanned) * 1000, 3),
+        },
+    }
+
+
+def get_jd_profile(jd_text, timings=None):
+    """
+    Memoized JD-side analysis (see the block comment above).
+
+    timings: optional metrics.StageTimings — records a "jd_profile"
+    stage, memoized with the original cost on a hit.
+    The returned dict is shared with the cache — don't mutate it.
+    """
+    started = time.perf_counter()
+    digest  = jd_hash(jd_text)
+    key     = _profile_key(digest)
+
+    profile = _profile_cache.get(key)
+    if profile is not None:
+        metrics.increment("jd_profile.hit")
+        if timings is not None:
+            timings.record("jd_profile", (time.perf_counter() - started) * 1000,
+                           memoized=True, saved_ms=sum(profile["cost_ms"].values()))
+        return profile
+
+    metrics.increment("jd_profile.miss")
+    profile = _build_profile(jd_text, digest)
+    _profile_cache.set(key, profile)
+
+    if timings is not None:
+        timings.record("jd_profile", (time.perf_counter() - started) * 1000)
+    return profile
+
+
+def jd_vector(profile):
+    """The profile's match_engine bit vector."""
+    return match_engine.unpack_rows([bytes.fromhex(profile["vector"])])[0]
+
+
+def prompt_clean(profile):
+    """clean_jd() output for budget_prompt_inputs(jd_clean=...)."""
+    return [(kind, lines) for kind, lines in profile["prompt_sections"]], profile["sections_dropped"]
+
+
+def extract_jd_text(source, filename=None, timings=None):
+    """
+    extract_text() for a JD, recorded as an "extract_jd" stage
+    (memoized, with the original extraction time, on a cache hit).
+    Raises whatever extract_text raises.
+    """
+    info    = {}
+    started = time.perf_counter()
+    try:
+        return extract_text(source, filename=filename, info=info)
+    finally:
+        if timings is not None:
+            timings.record("extract_jd", (time.perf_counter() - started) * 1000,
+                           memoized=info.get("cached", False), saved_ms=info.get("cost_ms", 0.0))
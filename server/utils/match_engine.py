@@ -0,0 +1,194 @@
+# server/utils/match_engine.py
+
+import hashlib
+
+import numpy as np
+
+from utils.matcher import SKILL_SET, DOMAIN_KEYWORDS, normalize_text, scan_text
+
+# ======================================================
+# VECTORIZED MATCH ENGINE
+# calculate_match_score() for one resume against many JDs.
+#
+# ✅ PERF: calculate_match_score rescans the resume for every
+# JD and scores one pair at a time with Python sets. Here each
+# text is scanned once into a bit vector over a fixed
+# vocabulary (SKILL_SET ∪ DOMAIN_KEYWORDS), the JDs stack into
+# one (n_jds × vocab) matrix, and skill match, domain penalty,
+# quality scores and the adaptive weights for every JD come
+# from a handful of NumPy operations.
+#
+# Scores equal calculate_match_score() — same formula, same
+# float64 operation order — up to the final 2-decimal rounding
+# (np.round vs round(), which can differ on exact .xx5 ties).
+#
+# Encoded JDs can be packed to bytes (pack_row/unpack_rows) so
+# a library of saved JDs never needs rescanning.
+# ======================================================
+
+# Terms with symbols ("c++", "ci/cd") can never match normalized
+# text (see matcher._build_term_index), so they get no column.
+VOCABULARY = tuple(sorted(
+    term
+    for term in SKILL_SET | set().union(*DOMAIN_KEYWORDS.values())
+    if normalize_text(term) == term
+))
+VOCAB_INDEX = {term: i for i, term in enumerate(VOCABULARY)}
+
+# Stored encodings are only valid for the vocabulary they were built with
+VOCAB_VERSION = hashlib.sha256("\n".join(VOCABULARY).encode("utf-8")).hexdigest()[:12]
+DOMAINS     = tuple(DOMAIN_KEYWORDS)    # same order as matcher._best_domain's tie-break
+
+_SKILL_MASK = np.array([term in SKILL_SET for term in VOCABULARY])
+
+# (vocab × domains) 0/1 — column d marks the keywords of DOMAINS[d]
+_DOMAIN_MATRIX = np.array(
+    [[term in DOMAIN_KEYWORDS[domain] for domain in DOMAINS] for term in VOCABULARY],
+    dtype=np.int32,
+)
+
+
+# ======================================================
+# ENCODING
+# ======================================================
+
+def encode_scan(scan):
+    """Bit vector (bool, len(VOCABULARY)) for a scan_text() result."""
+    vector = np.zeros(len(VOCABULARY), dtype=bool)
+    for term in scan["skills"]:
+        vector[VOCAB_INDEX[term]] = True
+    for _, keyword in scan["domain_keywords"]:
+        vector[VOCAB_INDEX[keyword]] = True
+    return vector
+
+
+def encode(text):
+    return encode_scan(scan_text(text))
+
+
+def encode_many(texts):
+    """(len(texts) × len(VOCABULARY)) bool matrix."""
+    matrix = np.zeros((len(texts), len(VOCABULARY)), dtype=bool)
+    for row, text in enumerate(texts):
+        matrix[row] = encode(text)
+    return matrix
+
+
+def stack_rows(vectors):
+    """Encoded vectors (e.g. from worker threads) → one bool matrix."""
+    if not vectors:
+        return np.zeros((0, len(VOCABULARY)), dtype=bool)
+    return np.stack(vectors)
+
+
+def pack_row(vector):
+    """Compact bytes for one encoded text (1 bit per vocabulary term)."""
+    return np.packbits(vector).tobytes()
+
+
+def unpack_rows(packed_rows):
+    """Inverse of pack_row for a list of byte strings → bool matrix."""
+    if not packed_rows:
+        return np.zeros((0, len(VOCABULARY)), dtype=bool)
+    packed = np.frombuffer(b"".join(packed_rows), dtype=np.uint8).reshape(len(packed_rows), -1)
+    return np.unpackbits(packed, axis=1, count=len(VOCABULARY)).astype(bool)
+
+
+# ======================================================
+# SCORING
+# ======================================================
+
+def _domain_index(counts):
+    """argmax domain per row, -1 where no keyword matched ("unknown")."""
+    best = counts.argmax(axis=-1)
+    return np.where(counts.max(axis=-1) > 0, best, -1)
+
+
+def domain_name(index):
+    return DOMAINS[index] if index >= 0 else "unknown"
+
+
+def domain_of(vector):
+    """detect_domain() for one encoded text."""
+    return domain_name(int(_domain_index(np.asarray(vector, dtype=np.int32) @ _DOMAIN_MATRIX)))
+
+
+def score_matrix(resume_text, jd_matrix, resume_scan=None):
+    """
+    Score one resume against every row of jd_matrix.
+
+    Returns a dict of arrays (one entry per JD) plus the resume's
+    domain:
+        final_score, skill_match, jd_domain (index, -1 = unknown),
+        resume_domain (str)
+    """
+    resume_scan   = resume_scan or scan_text(resume_text)
+    resume_vector = encode_scan(resume_scan)
+    jd_matrix     = np.asarray(jd_matrix, dtype=bool)
+
+    jd_skills      = jd_matrix & _SKILL_MASK
+    jd_skill_count = jd_skills.sum(axis=1)
+    overlap        = jd_skills.astype(np.int32) @ (resume_vector & _SKILL_MASK).astype(np.int32)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        skill_match = np.where(jd_skill_count > 0, overlap / jd_skill_count * 100, 0.0)
+
+    # ── Domain penalty ────────────────────────────────────────────
+    resume_domain = int(_domain_index(resume_vector.astype(np.int32) @ _DOMAIN_MATRIX))
+    jd_domain     = _domain_index(jd_matrix.astype(np.int32) @ _DOMAIN_MATRIX)
+    if resume_domain == -1:
+        domain_penalty = np.ones(len(jd_matrix))
+    else:
+        domain_penalty = np.where(jd_domain != resume_domain, 0.6, 1.0)
+
+    # ── Quality scores ────────────────────────────────────────────
+    jd_quality     = np.minimum(jd_skill_count * 10, 100)
+    resume_quality = min(len(resume_scan["skills"]) * 10 + resume_scan["project_mentions"] * 5, 100)
+
+    # ── Adaptive weights ──────────────────────────────────────────
+    low_quality = jd_quality < 40
+    skill_w = np.where(low_quality, 0.25, 0.50)
+    role_w  = np.where(low_quality, 0.30, 0.15)
+    exp_w   = np.where(low_quality, 0.30, 0.20)
+
+    final_score = (
+        skill_match    * skill_w +
+        resume_quality * exp_w   +
+        jd_quality     * role_w
+    ) * domain_penalty
+
+    return {
+        "final_score":   np.round(np.minimum(final_score, 100), 2),
+        "skill_match":   np.round(skill_match, 2),
+        "jd_domain":     jd_domain,
+        "resume_domain": domain_name(resume_domain),
+        "resume_skills": resume_vector & _SKILL_MASK,
+    }
+
+
+def skills_of(vector):
+    """SKILL_SET terms set in an encoded vector."""
+    return [VOCABULARY[i] for i in np.flatnonzero(np.asarray(vector, dtype=bool) & _SKILL_MASK)]
+
+
+def missing_skills(scores, jd_matrix, row):
+    """Sorted JD skills the resume lacks, for one row (computed on demand)."""
+    missing = np.asarray(jd_matrix[row], dtype=bool) & _SKILL_MASK & ~scores["resume_skills"]
+    return [VOCABULARY[i] for i in np.flatnonzero(missing)]
+
+
+def match_result(scores, jd_matrix, row):
+    """The calculate_match_score() dict for one row of a score_matrix() result."""
+    return {
+        "final_score":    float(scores["final_score"][row]),
+        "skill_match":    float(scores["skill_match"][row]),
+        "missing_skills": missing_skills(scores, jd_matrix, row),
+        "resume_domain":  scores["resume_domain"],
+        "jd_domain":      domain_name(int(scores["jd_domain"][row])),
+    }
+
+
+def rank(scores, top_k=None):
+    """Row indices by final_score, best first (stable for ties)."""
+    order = np.argsort(-scores["final_score"], kind="stable")
+    return order[:top_k] if top_k else order
@@ -2,33 +2,23 @@
 
 import os
 import re
-import google.generativeai as genai
+
+from utils.gemini_client import generate
+from utils.prompt_budget import budget_prompt_inputs
 
 # ======================================================
 # GEMINI CONFIG
 # ✅ FIX (Issue #16): Removed genai.configure() from module
 # level. It was running at import time before .env was loaded,
-# causing silent auth failures. Now configured lazily inside
-# get_gemini_response() only when actually needed.
+# causing silent auth failures. Configuration now happens lazily
+# in utils/gemini_client.py, shared by every Gemini caller.
 # ======================================================
 GEMINI_MODEL = "gemini-2.5-flash"
+GEMINI_TIMEOUT_SECONDS = 30
 
-
-def _get_gemini_model():
-    """
-    Lazily configure and return Gemini model.
-    Returns None if API key is missing — never crashes import.
-    """
-    api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key:
-        print("⚠️ GEMINI_API_KEY not set — Gemini unavailable in matcher.py")
-        return None
-    try:
-        genai.configure(api_key=api_key)
-        return genai.GenerativeModel(GEMINI_MODEL)
-    except Exception as e:
-        print(f"⚠️ Gemini model init failed: {e}")
-        return None
+# Explanation prompt only needs the gist — the old fixed [:3000]
+# slice of each side came to ~1500 tokens, so keep that budget
+GEMINI_EXPLAIN_TOKEN_BUDGET = int(os.getenv("GEMINI_EXPLAIN_TOKEN_BUDGET", "1500"))
 
 
 # ======================================================
@@ -79,10 +69,201 @@ def normalize_text(text: str) -> str:
     return re.sub(r"\s+", " ", text).strip()
 
 
+# ======================================================
+# TECHNICAL TERMS (USED BY is_technical_text)
+# Each entry counts as ONE hit however many of its variants appear.
+#   "~"   → optional separator: "full~stack" matches "full stack"
+#           and "fullstack" (was r"\bfull.?stack\b")
+#   tuple → alternatives for one term, e.g. British/US spelling
+# ======================================================
+TECHNICAL_TERMS = [
+    # Core languages
+    "python", "java", "javascript", "typescript",
+    "c++", "c#", "php", "ruby", "swift",
+    "kotlin", "scala", "golang", "rust",
+
+    # Databases
+    "sql", "mysql", "postgres", "mongodb",
+    "nosql", "redis", "dynamodb",
+
+    # Web / Frameworks
+    "react", "node", "angular", "vue",
+    "django", "flask", "spring", "fastapi",
+    "express",
+
+    # Infrastructure / DevOps
+    "api", "rest", "graphql",
+    "backend", "frontend", "full~stack",
+    "cloud", "aws", "azure", "gcp",
+    "docker", "kubernetes", "ci~cd", "linux",
+    "devops", "terraform",
+
+    # Data / ML (expanded — fixes Data Analyst blocking)
+    "machine~learning", "deep~learning",
+    "tensorflow", "pytorch",
+    "data~science", "data~engineer",
+    "data~analyst", "data~analysis",
+    "power~bi", "tableau",
+    "statistics", ("visualisation", "visualization"),
+
+    # Tools
+    "git", "github", "gitlab",
+    "jira", "jenkins",
+
+    # ✅ NEW: LLM / GenAI / Agentic AI terms
+    "llm", "large~language~model",
+    "generative~ai", "gen~ai",
+    "langchain", "llamaindex",
+    "rag", "retrieval~augmented",
+    "prompt~engineer", "prompt",
+    "embedding", "embeddings",
+    "vector~database", "vector~db",
+    "chatbot", "autonomous~agent",
+    "agentic~ai", "agentic",
+    "hugging~face", "openai",
+    "gemini", "ollama",
+    "fine~tun",
+    "nlp", "natural~language~processing",
+    "transformer", "transformers",
+    ("open~source~llm", "open~source~ai", "open~source~model"),
+
+    # ✅ NEW: Automation / Integration (catches CRM/ERP roles)
+    "crm", "erp",
+    "workflow~automation", "enterprise~automation",
+    "system~integration",
+    "json",
+]
+
+
+# ======================================================
+# COMPILED TERM INDEX (BUILT ONCE AT IMPORT)
+# ✅ PERF: extract_skills / detect_domain / is_technical_text used
+# to build and run one regex per term on every call, and
+# calculate_match_score normalized + rescanned the same text
+# five times. Every term list now lives in one phrase → targets
+# map and scan_text() walks the normalized tokens once, looking
+# up each n-gram. Normalized text is [a-z0-9 ] only, so a token
+# n-gram equals a \b-bounded match — results are unchanged.
+# ======================================================
+
+def _expand_variants(term):
+    """All literal spellings of a TECHNICAL_TERMS entry."""
+    first, *rest = term.split("~")
+    variants = [first]
+    for part in rest:
+        variants = [v + sep + part for v in variants for sep in (" ", "")]
+    return variants
+
+
+def _build_term_index():
+    index    = {}      # phrase -> [(kind, key), ...]
+    prefixes = set()   # proper prefixes of multi-word phrases (early exit)
+
+    def add(phrase, target):
+        # Terms with symbols ("c++", "c#", "ci/cd") lose them in
+        # normalize_text, so — exactly as with the old regexes — they
+        # can never match normalized text. Skip them rather than
+        # index a different word.
+        if normalize_text(phrase) != phrase:
+            return
+        index.setdefault(phrase, []).append(target)
+        words = phrase.split(" ")
+        for n in range(1, len(words)):
+            prefixes.add(" ".join(words[:n]))
+
+    for skill in SKILL_SET:
+        add(skill, ("skill", skill))
+
+    for domain, keywords in DOMAIN_KEYWORDS.items():
+        for kw in keywords:
+            add(kw, ("domain", (domain, kw)))
+
+    for term_id, term in enumerate(TECHNICAL_TERMS):
+        alternatives = term if isinstance(term, tuple) else (term,)
+        for alt in alternatives:
+            for variant in _expand_variants(alt):
+                add(variant, ("tech", term_id))
+
+    max_words = max(len(phrase.split(" ")) for phrase in index)
+    return index, frozenset(prefixes), max_words
+
+
+_TERM_INDEX, _TERM_PREFIXES, _MAX_TERM_WORDS = _build_term_index()
+
+
+def scan_text(text: str) -> dict:
+    """
+    Single pass over the normalized text.
+
+    Returns:
+        {
+          "normalized":       normalized text,
+          "skills":           set of SKILL_SET entries found,
+          "domain_counts":    {domain: distinct keywords found},
+          "domain_keywords":  set of (domain, keyword) pairs found,
+          "technical_hits":   distinct TECHNICAL_TERMS found,
+          "project_mentions": occurrences of the word "project"
+        }
+    """
+    normalized = normalize_text(text)
+    tokens     = normalized.split(" ") if normalized else []
+
+    skills        = set()
+    domain_hits   = set()
+    tech_hits     = set()
+    project_count = 0
+
+    n_tokens = len(tokens)
+    for i in range(n_tokens):
+        if tokens[i] == "project":
+            project_count += 1
+
+        phrase = tokens[i]
+        for width in range(1, _MAX_TERM_WORDS + 1):
+            if width > 1:
+                j = i + width - 1
+                if j >= n_tokens:
+                    break
+                phrase = phrase + " " + tokens[j]
+
+            targets = _TERM_INDEX.get(phrase)
+            if targets:
+                for kind, key in targets:
+                    if kind == "skill":
+                        skills.add(key)
+                    elif kind == "domain":
+                        domain_hits.add(key)
+                    else:
+                        tech_hits.add(key)
+
+            if phrase not in _TERM_PREFIXES:
+                break
+
+    domain_counts = {domain: 0 for domain in DOMAIN_KEYWORDS}
+    for domain, _ in domain_hits:
+        domain_counts[domain] += 1
+
+    return {
+        "normalized":       normalized,
+        "skills":           skills,
+        "domain_counts":    domain_counts,
+        "domain_keywords":  domain_hits,
+        "technical_hits":   len(tech_hits),
+        "project_mentions": project_count,
+    }
+
+
+def _best_domain(domain_counts: dict) -> str:
+    best_domain = max(domain_counts, key=domain_counts.get)
+    return best_domain if domain_counts[best_domain] > 0 else "unknown"
+
+
 # ======================================================
 # TECH / NON-TECH VALIDATION (USED BY upload.py)
 # ======================================================
 
+TECHNICAL_HITS_THRESHOLD = 3
+
 def is_technical_text(text: str) -> bool:
     """
     Lightweight technical-content detector.
@@ -93,8 +274,7 @@ def is_technical_text(text: str) -> bool:
     causing false positives on non-technical resumes, and
     "ml" matched inside "amily", "email", "formally".
 
-    Now uses word boundaries via re.search() so only exact
-    standalone words count as hits.
+    Now matches whole words only (token n-grams via scan_text).
 
     ✅ FIX (Issue #7 from audit): Added more non-code tech terms
     so Data Analysts, Power BI users, and similar roles are
@@ -105,77 +285,15 @@ def is_technical_text(text: str) -> bool:
     "LLM SME", "AI Executive", "GenAI Engineer" are correctly
     detected as technical and not blocked.
 
-    Threshold remains >= 3 hits.
+    Term list: TECHNICAL_TERMS. Threshold remains >= 3 hits.
     """
     if not text:
         return False
 
-    technical_terms = [
-        # Core languages
-        r"\bpython\b", r"\bjava\b", r"\bjavascript\b", r"\btypescript\b",
-        r"\bc\+\+\b", r"\bc#\b", r"\bphp\b", r"\bruby\b", r"\bswift\b",
-        r"\bkotlin\b", r"\bscala\b", r"\bgolang\b", r"\brust\b",
-
-        # Databases
-        r"\bsql\b", r"\bmysql\b", r"\bpostgres\b", r"\bmongodb\b",
-        r"\bnosql\b", r"\bredis\b", r"\bdynamodb\b",
-
-        # Web / Frameworks
-        r"\breact\b", r"\bnode\b", r"\bangular\b", r"\bvue\b",
-        r"\bdjango\b", r"\bflask\b", r"\bspring\b", r"\bfastapi\b",
-        r"\bexpress\b",
-
-        # Infrastructure / DevOps
-        r"\bapi\b", r"\brest\b", r"\bgraphql\b",
-        r"\bbackend\b", r"\bfrontend\b", r"\bfull.?stack\b",
-        r"\bcloud\b", r"\baws\b", r"\bazure\b", r"\bgcp\b",
-        r"\bdocker\b", r"\bkubernetes\b", r"\bci.?cd\b", r"\blinux\b",
-        r"\bdevops\b", r"\bterraform\b",
-
-        # Data / ML (expanded — fixes Data Analyst blocking)
-        r"\bmachine.?learning\b", r"\bdeep.?learning\b",
-        r"\btensorflow\b", r"\bpytorch\b",
-        r"\bdata.?science\b", r"\bdata.?engineer\b",
-        r"\bdata.?analyst\b", r"\bdata.?analysis\b",
-        r"\bpower.?bi\b", r"\btableau\b",
-        r"\bstatistics\b", r"\bvisuali[sz]ation\b",
-
-        # Tools
-        r"\bgit\b", r"\bgithub\b", r"\bgitlab\b",
-        r"\bjira\b", r"\bjenkins\b",
-
-        # ✅ NEW: LLM / GenAI / Agentic AI terms
-        r"\bllm\b", r"\blarge.?language.?model\b",
-        r"\bgenerative.?ai\b", r"\bgen.?ai\b",
-        r"\blangchain\b", r"\bllamaindex\b",
-        r"\brag\b", r"\bretrieval.?augmented\b",
-        r"\bprompt.?engineer\b", r"\bprompt\b",
-        r"\bembedding\b", r"\bembeddings\b",
-        r"\bvector.?database\b", r"\bvector.?db\b",
-        r"\bchatbot\b", r"\bautonomous.?agent\b",
-        r"\bagentic.?ai\b", r"\bagentic\b",
-        r"\bhugging.?face\b", r"\bopenai\b",
-        r"\bgemini\b", r"\bollama\b",
-        r"\bfine.?tun\b",
-        r"\bnlp\b", r"\bnatural.?language.?processing\b",
-        r"\btransformer\b", r"\btransformers\b",
-        r"\bopen.?source.?(llm|ai|model)\b",
-
-        # ✅ NEW: Automation / Integration (catches CRM/ERP roles)
-        r"\bcrm\b", r"\berp\b",
-        r"\bworkflow.?automation\b", r"\benterprise.?automation\b",
-        r"\bsystem.?integration\b",
-        r"\bjson\b",
-    ]
-
-    normalized = normalize_text(text)
-    hits = sum(
-        1 for pattern in technical_terms
-        if re.search(pattern, normalized)
-    )
+    hits = scan_text(text)["technical_hits"]
 
-    print(f"🔍 is_technical_text: {hits} hits (threshold=3)")
-    return hits >= 3
+    print(f"🔍 is_technical_text: {hits} hits (threshold={TECHNICAL_HITS_THRESHOLD})")
+    return hits >= TECHNICAL_HITS_THRESHOLD
 
 
 # ======================================================
@@ -187,17 +305,7 @@ def extract_skills(text: str) -> set:
     Extract known skills from text using exact word matching.
     ✅ FIX: Uses word boundaries for multi-word skills too.
     """
-    normalized = normalize_text(text)
-    found = set()
-
-    for skill in SKILL_SET:
-        # Build a word-boundary pattern for each skill
-        # e.g. "ml" → r"\bml\b", "full stack" → r"\bfull stack\b"
-        pattern = r"\b" + re.escape(skill) + r"\b"
-        if re.search(pattern, normalized):
-            found.add(skill)
-
-    return found
+    return scan_text(text)["skills"]
 
 
 # ======================================================
@@ -209,33 +317,22 @@ def detect_domain(text: str) -> str:
     Detect primary technical domain from text.
     ✅ FIX: Uses word boundary matching (same fix as extract_skills).
     """
-    normalized = normalize_text(text)
-    scores = {}
-
-    for domain, keywords in DOMAIN_KEYWORDS.items():
-        count = 0
-        for kw in keywords:
-            pattern = r"\b" + re.escape(kw) + r"\b"
-            if re.search(pattern, normalized):
-                count += 1
-        scores[domain] = count
-
-    best_domain = max(scores, key=scores.get)
-    return best_domain if scores[best_domain] > 0 else "unknown"
+    return _best_domain(scan_text(text)["domain_counts"])
 
 
 # ======================================================
 # QUALITY CHECKS
 # ======================================================
 
-def jd_quality_score(jd_text: str) -> int:
-    return min(len(extract_skills(jd_text)) * 10, 100)
+def jd_quality_score(jd_text: str, scan: dict = None) -> int:
+    scan = scan or scan_text(jd_text)
+    return min(len(scan["skills"]) * 10, 100)
 
 
-def resume_quality_score(resume_text: str) -> int:
-    text = normalize_text(resume_text)
-    skill_count = len(extract_skills(text))
-    project_signal = len(re.findall(r"\bproject\b", text))
+def resume_quality_score(resume_text: str, scan: dict = None) -> int:
+    scan = scan or scan_text(resume_text)
+    skill_count    = len(scan["skills"])
+    project_signal = scan["project_mentions"]
     return min((skill_count * 10) + (project_signal * 5), 100)
 
 
@@ -247,12 +344,15 @@ def calculate_match_score(resume_text: str, jd_text: str) -> dict:
     """
     Deterministic skill-based match score.
     Used as fallback when Gemini is unavailable.
+
+    ✅ PERF: Each side is scanned once; skills, domain and quality
+    all come from that scan.
     """
-    resume_text_n = normalize_text(resume_text)
-    jd_text_n     = normalize_text(jd_text)
+    resume_scan = scan_text(resume_text)
+    jd_scan     = scan_text(jd_text)
 
-    resume_skills = extract_skills(resume_text_n)
-    jd_skills     = extract_skills(jd_text_n)
+    resume_skills = resume_scan["skills"]
+    jd_skills     = jd_scan["skills"]
 
     # ── Skill Match ──────────────────────────────────────────────
     skill_match = (
@@ -261,16 +361,16 @@ def calculate_match_score(resume_text: str, jd_text: str) -> dict:
     )
 
     # ── Domain Match ─────────────────────────────────────────────
-    resume_domain = detect_domain(resume_text_n)
-    jd_domain     = detect_domain(jd_text_n)
+    resume_domain = _best_domain(resume_scan["domain_counts"])
+    jd_domain     = _best_domain(jd_scan["domain_counts"])
 
     domain_penalty = (
         0.6 if resume_domain != jd_domain and resume_domain != "unknown" else 1.0
     )
 
     # ── Quality Scores ────────────────────────────────────────────
-    jd_quality     = jd_quality_score(jd_text)
-    resume_quality = resume_quality_score(resume_text)
+    jd_quality     = jd_quality_score(jd_text, scan=jd_scan)
+    resume_quality = resume_quality_score(resume_text, scan=resume_scan)
 
     # ── Adaptive Weights ─────────────────────────────────────────
     if jd_quality < 40:
@@ -305,14 +405,14 @@ def get_gemini_response(resume_text: str, jd_text: str) -> str:
     Failure must NEVER break upload or scoring.
 
     ✅ FIX (Issue #16): Model is now created inside the function
-    using _get_gemini_model() instead of at module import time.
+    through utils/gemini_client instead of at module import time.
     This prevents silent auth failures when .env loads after import.
     """
     try:
-        model = _get_gemini_model()
-        if not model:
-            return ""
-
+        # ✅ PERF: trim by section/budget instead of a blind [:3000] cut
+        resume_text, jd_text, _ = budget_prompt_inputs(
+            resume_text, jd_text, budget_tokens=GEMINI_EXPLAIN_TOKEN_BUDGET, label="matcher"
+        )
         prompt = f"""
 You are an ATS resume expert.
 
@@ -327,13 +427,16 @@ Suggestions:
 - Actionable suggestion 2
 
 RESUME:
-\"\"\"{resume_text[:3000]}\"\"\"
+\"\"\"{resume_text}\"\"\"
 
 JOB DESCRIPTION:
-\"\"\"{jd_text[:3000]}\"\"\"
+\"\"\"{jd_text}\"\"\"
 """
-        response = model.generate_content(prompt)
-        return response.text.strip()
+        raw, error = generate(prompt, timeout_seconds=GEMINI_TIMEOUT_SECONDS, model_name=GEMINI_MODEL)
+        if error:
+            print(f"⚠️ Gemini failed safely in matcher: {error}")
+            return ""
+        return (raw or "").strip()
 
     except Exception as e:
         print(f"⚠️ Gemini failed safely in matcher: {e}")
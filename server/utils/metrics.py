@@ -0,0 +1,133 @@
+# server/utils/metrics.py
+
+import time
+import threading
+from contextlib import contextmanager
+
+# ======================================================
+# IN-PROCESS METRICS
+# Cheap counters + timings for the hot paths (parsing, OCR,
+# Gemini, caches). Per worker process — GET /metrics returns
+# this process's snapshot; aggregate across instances in
+# Cloud Logging/Monitoring if you need fleet totals.
+# ======================================================
+
+_lock     = threading.Lock()
+_counters = {}   # name -> int
+_timings  = {}   # name -> {"count", "total", "max"}
+
+
+def increment(name, amount=1):
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+
+def observe(name, seconds):
+    """Record one duration (seconds) under `name`."""
+    with _lock:
+        entry = _timings.setdefault(name, {"count": 0, "total": 0.0, "max": 0.0})
+        entry["count"] += 1
+        entry["total"] += seconds
+        entry["max"]    = max(entry["max"], seconds)
+
+
+@contextmanager
+def timer(name):
+    """with timer("ocr.page"): ... — records wall time even if the body raises."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start)
+
+
+def snapshot():
+    with _lock:
+        counters = dict(_counters)
+        timings  = {
+            name: {
+                "count":         t["count"],
+                "total_seconds": round(t["total"], 4),
+                "avg_ms":        round(t["total"] / t["count"] * 1000, 2) if t["count"] else 0,
+                "max_ms":        round(t["max"] * 1000, 2),
+            }
+            for name, t in _timings.items()
+        }
+    return {"counters": counters, "timings": timings}
+
+
+def reset():
+    """Clear everything (benchmarks / local debugging)."""
+    with _lock:
+        _counters.clear()
+        _timings.clear()
+
+
+# ======================================================
+# STAGE TIMINGS (PER REQUEST)
+# One request's pipeline split into stages: how long each
+# took and, when a stage was served from a memo, how much work
+# that saved (the cost recorded when it was first computed).
+# Every stage also lands in the process metrics as
+# "{pipeline}.{stage}" timings, "{pipeline}.{stage}.memo_hit"
+# and "{pipeline}.saved_ms" counters.
+# ======================================================
+
+class StageTimings:
+    """Thread-safe — batch workers record into one instance."""
+
+    def __init__(self, pipeline):
+        self.pipeline = pipeline
+        self._stages  = {}   # stage -> {"ms", "count", "memoized", "saved_ms"}
+        self._lock    = threading.Lock()
+
+    def record(self, stage, elapsed_ms, memoized=False, saved_ms=0.0):
+        observe(f"{self.pipeline}.{stage}", elapsed_ms / 1000)
+        if memoized:
+            increment(f"{self.pipeline}.{stage}.memo_hit")
+            increment(f"{self.pipeline}.saved_ms", int(round(saved_ms)))
+
+        with self._lock:
+            entry = self._stages.setdefault(
+                stage, {"ms": 0.0, "count": 0, "memoized": 0, "saved_ms": 0.0}
+            )
+            entry["ms"]       += elapsed_ms
+            entry["count"]    += 1
+            entry["memoized"] += int(bool(memoized))
+            entry["saved_ms"] += saved_ms if memoized else 0.0
+
+    @contextmanager
+    def stage(self, stage):
+        """with timings.stage("extract_resume"): ... — work that always reruns."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, (time.perf_counter() - start) * 1000)
+
+    def as_dict(self):
+        with self._lock:
+            stages = {
+                name: {
+                    "ms":       round(e["ms"], 2),
+                    "count":    e["count"],
+                    "memoized": e["memoized"],
+                    "saved_ms": round(e["saved_ms"], 2),
+                }
+                for name, e in self._stages.items()
+            }
+        return {
+            "stages":   stages,
+            "total_ms": round(sum(s["ms"] for s in stages.values()), 2),
+            "saved_ms": round(sum(s["saved_ms"] for s in stages.values()), 2),
+        }
+
+    def summary(self):
+        """One log line: "extract_jd 0.4ms (memo ×1, saved 85ms) · gemini 2310ms ..." """
+        parts = []
+        for name, s in self.as_dict()["stages"].items():
+            part = f"{name} {s['ms']:.1f}ms"
+            if s["memoized"]:
+                part += f" (memo ×{s['memoized']}, saved {s['saved_ms']:.0f}ms)"
+            parts.append(part)
+        return " · ".join(parts)
@@ -0,0 +1,165 @@
+# server/utils/parsed_document.py
+
+import os
+
+from utils import metrics
+
+# ======================================================
+# PARSED DOCUMENT
+# One uploaded file, parsed at most once per request.
+#
+# A single /ats/check used to run extract_text twice (validation
+# + content checks), open the PDF again with PdfReader for the
+# scanned/AcroForm checks, and /ats/compare re-extracted both
+# files on top of detect_ats_issues. Every check now takes a
+# ParsedDocument and reads the lazily-cached pieces it needs.
+#
+# parse_counts records how many times each piece was built for
+# this instance (should be 0 or 1); the same events feed the
+# process-wide "document.parse.*" counters in /metrics.
+# ======================================================
+
+DOCX_EXTENSIONS = {".docx", ".doc"}
+
+_NOT_LOADED = object()
+
+
+class ParsedDocument:
+    """
+    Lazily parsed view of one resume file.
+
+    source is a path, or the upload itself (bytes / memoryview /
+    file-like) plus its filename — parsed in memory, never written
+    to disk.
+
+    Attributes are built on first access and cached — including
+    failures, so a broken file raises the same error every time
+    without being re-parsed.
+    """
+
+    def __init__(self, source, filename=None):
+        from utils.extract_text import read_source, is_path
+
+        self.source, self.name = read_source(source, filename)
+        self.path         = self.source if is_path(self.source) else None
+        self.ext          = os.path.splitext(self.name or "")[1].lower()
+        self.parse_counts = {}
+        self._cache       = {}
+
+    def __repr__(self):
+        return f"<ParsedDocument {os.path.basename(self.name or '?')} parses={self.parse_counts}>"
+
+    # ── Lazy loader ───────────────────────────────────────────────
+    def _load(self, name, builder):
+        cached = self._cache.get(name, _NOT_LOADED)
+        if cached is _NOT_LOADED:
+            self.parse_counts[name] = self.parse_counts.get(name, 0) + 1
+            metrics.increment(f"document.parse.{name}")
+            try:
+                cached = (builder(), None)
+            except Exception as e:
+                cached = (None, e)
+            self._cache[name] = cached
+
+        value, error = cached
+        if error is not None:
+            raise error
+        return value
+
+    @property
+    def is_pdf(self):
+        return self.ext == ".pdf"
+
+    @property
+    def is_docx(self):
+        return self.ext in DOCX_EXTENSIONS
+
+    @property
+    def content_hash(self):
+        """SHA-256 of the file bytes (extraction/preview cache key)."""
+        from utils.extract_text import content_sha256
+        return self._load("content_hash", lambda: content_sha256(self.source))
+
+    # ── Text (same rules/errors as extract_text) ──────────────────
+    @property
+    def text(self):
+        from utils.extract_text import extract_text
+        return self._load("text", lambda: extract_text(self.source, document=self, filename=self.name))
+
+    # ── PDF pieces ────────────────────────────────────────────────
+    @property
+    def pdf_reader(self):
+        from PyPDF2 import PdfReader
+        from utils.extract_text import open_stream
+        return self._load("pdf_reader", lambda: PdfReader(open_stream(self.source)))
+
+    @property
+    def pages(self):
+        return self._load("pages", lambda: list(self.pdf_reader.pages))
+
+    @property
+    def page_texts(self):
+        from utils.extract_text import extract_pdf_page_texts
+        return self._load("page_texts", lambda: extract_pdf_page_texts(self.pdf_reader))
+
+    @property
+    def trailer(self):
+        return self.pdf_reader.trailer
+
+    @property
+    def pdf_readable(self):
+        """Opened, not encrypted, and page text extracted without error."""
+        if not self.is_pdf:
+            return False
+        try:
+            if self.pdf_reader.is_encrypted:
+                return False
+            self.page_texts
+            return True
+        except Exception:
+            return False
+
+    # ── DOCX pieces ───────────────────────────────────────────────
+    @property
+    def docx(self):
+        from docx import Document
+        from utils.extract_text import open_stream
+        return self._load("docx", lambda: Document(open_stream(self.source)))
+
+    @property
+    def docx_readable(self):
+        if not self.is_docx:
+            return False
+        try:
+            self.docx
+            return True
+        except Exception:
+            return False
+
+    @property
+    def fonts(self):
+        """Distinct run font names in the DOCX body, in first-seen order."""
+        def build():
+            seen = {}
+            for paragraph in self.docx.paragraphs:
+                for run in paragraph.runs:
+                    if run.font.name:
+                        seen.setdefault(run.font.name, None)
+            return list(seen)
+        return self._load("fonts", build)
+
+    @property
+    def images(self):
+        """DOCX image relationships (PDF images aren't inspected)."""
+        if not self.is_docx:
+            return []
+        return self._load("images", lambda: [
+            rel for rel in self.docx.part.rels.values() if "image" in rel.target_ref
+        ])
+
+
+def as_parsed_document(source, filename=None):
+    """Accept a path, raw upload or ParsedDocument; always return a ParsedDocument."""
+    if isinstance(source, ParsedDocument):
+        return source
+    return ParsedDocument(source, filename)
@@ -1,34 +1,221 @@
 # server/utils/preview_generator.py
 
 import os
+import json
+import math
 import base64
+import hashlib
 from io import BytesIO
+from functools import lru_cache
 from PIL import Image, ImageDraw, ImageFont
 from docx import Document
 from PyPDF2 import PdfReader
 import fitz  # PyMuPDF for PDF rendering and coordinate detection
 
+from utils import metrics
+from utils.cache_store import LRUCache, SQLiteCache, TieredCache, cache_path
+
+
+# ======================================================
+# RENDER OPTIONS
+# ✅ PERF: Every page used to be rendered at 300 DPI and
+# base64-embedded into one JSON response — tens of MB for a
+# 3-page resume. Callers now pick a page range, a DPI and an
+# image format, and /ats/preview/<file>/pages/<n> serves one
+# page as raw image bytes so the client only loads what it shows.
+# ======================================================
+
+PREVIEW_DPI   = int(os.getenv("PREVIEW_DPI", "150"))  # on-screen viewing
+THUMBNAIL_DPI = 40                                    # page strip / placeholders
+MIN_DPI       = 36
+MAX_DPI       = 300
+
+# Highlight boxes/labels were designed for 300 DPI renders — scale
+# line widths, fonts and offsets from there.
+HIGHLIGHT_BASE_DPI = 300
+
+# format -> (PIL format, MIME type)
+IMAGE_FORMATS = {
+    "png":  ("PNG",  "image/png"),
+    "webp": ("WEBP", "image/webp"),
+}
+DEFAULT_IMAGE_FORMAT = "png"
+
+# Encoder settings — the single encode per page is the main CPU cost.
+# PNG: zlib level 0 (fastest, biggest) .. 9 (slowest, smallest).
+# WebP: lossy quality 0..100.
+PREVIEW_PNG_COMPRESS_LEVEL = int(os.getenv("PREVIEW_PNG_COMPRESS_LEVEL", "6"))
+PREVIEW_WEBP_QUALITY       = int(os.getenv("PREVIEW_WEBP_QUALITY", "80"))
+
+# Bump when rendering or highlight placement changes — part of
+# every page ETag so browsers drop stale images.
+PREVIEW_VERSION = "preview-v1"
+
+
+def clamp_dpi(dpi, default=PREVIEW_DPI):
+    """Parse a user-supplied DPI and clamp it to [MIN_DPI, MAX_DPI]."""
+    try:
+        dpi = int(dpi)
+    except (TypeError, ValueError):
+        dpi = default
+    return max(MIN_DPI, min(MAX_DPI, dpi))
+
+
+def normalize_image_format(fmt):
+    """'png' / 'webp' (case-insensitive); raises ValueError otherwise."""
+    fmt = (fmt or DEFAULT_IMAGE_FORMAT).strip().lower()
+    if fmt not in IMAGE_FORMATS:
+        raise ValueError(f"Unsupported image format '{fmt}'. Use one of: {', '.join(IMAGE_FORMATS)}")
+    return fmt
+
+
+def parse_page_range(spec, total_pages):
+    """
+    1-based page selection → sorted 0-based page indices.
+
+    spec: None / "" (all pages), an int, "2", "1-3", "1,3-4",
+          or a list of ints. Pages past the end are ignored.
+    Raises ValueError on malformed input.
+    """
+    if spec is None or spec == "":
+        return list(range(total_pages))
+
+    if isinstance(spec, int):
+        parts = [str(spec)]
+    elif isinstance(spec, (list, tuple)):
+        parts = [str(p) for p in spec]
+    else:
+        parts = str(spec).split(",")
+
+    selected = set()
+    for part in parts:
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            if "-" in part:
+                start, end = (int(x) for x in part.split("-", 1))
+            else:
+                start = end = int(part)
+        except ValueError:
+            raise ValueError(f"Invalid page range '{spec}'")
+        if start < 1 or end < start:
+            raise ValueError(f"Invalid page range '{spec}'")
+        selected.update(range(start - 1, min(end, total_pages)))
+
+    return sorted(selected)
+
+
+# ======================================================
+# PREVIEW CACHE
+# Toggling pages, zooming back, reloading — every view used to
+# re-run issue detection and re-render. Three cached layers, all
+# keyed by the file's content hash:
+#   issues  — detect_ats_issues() output
+#   layout  — page sizes + highlight boxes at a DPI, for an issue set
+#   image   — one encoded page, keyed by (page, DPI, format, hash
+#             of that page's highlight boxes)
+# On disk it's a bounded SQLite LRU evicted by total bytes, with a
+# small in-memory tier in front. preview_cache.<layer>.hit/.miss
+# counters in /metrics, plus preview_cache_stats(), size it.
+# ======================================================
+
+PREVIEW_CACHE_BACKEND     = os.getenv("PREVIEW_CACHE_BACKEND", "sqlite").lower()  # sqlite | none
+PREVIEW_CACHE_MEMORY_SIZE = int(os.getenv("PREVIEW_CACHE_MEMORY_SIZE", "32"))
+PREVIEW_CACHE_DISK_SIZE   = int(os.getenv("PREVIEW_CACHE_DISK_SIZE", "5000"))
+PREVIEW_CACHE_MAX_BYTES   = int(os.getenv("PREVIEW_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+
+def _build_preview_cache():
+    if PREVIEW_CACHE_BACKEND == "none":
+        return None
+
+    persistent = None
+    try:
+        if PREVIEW_CACHE_BACKEND == "sqlite":
+            persistent = SQLiteCache(
+                cache_path("preview_cache.sqlite3"),
+                max_entries=PREVIEW_CACHE_DISK_SIZE,
+                max_bytes=PREVIEW_CACHE_MAX_BYTES,
+            )
+    except Exception as e:
+        print(f"⚠️ Persistent preview cache unavailable: {e}")
+
+    return TieredCache(LRUCache(max_entries=PREVIEW_CACHE_MEMORY_SIZE), persistent)
+
+
+_preview_cache = _build_preview_cache()
+
+
+def _digest(value):
+    return hashlib.sha256(
+        json.dumps(value, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    ).hexdigest()[:24]
+
+
+def _cached(layer, key, build):
+    """
+    Return the cached value for key, or build(), store and return it.
+    key=None (no content hash known) bypasses the cache.
+    """
+    if _preview_cache is None or key is None:
+        return build()
+
+    key    = f"{PREVIEW_VERSION}:{layer}:{key}"
+    cached = _preview_cache.get(key)
+    if cached is not None:
+        metrics.increment(f"preview_cache.{layer}.hit")
+        return cached
+
+    metrics.increment(f"preview_cache.{layer}.miss")
+    value = build()
+    _preview_cache.set(key, value)
+    return value
+
+
+def cached_issues(content_hash, detect):
+    """detect() → issue list, cached per file. Exceptions are not cached."""
+    return _cached("issues", content_hash, detect)
+
+
+def preview_cache_stats():
+    """Entries/bytes per tier (for sizing PREVIEW_CACHE_MAX_BYTES)."""
+    if _preview_cache is None:
+        return {"backend": "none"}
+
+    stats = {"backend": PREVIEW_CACHE_BACKEND, "memory_entries": len(_preview_cache.memory)}
+    if _preview_cache.persistent is not None:
+        stats.update({f"disk_{k}": v for k, v in _preview_cache.persistent.stats().items()})
+    return stats
+
 
 # ======================================================
 # MAIN PREVIEW GENERATOR
 # ======================================================
 
-def generate_resume_preview_with_highlights(file_path, issues):
+def generate_resume_preview_with_highlights(file_path, issues, pages=None,
+                                           dpi=PREVIEW_DPI, fmt=DEFAULT_IMAGE_FORMAT,
+                                           content_hash=None):
     """
     Generate preview images of resume with red highlights on issues.
     
     Args:
         file_path: Path to PDF or DOCX file
         issues: List of detected ATS issues
+        pages: 1-based page selection (see parse_page_range); None = all
+        dpi: render resolution (clamped to MIN_DPI..MAX_DPI)
+        fmt: "png" or "webp"
+        content_hash: file SHA-256 — enables the preview cache
     
     Returns:
-        List of base64 encoded images (one per page) with highlights
+        List of base64 encoded images (one per selected page) with highlights
     """
     
     ext = os.path.splitext(file_path)[1].lower()
     
     if ext == '.pdf':
-        return generate_pdf_preview(file_path, issues)
+        return generate_pdf_preview(file_path, issues, pages=pages, dpi=dpi, fmt=fmt,
+                                    content_hash=content_hash)
     elif ext in ['.docx', '.doc']:
         return generate_docx_preview(file_path, issues)
     else:
@@ -39,93 +226,51 @@ def generate_resume_preview_with_highlights(file_path, issues):
 # PDF PREVIEW WITH HIGHLIGHTS (using PyMuPDF - no poppler needed!)
 # ======================================================
 
-def generate_pdf_preview(pdf_path, issues):
+def generate_pdf_preview(pdf_path, issues, pages=None, dpi=PREVIEW_DPI,
+                         fmt=DEFAULT_IMAGE_FORMAT, content_hash=None):
     """
     Convert PDF to images using PyMuPDF and draw red boxes on problem areas.
     No poppler dependency required!
+
+    Only the pages selected by `pages` are rendered. With content_hash,
+    layout and page images come from / go to the preview cache.
     """
     
     try:
         print(f"🖼️ Generating preview with highlights: {os.path.basename(pdf_path)}")
+
+        dpi = clamp_dpi(dpi)
+        fmt = normalize_image_format(fmt)
+        mime = IMAGE_FORMATS[fmt][1]
+
+        # One fitz document for layout + rendering, opened on first cache miss
+        docs = {}
         
-        # Open PDF with PyMuPDF
-        doc = fitz.open(pdf_path)
-        
-        # Detect issue locations in PDF
-        issue_locations = detect_pdf_issue_locations(pdf_path, issues)
-        
-        # Generate images for each page
-        highlighted_images = []
-        
-        for page_num in range(len(doc)):
-            page = doc[page_num]
-            
-            # Render page to image (300 DPI for good quality)
-            mat = fitz.Matrix(300/72, 300/72)  # Scale from 72 DPI to 300 DPI
-            pix = page.get_pixmap(matrix=mat)
-            
-            # Convert PyMuPDF pixmap to PIL Image
-            img_data = pix.tobytes("png")
-            img = Image.open(BytesIO(img_data))
-            
-            # Create a copy to draw on
-            img_with_highlights = img.copy()
-            draw = ImageDraw.Draw(img_with_highlights, 'RGBA')
+        try:
+            # Page sizes + issue locations (cached per file/DPI/issue set)
+            layout = get_pdf_layout(pdf_path, issues, dpi=dpi, content_hash=content_hash, docs=docs)
             
-            # Draw red boxes for issues on this page
-            page_issues = [loc for loc in issue_locations if loc['page'] == page_num]
+            # Generate images for the selected pages
+            highlighted_images = []
             
-            for issue_loc in page_issues:
-                # Draw red rectangle
-                x1, y1 = issue_loc['x1'], issue_loc['y1']
-                x2, y2 = issue_loc['x2'], issue_loc['y2']
-                
-                # Red border
-                draw.rectangle(
-                    [x1, y1, x2, y2],
-                    outline='red',
-                    width=8
-                )
-                
-                # Semi-transparent red overlay
-                draw.rectangle(
-                    [x1, y1, x2, y2],
-                    fill=(255, 0, 0, 30)  # Red with 30/255 opacity
-                )
-                
-                # Add issue label
-                label = issue_loc['label']
-                try:
-                    font = ImageFont.truetype("arial.ttf", 24)
-                except:
-                    font = ImageFont.load_default()
-                
-                # Label background
-                try:
-                    label_bbox = draw.textbbox((x1, y1 - 35), label, font=font)
-                    draw.rectangle(label_bbox, fill='red')
-                except:
-                    # Fallback for older PIL versions
-                    pass
+            for page_num in parse_page_range(pages, len(layout['page_sizes'])):
+                page_issues = [loc for loc in layout['locations'] if loc['page'] == page_num]
+                width, height = _pixel_size(layout['page_sizes'][page_num], dpi)
+
+                image_bytes = _page_image(pdf_path, docs, page_num, page_issues, dpi, fmt, content_hash)
+                img_base64  = base64.b64encode(image_bytes).decode('utf-8')
                 
-                draw.text((x1, y1 - 35), label, fill='white', font=font)
-            
-            # Convert to base64
-            buffered = BytesIO()
-            img_with_highlights.save(buffered, format="PNG", quality=95)
-            img_base64 = base64.b64encode(buffered.getvalue()).decode('utf-8')
-            
-            highlighted_images.append({
-                'page': page_num + 1,
-                'image': f"data:image/png;base64,{img_base64}",
-                'width': img_with_highlights.width,
-                'height': img_with_highlights.height,
-                'issues': page_issues
-            })
-        
-        doc.close()
+                highlighted_images.append({
+                    'page': page_num + 1,
+                    'image': f"data:{mime};base64,{img_base64}",
+                    'width': width,
+                    'height': height,
+                    'issues': page_issues
+                })
+        finally:
+            _close_doc(docs)
         
-        print(f"✅ Generated {len(highlighted_images)} preview images")
+        print(f"✅ Generated {len(highlighted_images)} preview images at {dpi} DPI")
         return highlighted_images
     
     except Exception as e:
@@ -135,111 +280,364 @@ def generate_pdf_preview(pdf_path, issues):
         return []
 
 
-def detect_pdf_issue_locations(pdf_path, issues):
+def get_pdf_layout(pdf_path, issues, dpi=PREVIEW_DPI, content_hash=None, docs=None):
+    """
+    Page sizes (PDF points) and highlight locations at `dpi`.
+    Cached per (file, DPI, issue types) when content_hash is given —
+    locations only depend on which issue types are present.
+
+    docs: the caller's document holder (see _open_doc), so a miss
+    here and the page renders share one open fitz.Document.
+
+    Returns { "page_sizes": [[w, h], ...], "locations": [...] }
+    """
+    
+    owns_docs = docs is None
+    docs      = {} if owns_docs else docs
+    
+    def build():
+        doc = _open_doc(pdf_path, docs)
+        return {
+            'page_sizes': [[page.rect.width, page.rect.height] for page in doc],
+            'locations': detect_pdf_issue_locations(pdf_path, issues, dpi=dpi, doc=doc)
+        }
+    
+    issue_types = sorted({issue.get('type') for issue in issues if issue.get('type')})
+    key = f"{content_hash}:{dpi}:{_digest(issue_types)}" if content_hash else None
+    
+    try:
+        return _cached("layout", key, build)
+    finally:
+        if owns_docs:
+            _close_doc(docs)
+
+
+def _open_doc(pdf_path, docs):
+    """The fitz document held in docs, opened on first use."""
+    if 'doc' not in docs:
+        docs['doc'] = fitz.open(pdf_path)
+    return docs['doc']
+
+
+def _close_doc(docs):
+    doc = docs.pop('doc', None)
+    if doc is not None:
+        doc.close()
+
+
+def _pixel_size(page_size, dpi):
+    """Rendered pixel size for a page size in points (matches fitz's pixmap rounding)."""
+    width, height = page_size
+    return math.ceil(width * dpi / 72 - 1e-3), math.ceil(height * dpi / 72 - 1e-3)
+
+
+def _page_image(pdf_path, docs, page_num, page_issues, dpi, fmt, content_hash):
+    """
+    Encoded page image — from the preview cache, or rendered.
+    docs holds the fitz document, opened only on the first cache miss.
+    """
+    
+    def build():
+        doc = _open_doc(pdf_path, docs)
+        image_bytes, _, _ = render_pdf_page(doc[page_num], page_issues, dpi=dpi, fmt=fmt)
+        return image_bytes
+    
+    key = (f"{content_hash}:{page_num}:{dpi}:{encoder_signature(fmt)}:{_digest(page_issues)}"
+           if content_hash else None)
+    return _cached("image", key, build)
+
+
+def render_pdf_page(page, page_issues, dpi=PREVIEW_DPI, fmt=DEFAULT_IMAGE_FORMAT):
+    """
+    Render one fitz page with its highlight boxes drawn on.
+
+    page_issues: locations from detect_pdf_issue_locations(..., dpi=dpi)
+    Returns (image_bytes, width, height).
+    """
+    
+    # Render page to image (scale from 72 DPI to the requested DPI)
+    mat = fitz.Matrix(dpi/72, dpi/72)
+    pix = page.get_pixmap(matrix=mat)
+    
+    # ✅ PERF: Build the PIL image straight from the pixmap's raw
+    # samples and draw on it in place — no PNG encode → decode →
+    # copy before the one final encode.
+    mode = "RGBA" if pix.alpha else "RGB"
+    img_with_highlights = Image.frombytes(mode, (pix.width, pix.height), pix.samples)
+    draw = ImageDraw.Draw(img_with_highlights, 'RGBA')
+
+    # Border/label sizes were tuned at 300 DPI
+    scale        = dpi / HIGHLIGHT_BASE_DPI
+    border_width = max(1, round(8 * scale))
+    font_size    = max(8, round(24 * scale))
+    label_offset = round(35 * scale)
+    
+    font = _label_font(font_size)
+    
+    for issue_loc in page_issues:
+        # Draw red rectangle
+        x1, y1 = issue_loc['x1'], issue_loc['y1']
+        x2, y2 = issue_loc['x2'], issue_loc['y2']
+        
+        # Red border
+        draw.rectangle(
+            [x1, y1, x2, y2],
+            outline='red',
+            width=border_width
+        )
+        
+        # Semi-transparent red overlay
+        draw.rectangle(
+            [x1, y1, x2, y2],
+            fill=(255, 0, 0, 30)  # Red with 30/255 opacity
+        )
+        
+        # Add issue label
+        label = issue_loc['label']
+        
+        # Label background
+        try:
+            label_bbox = draw.textbbox((x1, y1 - label_offset), label, font=font)
+            draw.rectangle(label_bbox, fill='red')
+        except:
+            # Fallback for older PIL versions
+            pass
+        
+        draw.text((x1, y1 - label_offset), label, fill='white', font=font)
+    
+    return encode_image(img_with_highlights, fmt), img_with_highlights.width, img_with_highlights.height
+
+
+@lru_cache(maxsize=16)
+def _label_font(size):
+    """Highlight label font — loaded once per size, not per page."""
+    try:
+        return ImageFont.truetype("arial.ttf", size)
+    except:
+        return ImageFont.load_default()
+
+
+def encode_image(img, fmt=DEFAULT_IMAGE_FORMAT):
+    """Encode a PIL image once, with the configured compression settings."""
+    buffered = BytesIO()
+    if fmt == "webp":
+        img.save(buffered, format="WEBP", quality=PREVIEW_WEBP_QUALITY)
+    else:
+        img.save(buffered, format="PNG", compress_level=PREVIEW_PNG_COMPRESS_LEVEL)
+    return buffered.getvalue()
+
+
+def encoder_signature(fmt):
+    """Format + encoder settings, e.g. "png-z6" — part of cached image keys."""
+    if fmt == "webp":
+        return f"webp-q{PREVIEW_WEBP_QUALITY}"
+    return f"png-z{PREVIEW_PNG_COMPRESS_LEVEL}"
+
+
+def get_pdf_page_manifest(pdf_path, issues, dpi=PREVIEW_DPI, content_hash=None):
+    """
+    Page list for the lazy preview — sizes and highlight boxes at
+    `dpi`, without rendering anything.
+
+    Returns:
+        { "total_pages": N, "pages": [{page, width, height, issues}, ...] }
+    """
+    
+    dpi    = clamp_dpi(dpi)
+    layout = get_pdf_layout(pdf_path, issues, dpi=dpi, content_hash=content_hash)
+    pages  = []
+    
+    for page_num, page_size in enumerate(layout['page_sizes']):
+        width, height = _pixel_size(page_size, dpi)
+        pages.append({
+            'page': page_num + 1,
+            'width': width,
+            'height': height,
+            'issues': [loc for loc in layout['locations'] if loc['page'] == page_num]
+        })
+    
+    return {'total_pages': len(pages), 'pages': pages}
+
+
+def render_pdf_page_image(pdf_path, issues, page_number, dpi=PREVIEW_DPI,
+                          fmt=DEFAULT_IMAGE_FORMAT, content_hash=None):
+    """
+    One highlighted page as raw image bytes (for the per-page endpoint).
+
+    page_number is 1-based. Returns (image_bytes, mime_type).
+    Raises IndexError if the page doesn't exist.
+    """
+    
+    dpi  = clamp_dpi(dpi)
+    fmt  = normalize_image_format(fmt)
+    docs = {}
+    
+    try:
+        layout = get_pdf_layout(pdf_path, issues, dpi=dpi, content_hash=content_hash, docs=docs)
+        total  = len(layout['page_sizes'])
+        
+        if not 1 <= page_number <= total:
+            raise IndexError(f"Page {page_number} out of range (1-{total})")
+        
+        page_num    = page_number - 1
+        page_issues = [loc for loc in layout['locations'] if loc['page'] == page_num]
+        image_bytes = _page_image(pdf_path, docs, page_num, page_issues, dpi, fmt, content_hash)
+    finally:
+        _close_doc(docs)
+    
+    return image_bytes, IMAGE_FORMATS[fmt][1]
+
+
+# ======================================================
+# PDF LAYOUT INDEX
+# ✅ PERF: detect_pdf_issue_locations used to reopen the PDF the
+# preview already had open and walk each page separately per
+# issue type. The index reads each page's text layout (blocks →
+# lines → spans, with bboxes) in one get_text("dict") pass, and
+# table/image boxes once, no matter how many issue types ask.
+# ======================================================
+
+STANDARD_FONTS = ['arial', 'helvetica', 'calibri', 'times']
+
+
+class PdfLayoutIndex:
+    """Lazily built per-page layout of an open fitz.Document."""
+
+    def __init__(self, doc):
+        self.doc    = doc
+        self._pages = {}   # (page_num, kind) -> value
+
+    def __len__(self):
+        return len(self.doc)
+
+    def _load(self, page_num, kind, build):
+        key = (page_num, kind)
+        if key not in self._pages:
+            self._pages[key] = build(self.doc[page_num])
+        return self._pages[key]
+
+    def text_blocks(self, page_num):
+        """Text blocks from get_text("dict") — each with lines → spans (font, bbox)."""
+        return self._load(page_num, "blocks", lambda page: [
+            block for block in page.get_text("dict")["blocks"] if "lines" in block
+        ])
+
+    def lines(self, page_num):
+        return [line for block in self.text_blocks(page_num) for line in block["lines"]]
+
+    def image_boxes(self, page_num):
+        """Bbox of each distinct image on the page (first placement)."""
+        def build(page):
+            boxes = []
+            for img in page.get_images():
+                try:
+                    boxes.append(tuple(page.get_image_bbox(img[0])))
+                except:
+                    pass
+            return boxes
+        return self._load(page_num, "images", build)
+
+    def table_boxes(self, page_num):
+        def build(page):
+            tables = page.find_tables()
+            return [tuple(table.bbox) for table in getattr(tables, 'tables', [])]
+        return self._load(page_num, "tables", build)
+
+
+# issue type -> locator(index, page_num) -> [(type, label, bbox), ...]
+
+def _locate_tables(index, page_num):
+    return [('table', '🔴 TABLE', bbox) for bbox in index.table_boxes(page_num)]
+
+
+def _locate_images(index, page_num):
+    return [('image', '🔴 IMAGE', bbox) for bbox in index.image_boxes(page_num)]
+
+
+def _locate_fonts(index, page_num):
+    found = []
+    for line in index.lines(page_num):
+        for span in line["spans"]:
+            font_name = span.get("font", "").lower()
+            if font_name and not any(std in font_name for std in STANDARD_FONTS):
+                found.append(('font', '🟡 FONT', span["bbox"]))
+                break  # Only highlight first occurrence per line
+    return found
+
+
+ISSUE_LOCATORS = [
+    ('tables', _locate_tables, "Table detection"),
+    ('images', _locate_images, "Image detection"),
+    ('fonts',  _locate_fonts,  "Font detection"),
+]
+
+
+def detect_pdf_issue_locations(pdf_path, issues, dpi=HIGHLIGHT_BASE_DPI, doc=None):
     """
     Detect pixel coordinates of issues in PDF using PyMuPDF.
+    Coordinates are for an image rendered at `dpi`.
+
+    doc: already-open fitz.Document for pdf_path (not closed here)
     """
     
-    locations = []
+    locations   = []
+    issue_types = {issue['type'] for issue in issues}
+    locators    = [entry for entry in ISSUE_LOCATORS if entry[0] in issue_types]
+    owns_doc    = doc is None
+    
+    # Scale factor for the rendered image
+    scale = dpi / 72  # PDF is 72 DPI, images are `dpi`
     
     try:
-        doc = fitz.open(pdf_path)
+        if owns_doc:
+            doc = fitz.open(pdf_path)
         
-        for page_num in range(len(doc)):
-            page = doc[page_num]
-            
-            # Get page dimensions (for coordinate scaling)
-            page_rect = page.rect
-            page_width = page_rect.width
-            page_height = page_rect.height
-            
-            # Scale factor for 300 DPI images
-            scale = 300 / 72  # PDF is 72 DPI, images are 300 DPI
-            
-            # Detect tables
-            if any(issue['type'] == 'tables' for issue in issues):
+        index = PdfLayoutIndex(doc)
+        
+        for page_num in range(len(index)):
+            for _, locate, what in locators:
                 try:
-                    tables = page.find_tables()
-                    if hasattr(tables, 'tables'):
-                        for table_num, table in enumerate(tables.tables):
-                            bbox = table.bbox
-                            locations.append({
-                                'page': page_num,
-                                'type': 'table',
-                                'label': '🔴 TABLE',
-                                'x1': int(bbox[0] * scale),
-                                'y1': int(bbox[1] * scale),
-                                'x2': int(bbox[2] * scale),
-                                'y2': int(bbox[3] * scale)
-                            })
-                except Exception as e:
-                    print(f"⚠️ Table detection failed: {e}")
-            
-            # Detect images
-            if any(issue['type'] == 'images' for issue in issues):
-                image_list = page.get_images()
-                for img_num, img in enumerate(image_list):
-                    # Get image bounding box
-                    xref = img[0]
-                    try:
-                        img_bbox = page.get_image_bbox(xref)
+                    for loc_type, label, bbox in locate(index, page_num):
                         locations.append({
                             'page': page_num,
-                            'type': 'image',
-                            'label': '🔴 IMAGE',
-                            'x1': int(img_bbox.x0 * scale),
-                            'y1': int(img_bbox.y0 * scale),
-                            'x2': int(img_bbox.x1 * scale),
-                            'y2': int(img_bbox.y1 * scale)
+                            'type': loc_type,
+                            'label': label,
+                            'x1': int(bbox[0] * scale),
+                            'y1': int(bbox[1] * scale),
+                            'x2': int(bbox[2] * scale),
+                            'y2': int(bbox[3] * scale)
                         })
-                    except:
-                        pass
-            
-            # Detect non-standard fonts
-            if any(issue['type'] == 'fonts' for issue in issues):
-                try:
-                    blocks = page.get_text("dict")["blocks"]
-                    for block in blocks:
-                        if "lines" in block:
-                            for line in block["lines"]:
-                                for span in line["spans"]:
-                                    font_name = span.get("font", "").lower()
-                                    if font_name and not any(std in font_name for std in ['arial', 'helvetica', 'calibri', 'times']):
-                                        bbox = span["bbox"]
-                                        locations.append({
-                                            'page': page_num,
-                                            'type': 'font',
-                                            'label': '🟡 FONT',
-                                            'x1': int(bbox[0] * scale),
-                                            'y1': int(bbox[1] * scale),
-                                            'x2': int(bbox[2] * scale),
-                                            'y2': int(bbox[3] * scale)
-                                        })
-                                        break  # Only highlight first occurrence per line
                 except Exception as e:
-                    print(f"⚠️ Font detection failed: {e}")
-        
-        doc.close()
+                    print(f"⚠️ {what} failed: {e}")
         
     except Exception as e:
         print(f"⚠️ Could not detect precise locations: {e}")
         # Fallback: return general page-level highlights
-        locations = create_fallback_locations(pdf_path, issues)
+        page_count = len(doc) if doc is not None and not owns_doc else None
+        locations  = create_fallback_locations(pdf_path, issues, dpi=dpi, page_count=page_count)
+    
+    finally:
+        if owns_doc and doc is not None:
+            doc.close()
     
     return locations
 
 
-def create_fallback_locations(pdf_path, issues):
+def create_fallback_locations(pdf_path, issues, dpi=HIGHLIGHT_BASE_DPI, page_count=None):
     """
     Fallback method: place highlights at top of pages if precise detection fails.
+    Positions are laid out for 300 DPI and scaled to `dpi`.
+    page_count skips reopening the file when the caller already knows it.
     """
     
     locations = []
+    s = dpi / HIGHLIGHT_BASE_DPI
     
     try:
-        reader = PdfReader(pdf_path)
+        if page_count is None:
+            page_count = len(PdfReader(pdf_path).pages)
         
-        for page_num in range(len(reader.pages)):
+        for page_num in range(page_count):
             y_offset = 100
             
             for issue in issues:
@@ -248,10 +646,10 @@ def create_fallback_locations(pdf_path, issues):
                         'page': page_num,
                         'type': 'table',
                         'label': '🔴 TABLE DETECTED',
-                        'x1': 100,
-                        'y1': y_offset,
-                        'x2': 800,
-                        'y2': y_offset + 60
+                        'x1': int(100 * s),
+                        'y1': int(y_offset * s),
+                        'x2': int(800 * s),
+                        'y2': int((y_offset + 60) * s)
                     })
                     y_offset += 80
                 
@@ -260,10 +658,10 @@ def create_fallback_locations(pdf_path, issues):
                         'page': page_num,
                         'type': 'image',
                         'label': '🔴 IMAGE DETECTED',
-                        'x1': 100,
-                        'y1': y_offset,
-                        'x2': 800,
-                        'y2': y_offset + 60
+                        'x1': int(100 * s),
+                        'y1': int(y_offset * s),
+                        'x2': int(800 * s),
+                        'y2': int((y_offset + 60) * s)
                     })
                     y_offset += 80
     except Exception as e:
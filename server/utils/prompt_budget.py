@@ -0,0 +1,250 @@
+# server/utils/prompt_budget.py
+
+import os
+import re
+import math
+
+from utils import metrics
+
+# ======================================================
+# PROMPT BUDGETER
+# Shrinks the resume/JD text that goes into a Gemini prompt.
+#
+# ✅ PERF: analyze_with_gemini inlined the whole redacted
+# resume and JD (up to MAX_JD_LENGTH = 50,000 chars) into
+# every prompt, and matcher.get_gemini_response cut both at a
+# blind 3000 chars — often keeping the company blurb and
+# dropping the requirements. Now:
+#   - JD sections are classified by their heading; benefits,
+#     EEO, "about us", how-to-apply etc. are dropped, plus any
+#     stray EEO/legal paragraph outside a heading
+#   - repeated lines (the same bullet pasted twice, a footer
+#     repeated per page) are kept once
+#   - if still over budget, lines are cut at line boundaries,
+#     requirement/skill sections last
+#   - prompt_budget.{label}.* counters record tokens in/out/saved
+#
+# Token counts are the same ~4 chars/token estimate the rate
+# limiter reserves quota with — good enough for budgeting.
+# ======================================================
+
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "6000"))   # resume + JD
+
+SECTION_KEEP        = "keep"
+SECTION_NEUTRAL     = "neutral"
+SECTION_BOILERPLATE = "boilerplate"
+
+_KEEP_HEADING = re.compile(
+    r"requirement|qualification|skill|responsibilit|what you('ll| will) do|"
+    r"what you bring|you will|you have|must.have|nice.to.have|preferred|"
+    r"experience|tech(nology| stack)|tools|duties|about (the|this) (role|job|position)|"
+    r"the role|role overview|about you|job description|key result",
+    re.IGNORECASE,
+)
+
+# Whole-heading phrases only — a title like "PRIVACY ENGINEER" or
+# "Legal Tech Developer" must not read as a privacy/legal section
+_BOILERPLATE_HEADING = re.compile(
+    r"(our |employee |additional )?(benefits?|perks)( (and|&) (benefits?|perks))?|"
+    r"what we offer|we offer|compensation( (and|&) benefits)?|salary( range)?|pay range|"
+    r"equal (employment )?opportunit(y|ies)( employer| statement)?|eeo( statement)?|"
+    r"diversity(,? equity)?( (and|&) inclusion)?|"
+    r"about (us|the company|our company|the team)|who we are|"
+    r"our (story|mission|values|culture)|(company )?culture|"
+    r"why (join|work (with|for|at)) .+|life at .+|how to apply|application process|"
+    r"privacy (notice|policy|statement)|(legal )?disclaimer|legal notice|"
+    r"(reasonable )?accommodations?",
+    re.IGNORECASE,
+)
+
+_BOILERPLATE_PARAGRAPH = re.compile(
+    r"equal opportunity employer|without regard to (race|age|sex|gender)|"
+    r"reasonable accommodation|e-verify|will receive (equal )?consideration for employment|"
+    r"applicant privacy|recruitment fraud|do not accept unsolicited",
+    re.IGNORECASE,
+)
+
+_BULLET = re.compile(r"^[\s\-\*•·▪◦●–—>]+")
+
+
+def count_tokens(text):
+    """Approximate Gemini token count (~4 chars per token)."""
+    return math.ceil(len(text or "") / 4)
+
+
+# -------------------------------------------------
+# SECTIONING
+# -------------------------------------------------
+
+def _is_heading(line):
+    stripped = line.strip()
+    if not stripped or len(stripped) > 80 or len(stripped.split()) > 8:
+        return False
+    if stripped.startswith("#"):
+        return True
+    if _BULLET.match(stripped):
+        return False                      # "- AWS", "• Experience with:" are list items
+    if stripped.endswith(":"):
+        return True
+    letters = [c for c in stripped if c.isalpha()]
+    return len(letters) >= 4 and stripped.upper() == stripped
+
+
+def _classify_heading(heading, is_title=False):
+    text = heading.strip().lstrip("#").strip().rstrip(":?!.").strip()
+    if _KEEP_HEADING.search(text):
+        return SECTION_KEEP
+    if not is_title and _BOILERPLATE_HEADING.fullmatch(re.sub(r"\s+", " ", text)):
+        return SECTION_BOILERPLATE
+    return SECTION_NEUTRAL
+
+
+def split_sections(text):
+    """
+    [(kind, [lines])] — the first entry is the untitled preamble.
+    The first non-blank line is the JD's title, never boilerplate.
+    """
+    sections, seen_text = [(SECTION_NEUTRAL, [])], False
+    for line in (text or "").splitlines():
+        if _is_heading(line):
+            sections.append((_classify_heading(line, is_title=not seen_text), [line]))
+        else:
+            sections[-1][1].append(line)
+        seen_text = seen_text or bool(line.strip())
+    return [s for s in sections if any(l.strip() for l in s[1])]
+
+
+def _line_key(line):
+    return re.sub(r"\s+", " ", _BULLET.sub("", line)).strip().lower()
+
+
+def _dedupe(lines, seen):
+    """Drop lines already seen (normalised); blank lines are kept but not doubled."""
+    out = []
+    for line in lines:
+        key = _line_key(line)
+        if not key:
+            if out and out[-1].strip():
+                out.append("")
+            continue
+        if key in seen:
+            continue
+        seen.add(key)
+        out.append(line.rstrip())
+    return out
+
+
+def _drop_legal_paragraphs(lines):
+    return [l for l in lines if not _BOILERPLATE_PARAGRAPH.search(l)]
+
+
+# -------------------------------------------------
+# FITTING
+# -------------------------------------------------
+
+def _fit(sections, budget):
+    """
+    Keep whole lines until `budget` tokens are used — keep-sections
+    first, then neutral ones — and return them in original order.
+    """
+    entries  = []   # (priority, position, line)
+    position = 0
+    for kind, lines in sections:
+        priority = 0 if kind == SECTION_KEEP else 1
+        for line in lines:
+            entries.append((priority, position, line))
+            position += 1
+
+    # Budget in chars so the joined text lands on the same count_tokens() estimate
+    limit, used, chosen = budget * 4, 0, []
+    for priority, pos, line in sorted(entries, key=lambda e: (e[0], e[1])):
+        cost = len(line) + 1              # + newline
+        if used + cost > limit + 1:       # the last line needs no newline
+            continue                      # a shorter later line may still fit
+        chosen.append((pos, line))
+        used += cost
+
+    return "\n".join(line for _, line in sorted(chosen)).strip()
+
+
+def clean_jd(jd_text):
+    """
+    JD sections worth prompting: boilerplate sections, legal
+    paragraphs and repeated lines removed. Returns
+    ([(kind, [lines])], sections_dropped) — depends on the JD
+    only, so utils/jd_profile memoizes it per JD.
+    """
+    seen, sections, dropped = set(), [], 0
+    for kind, lines in split_sections(jd_text):
+        if kind == SECTION_BOILERPLATE:
+            dropped += 1
+            continue
+        lines = _dedupe(_drop_legal_paragraphs(lines), seen)
+        if any(l.strip() for l in lines):
+            sections.append((kind, lines))
+
+    if not sections:
+        # Nothing but "boilerplate" — the heuristics misfired; keep it all
+        return [(SECTION_NEUTRAL, _dedupe((jd_text or "").splitlines(), set()))], 0
+    return sections, dropped
+
+
+def _section_tokens(sections):
+    return count_tokens("\n".join(l for _, lines in sections for l in lines))
+
+
+def budget_prompt_inputs(resume_text, jd_text, budget_tokens=PROMPT_TOKEN_BUDGET,
+                         label="analysis", jd_clean=None):
+    """
+    Trim resume_text and jd_text so together they fit budget_tokens.
+
+    Returns (resume_text, jd_text, stats). The JD loses boilerplate
+    sections and duplicate lines; the resume only loses duplicate
+    lines. If that is still too much, each side is guaranteed at
+    least half the budget and the remainder goes to whichever
+    needs it.
+
+    jd_clean: clean_jd(jd_text) computed earlier (e.g. from the
+    JD profile memo) — skips re-sectioning the JD.
+    """
+    tokens_before = count_tokens(resume_text) + count_tokens(jd_text)
+
+    jd_sections, dropped = jd_clean if jd_clean is not None else clean_jd(jd_text)
+    resume_sections      = [(SECTION_KEEP, _dedupe((resume_text or "").splitlines(), set()))]
+
+    jd_need     = _section_tokens(jd_sections)
+    resume_need = _section_tokens(resume_sections)
+
+    if jd_need + resume_need <= budget_tokens:
+        jd_budget, resume_budget = jd_need, resume_need
+    else:
+        half = budget_tokens // 2
+        if jd_need <= half:
+            jd_budget, resume_budget = jd_need, budget_tokens - jd_need
+        elif resume_need <= half:
+            jd_budget, resume_budget = budget_tokens - resume_need, resume_need
+        else:
+            jd_budget, resume_budget = half, budget_tokens - half
+
+    truncated = jd_need > jd_budget or resume_need > resume_budget
+    new_jd     = _fit(jd_sections, jd_budget)
+    new_resume = _fit(resume_sections, resume_budget)
+
+    tokens_after = count_tokens(new_resume) + count_tokens(new_jd)
+    stats = {
+        "tokens_before":    tokens_before,
+        "tokens_after":     tokens_after,
+        "tokens_saved":     max(0, tokens_before - tokens_after),
+        "sections_dropped": dropped,
+        "truncated":        truncated,
+    }
+
+    metrics.increment(f"prompt_budget.{label}.requests")
+    metrics.increment(f"prompt_budget.{label}.tokens_before", tokens_before)
+    metrics.increment(f"prompt_budget.{label}.tokens_after", tokens_after)
+    metrics.increment(f"prompt_budget.{label}.tokens_saved", stats["tokens_saved"])
+    metrics.increment(f"prompt_budget.{label}.sections_dropped", dropped)
+    if truncated:
+        metrics.increment(f"prompt_budget.{label}.truncated")
+
+    return new_resume, new_jd, stats
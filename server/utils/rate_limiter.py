@@ -0,0 +1,320 @@
+# server/utils/rate_limiter.py
+
+import os
+import time
+import heapq
+import sqlite3
+import itertools
+import threading
+
+from utils import metrics
+from utils.cache_store import cache_path
+from utils.prompt_budget import count_tokens
+
+# ======================================================
+# GEMINI QUOTA SCHEDULER
+# Token buckets for requests/minute and tokens/minute, plus a
+# priority queue so the quota that is left goes to the most
+# latency-sensitive work first.
+#
+# ✅ PERF: quota errors used to be noticed only after the
+# fact (gemini_utils._classify_gemini_error → "quota"), by
+# which point a burst had already spent the minute's budget
+# and every route was serving stable_fallback_score. Now each
+# call reserves its estimated cost up front:
+#   - PRIORITY_INTERACTIVE (/upload, certificate checks) always
+#     goes ahead of PRIORITY_BATCH, which goes ahead of
+#     PRIORITY_BACKGROUND (interview prep)
+#   - a caller waits at most until its own deadline, then gets
+#     False and falls back without ever touching the API
+#   - a real 429 drains the buckets so everyone backs off
+#
+# Storage (GEMINI_RATE_STORE):
+#   memory — per worker process (default)
+#   sqlite — bucket levels shared by every worker on the
+#            instance through one file under JOBMORPH_CACHE_DIR.
+#            Priority ordering is still per process.
+#
+# Limits default to the paid-tier 1 quota for gemini-2.5-flash;
+# set either to 0 to disable that bucket.
+# ======================================================
+
+GEMINI_RPM_LIMIT = int(os.getenv("GEMINI_RPM_LIMIT", "1000"))
+GEMINI_TPM_LIMIT = int(os.getenv("GEMINI_TPM_LIMIT", "1000000"))
+GEMINI_RATE_STORE = os.getenv("GEMINI_RATE_STORE", "memory").lower()
+
+# Completion tokens aren't known until the call returns — reserve this many
+GEMINI_OUTPUT_TOKEN_ESTIMATE = int(os.getenv("GEMINI_OUTPUT_TOKEN_ESTIMATE", "1024"))
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH       = 1
+PRIORITY_BACKGROUND  = 2
+
+PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: "interactive",
+    PRIORITY_BATCH:       "batch",
+    PRIORITY_BACKGROUND:  "background",
+}
+
+# Longest single sleep while queued — bounds how stale a wait
+# estimate can get when another worker refills/drains a shared bucket
+_MAX_POLL_SECONDS = 0.5
+
+
+def estimate_tokens(prompt):
+    """Rough prompt + completion token count (~4 chars per token)."""
+    return count_tokens(prompt) + GEMINI_OUTPUT_TOKEN_ESTIMATE
+
+
+# ======================================================
+# BUCKET STORES
+# Both expose take(costs) → seconds to wait (0.0 = taken),
+# refund(costs) and drain(). `costs` maps bucket name → amount.
+# ======================================================
+
+def _refill(level, updated_at, capacity, now):
+    return min(capacity, level + (now - updated_at) * capacity / 60.0)
+
+
+def _wait_for(levels, costs, capacities):
+    """Seconds until every bucket can cover its cost (0.0 if it already can)."""
+    wait = 0.0
+    for name, cost in costs.items():
+        capacity = capacities[name]
+        # A cost above capacity could never be met — cap it at a full bucket
+        short = min(cost, capacity) - levels[name]
+        if short > 0:
+            wait = max(wait, short * 60.0 / capacity)
+    return wait
+
+
+class MemoryBucketStore:
+    """Per-process buckets."""
+
+    def __init__(self, capacities):
+        self.capacities = capacities
+        now = time.time()
+        self._state = {name: (float(cap), now) for name, cap in capacities.items()}
+        self._lock  = threading.Lock()
+
+    def _levels(self, now):
+        return {
+            name: _refill(level, updated_at, self.capacities[name], now)
+            for name, (level, updated_at) in self._state.items()
+        }
+
+    def take(self, costs):
+        with self._lock:
+            now    = time.time()
+            levels = self._levels(now)
+            wait   = _wait_for(levels, costs, self.capacities)
+            if wait == 0.0:
+                for name, cost in costs.items():
+                    levels[name] -= min(cost, self.capacities[name])
+            self._state = {name: (level, now) for name, level in levels.items()}
+            return wait
+
+    def refund(self, costs):
+        with self._lock:
+            now    = time.time()
+            levels = self._levels(now)
+            for name, cost in costs.items():
+                levels[name] = min(self.capacities[name], levels[name] + cost)
+            self._state = {name: (level, now) for name, level in levels.items()}
+
+    def drain(self):
+        with self._lock:
+            now = time.time()
+            self._state = {name: (0.0, now) for name in self._state}
+
+
+class SQLiteBucketStore:
+    """Buckets shared across worker processes through one SQLite file."""
+
+    def __init__(self, capacities, path):
+        self.capacities = capacities
+        self.path       = path
+        conn = self._connect()
+        try:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                " name TEXT PRIMARY KEY, level REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+            now = time.time()
+            for name, capacity in capacities.items():
+                conn.execute(
+                    "INSERT OR IGNORE INTO buckets (name, level, updated_at) VALUES (?, ?, ?)",
+                    (name, float(capacity), now),
+                )
+        finally:
+            conn.close()
+
+    def _connect(self):
+        # isolation_level=None → we issue BEGIN IMMEDIATE ourselves so the
+        # read-modify-write below holds the write lock from the start
+        return sqlite3.connect(self.path, timeout=5, isolation_level=None)
+
+    def _update(self, apply):
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            now  = time.time()
+            rows = conn.execute("SELECT name, level, updated_at FROM buckets").fetchall()
+            levels = {
+                name: _refill(level, updated_at, self.capacities[name], now)
+                for name, level, updated_at in rows if name in self.capacities
+            }
+            result = apply(levels)
+            conn.executemany(
+                "UPDATE buckets SET level = ?, updated_at = ? WHERE name = ?",
+                [(level, now, name) for name, level in levels.items()],
+            )
+            conn.execute("COMMIT")
+            return result
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def take(self, costs):
+        def apply(levels):
+            wait = _wait_for(levels, costs, self.capacities)
+            if wait == 0.0:
+                for name, cost in costs.items():
+                    levels[name] -= min(cost, self.capacities[name])
+            return wait
+        return self._update(apply)
+
+    def refund(self, costs):
+        def apply(levels):
+            for name, cost in costs.items():
+                levels[name] = min(self.capacities[name], levels[name] + cost)
+        self._update(apply)
+
+    def drain(self):
+        def apply(levels):
+            for name in levels:
+                levels[name] = 0.0
+        self._update(apply)
+
+
+# ======================================================
+# PRIORITY SCHEDULER
+# ======================================================
+
+class QuotaScheduler:
+    """
+    Hands out bucket capacity in priority order.
+
+    Only the head of the queue (lowest priority number, then
+    arrival order) may take from the buckets, so a waiting
+    interactive call is never starved by a stream of batch calls.
+    """
+
+    def __init__(self, store):
+        self.store   = store
+        self._cond   = threading.Condition()
+        self._queue  = []                   # heap of (priority, seq)
+        self._seq    = itertools.count()
+        self._taking = False                # a store.take() is running
+
+    def _costs(self, tokens):
+        return {
+            name: (1 if name == "requests" else tokens)
+            for name in self.store.capacities
+        }
+
+    def acquire(self, tokens, priority=PRIORITY_INTERACTIVE, deadline=None):
+        """
+        Block until `tokens` (and one request) are reserved.
+
+        deadline is a time.monotonic() value. Returns True once
+        reserved, False if the deadline passed first.
+        """
+        label = PRIORITY_NAMES.get(priority, str(priority))
+        costs = self._costs(tokens)
+        entry = (priority, next(self._seq))
+        start = time.monotonic()
+
+        with self._cond:
+            heapq.heappush(self._queue, entry)
+        try:
+            wait = None
+            while True:
+                with self._cond:
+                    while True:
+                        remaining = None if deadline is None else deadline - time.monotonic()
+                        if remaining is not None and remaining <= 0:
+                            metrics.increment(f"ratelimit.rejected.{label}")
+                            return False
+                        if wait is None and self._queue[0] == entry and not self._taking:
+                            self._taking = True
+                            break
+                        if remaining is not None:
+                            wait = remaining if wait is None else min(wait, remaining)
+                        self._cond.wait(wait)
+                        wait = None
+
+                # The store round-trip (SQLite may sit in its busy
+                # timeout) runs outside _cond — _taking keeps it to one
+                # caller at a time, in queue order
+                try:
+                    wait = self.store.take(costs)
+                finally:
+                    with self._cond:
+                        self._taking = False
+                        self._cond.notify_all()
+
+                if wait == 0.0:
+                    metrics.increment(f"ratelimit.granted.{label}")
+                    metrics.observe(f"ratelimit.wait.{label}", time.monotonic() - start)
+                    return True
+                wait = min(wait, _MAX_POLL_SECONDS)
+        finally:
+            with self._cond:
+                self._queue.remove(entry)
+                heapq.heapify(self._queue)
+                self._cond.notify_all()
+
+    def refund(self, tokens):
+        """Give back a reservation that was never used."""
+        self.store.refund(self._costs(tokens))
+        with self._cond:
+            self._cond.notify_all()
+
+    def drain(self):
+        """Upstream said 429 — empty the buckets so everyone backs off."""
+        metrics.increment("ratelimit.drained")
+        self.store.drain()
+
+
+_scheduler      = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """Process-wide scheduler, or None when both limits are disabled."""
+    global _scheduler
+
+    with _scheduler_lock:
+        if _scheduler is None:
+            capacities = {
+                name: limit
+                for name, limit in (("requests", GEMINI_RPM_LIMIT), ("tokens", GEMINI_TPM_LIMIT))
+                if limit > 0
+            }
+            if not capacities:
+                return None
+
+            store = None
+            if GEMINI_RATE_STORE == "sqlite":
+                try:
+                    store = SQLiteBucketStore(capacities, cache_path("gemini_ratelimit.sqlite3"))
+                except Exception as e:
+                    print(f"⚠️ Shared rate-limit store unavailable ({e}) — using per-process buckets")
+            _scheduler = QuotaScheduler(store or MemoryBucketStore(capacities))
+            print(f"✅ Gemini rate limiter: {capacities} per minute "
+                  f"({type(_scheduler.store).__name__})")
+        return _scheduler
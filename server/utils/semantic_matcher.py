@@ -0,0 +1,532 @@
+# server/utils/semantic_matcher.py
+
+import os
+import re
+import zlib
+import hashlib
+import sqlite3
+import threading
+
+import numpy as np
+
+from utils import metrics
+from utils import match_engine
+from utils.cache_store import cache_path
+from utils.matcher import normalize_text, calculate_match_score
+from utils.prompt_budget import split_sections, SECTION_BOILERPLATE
+
+# Optional: a real sentence-embedding model. Heavy (torch) — only
+# used when installed AND SEMANTIC_MODEL names a model.
+try:
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    SentenceTransformer = None
+
+# ======================================================
+# SEMANTIC MATCHER (CPU, OPTIONAL)
+# calculate_match_score only sees exact SKILL_SET phrases, so
+# "k8s" never matches "kubernetes" and "torch" never matches
+# "pytorch" — those JDs looked like poor fits locally and were
+# left for Gemini to judge.
+#
+#   1. canonicalize(): SKILL_ALIASES rewrites known synonyms to
+#      the canonical skill before anything is scored (two-letter
+#      ones only on skills-list lines)
+#   2. an embedder turns text units (resume lines, JD
+#      requirement lines) into unit vectors:
+#        - HashingEmbedder (default): signed feature hashing of
+#          word uni/bigrams, skill terms up-weighted, numpy only
+#        - ModelEmbedder: sentence-transformers, when installed
+#          and SEMANTIC_MODEL is set (e.g. all-MiniLM-L6-v2)
+#   3. semantic_score = how well each JD requirement is covered
+#      by its closest resume line (+ whole-document similarity)
+#   4. hybrid_score blends that with calculate_match_score run
+#      on the canonicalized texts
+#
+# SemanticIndex keeps per-JD embeddings on disk (SQLite under
+# JOBMORPH_CACHE_DIR) with a random-hyperplane LSH index for
+# approximate nearest-neighbour lookups over stored JDs.
+# ======================================================
+
+SEMANTIC_MATCHER_ENABLED = os.getenv("SEMANTIC_MATCHER_ENABLED", "1") != "0"
+SEMANTIC_MODEL     = os.getenv("SEMANTIC_MODEL", "")
+SEMANTIC_HASH_DIM  = int(os.getenv("SEMANTIC_HASH_DIM", "1024"))
+SEMANTIC_LSH_BITS  = int(os.getenv("SEMANTIC_LSH_BITS", "8"))
+SEMANTIC_LSH_TABLES = int(os.getenv("SEMANTIC_LSH_TABLES", "16"))
+# Below this many docs per user a query scans them all exactly
+SEMANTIC_ANN_MIN_DOCS = int(os.getenv("SEMANTIC_ANN_MIN_DOCS", "2000"))
+
+# semantic_score weights: requirement coverage dominates
+COVERAGE_WEIGHT = 0.7
+DOCUMENT_WEIGHT = 0.3
+
+# hybrid_score = HYBRID_SEMANTIC_WEIGHT × semantic + rest × deterministic
+HYBRID_SEMANTIC_WEIGHT = float(os.getenv("SEMANTIC_HYBRID_WEIGHT", "0.5"))
+
+
+# ======================================================
+# SYNONYMS
+# alias (normalized form) → canonical phrase. Canonical phrases
+# are SKILL_SET entries where one exists, so the deterministic
+# matcher benefits too.
+# ======================================================
+
+SKILL_ALIASES = {
+    "k8s": "kubernetes", "kube": "kubernetes",
+    "torch": "pytorch",
+    "tf2": "tensorflow",
+    "es6": "javascript", "ecmascript": "javascript", "vanilla js": "javascript",
+    "nodejs": "node", "node js": "node",
+    "reactjs": "react", "react js": "react",
+    "expressjs": "express", "express js": "express",
+    "python3": "python", "python 3": "python",
+    "golang": "go",
+    "postgres": "postgresql sql", "postgresql": "postgresql sql", "psql": "postgresql sql",
+    "mysql": "mysql sql", "mssql": "sql server sql", "t sql": "sql",
+    "amazon web services": "aws",
+    "google cloud platform": "gcp", "google cloud": "gcp",
+    "microsoft azure": "azure", "ms azure": "azure",
+    "machine learning": "machine learning ml",
+    "deep learning": "deep learning ml",
+    "artificial intelligence": "ai",
+    "llms": "llm", "large language models": "llm large language model",
+    "large language model": "llm large language model",
+    "gen ai": "generative ai genai", "genai": "generative ai genai",
+    "generative ai": "generative ai genai",
+    "restful": "rest api", "restful api": "rest api", "restful apis": "rest api",
+    "rest apis": "rest api", "apis": "api",
+    "huggingface": "hugging face",
+    "llama index": "llamaindex", "lang chain": "langchain",
+    "vector store": "vector database", "vectordb": "vector database",
+    "vector stores": "vector database", "vector databases": "vector database",
+    "sklearn": "scikit learn",
+    "front end": "frontend", "back end": "backend",
+    "fullstack": "full stack",
+    "finetuning": "fine tuning",
+    "natural language processing": "natural language processing nlp",
+    "nlp": "natural language processing nlp",
+}
+
+# Two-letter aliases are everyday tokens too ("DL" driving licence,
+# a "TS/SCI" clearance) — only rewritten on skills-list lines
+SHORT_SKILL_ALIASES = {
+    "js": "javascript", "ts": "typescript", "py": "python",
+    "ml": "machine learning ml", "dl": "deep learning ml", "hf": "hugging face",
+}
+
+_LIST_ALIASES = {**SKILL_ALIASES, **SHORT_SKILL_ALIASES}
+
+# Part of the vector index signature — stored embeddings depend on it
+ALIASES_VERSION = hashlib.sha256(repr(sorted(_LIST_ALIASES.items())).encode("utf-8")).hexdigest()[:12]
+
+
+def _alias_re(aliases):
+    return re.compile(r"\b(" + "|".join(re.escape(a) for a in sorted(aliases, key=len, reverse=True)) + r")\b")
+
+
+_ALIAS_RE       = _alias_re(SKILL_ALIASES)
+_SHORT_ALIAS_RE = _alias_re(SHORT_SKILL_ALIASES)
+_LIST_ALIAS_RE  = _alias_re(_LIST_ALIASES)
+
+_LIST_SEPARATOR = re.compile(r"[,|;/•·]")
+_LIST_LABEL     = re.compile(
+    r"^\W*(skills?|technical skills|tech stack|technologies|tools|languages|frameworks)\b[^:]{0,20}:",
+    re.IGNORECASE,
+)
+
+
+def _is_skills_list(line):
+    """
+    'Skills: ...' lines, or 3+ short separated items one of which is
+    a known skill (a two-letter alias alone doesn't count).
+    """
+    if _LIST_LABEL.match(line):
+        return True
+    items = [item for item in (normalize_text(p) for p in _LIST_SEPARATOR.split(line)) if item]
+    if len(items) < 3 or any(len(item.split(" ")) > 3 for item in items):
+        return False
+    return any(item in _SKILL_TERMS or item in SKILL_ALIASES for item in items)
+
+
+def canonicalize(text):
+    """normalize_text() with every known alias replaced by its canonical skill."""
+    lines = []
+    for line in (text or "").splitlines():
+        normalized = normalize_text(line)
+        if not normalized:
+            continue
+        if _SHORT_ALIAS_RE.search(normalized) and _is_skills_list(line):
+            lines.append(_LIST_ALIAS_RE.sub(lambda m: _LIST_ALIASES[m.group(1)], normalized))
+        else:
+            lines.append(_ALIAS_RE.sub(lambda m: SKILL_ALIASES[m.group(1)], normalized))
+    return " ".join(lines)
+
+
+# ======================================================
+# EMBEDDERS
+# ======================================================
+
+_STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or our that the their this to
+we will with you your who what which able ability strong good excellent experience years year
+work working team teams using use including such etc plus must should would can
+""".split())
+
+_SKILL_TERMS = frozenset(match_engine.VOCABULARY)
+
+
+class HashingEmbedder:
+    """
+    Signed feature hashing of word unigrams + bigrams (sublinear tf),
+    L2-normalised. Stateless and deterministic across processes
+    (crc32, not the salted built-in hash()).
+    """
+
+    name = "hashing"
+
+    def __init__(self, dim=SEMANTIC_HASH_DIM, skill_weight=2.0):
+        self.dim          = dim
+        self.skill_weight = skill_weight
+
+    @property
+    def signature(self):
+        return f"hashing-{self.dim}-{self.skill_weight}"
+
+    def _features(self, text):
+        tokens = [t for t in canonicalize(text).split(" ") if t and t not in _STOPWORDS]
+        feats  = {}
+        for i, tok in enumerate(tokens):
+            weight = self.skill_weight if tok in _SKILL_TERMS else 1.0
+            feats[tok] = feats.get(tok, 0.0) + weight
+            if i + 1 < len(tokens):
+                bigram = tok + " " + tokens[i + 1]
+                weight = self.skill_weight if bigram in _SKILL_TERMS else 0.5
+                feats[bigram] = feats.get(bigram, 0.0) + weight
+        return feats
+
+    def embed(self, texts):
+        rows, hashes, weights = [], [], []
+        for row, text in enumerate(texts):
+            for feat, tf in self._features(text).items():
+                rows.append(row)
+                hashes.append(zlib.crc32(feat.encode("utf-8")))
+                weights.append(tf)
+
+        hashes  = np.array(hashes, dtype=np.int64)
+        signs   = np.where(hashes & 0x80000000, 1.0, -1.0)
+        matrix  = np.zeros((len(texts), self.dim), dtype=np.float32)
+        np.add.at(matrix, (np.array(rows, dtype=np.int64), hashes % self.dim),
+                  signs * (1.0 + np.log(np.array(weights, dtype=np.float64))))
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms > 0, norms, 1.0)
+
+
+class ModelEmbedder:
+    """sentence-transformers model on CPU (texts are canonicalized first)."""
+
+    name = "model"
+
+    def __init__(self, model_name):
+        self.model_name = model_name
+        self._model     = SentenceTransformer(model_name, device="cpu")
+        self.dim        = self._model.get_sentence_embedding_dimension()
+
+    @property
+    def signature(self):
+        return f"model-{self.model_name}"
+
+    def embed(self, texts):
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        vectors = self._model.encode([canonicalize(t) for t in texts], normalize_embeddings=True)
+        return np.asarray(vectors, dtype=np.float32)
+
+
+_embedder      = None
+_embedder_lock = threading.Lock()
+
+
+def get_embedder():
+    """Process-wide embedder: the model if configured and loadable, else hashing."""
+    global _embedder
+    with _embedder_lock:
+        if _embedder is None:
+            if SEMANTIC_MODEL and SentenceTransformer is not None:
+                try:
+                    _embedder = ModelEmbedder(SEMANTIC_MODEL)
+                except Exception as e:
+                    print(f"⚠️ Semantic model {SEMANTIC_MODEL} unavailable ({e}) — using hashing embedder")
+            if _embedder is None:
+                _embedder = HashingEmbedder()
+            print(f"✅ Semantic embedder: {_embedder.signature}")
+        return _embedder
+
+
+# ======================================================
+# TEXT UNITS
+# ======================================================
+
+def _units(lines):
+    units = []
+    for line in lines:
+        line = line.strip(" \t-*•·▪◦●–—>")
+        if len(line.split()) >= 2:
+            units.append(line)
+    return units
+
+
+def resume_units(resume_text):
+    """One unit per non-trivial resume line / bullet."""
+    return _units((resume_text or "").splitlines()) or [resume_text or ""]
+
+
+def jd_units(jd_text):
+    """Requirement-bearing JD lines (boilerplate sections dropped)."""
+    lines = [
+        line
+        for kind, section in split_sections(jd_text)
+        if kind != SECTION_BOILERPLATE
+        for line in section
+    ]
+    return _units(lines) or [jd_text or ""]
+
+
+class Prepared:
+    """Embedded form of one document: unit vectors + whole-document vector."""
+
+    __slots__ = ("units", "document", "skills")
+
+    def __init__(self, units, document, skills):
+        self.units    = units      # (n_units × dim) float32, rows L2-normalised
+        self.document = document   # (dim,) float32, L2-normalised mean of units
+        self.skills   = skills     # match_engine vector of the canonicalized text
+
+
+def prepare(text, kind, embedder=None):
+    """kind: "resume" or "jd"."""
+    embedder = embedder or get_embedder()
+    units    = resume_units(text) if kind == "resume" else jd_units(text)
+    with metrics.timer("semantic.embed"):
+        matrix = embedder.embed(units)
+    # Document vector = normalised mean of the units (no second pass over the text)
+    document = matrix.sum(axis=0)
+    norm     = np.linalg.norm(document)
+    return Prepared(matrix, document / norm if norm > 0 else document,
+                    match_engine.encode(canonicalize(text)))
+
+
+# ======================================================
+# SCORING
+# ======================================================
+
+def semantic_score(resume, jd):
+    """
+    0–100 from two Prepared documents.
+
+    coverage: mean over JD requirement units of the best cosine
+    similarity to any resume unit; document: whole-text cosine.
+    """
+    if len(jd.units) == 0 or len(resume.units) == 0:
+        return 0.0, 0.0, 0.0
+    coverage = float(np.clip(jd.units @ resume.units.T, 0, 1).max(axis=1).mean())
+    document = float(np.clip(jd.document @ resume.document, 0, 1))
+    score    = 100 * (COVERAGE_WEIGHT * coverage + DOCUMENT_WEIGHT * document)
+    return round(score, 2), round(coverage, 4), round(document, 4)
+
+
+def semantic_match_score(resume_text, jd_text):
+    """
+    Like calculate_match_score(), plus the semantic view.
+
+    Returns calculate_match_score() on the canonicalized texts
+    (so "k8s" counts as kubernetes) with semantic_score,
+    coverage, document_similarity and hybrid_score added.
+    """
+    resume = prepare(resume_text, "resume")
+    jd     = prepare(jd_text, "jd")
+
+    result = calculate_match_score(canonicalize(resume_text), canonicalize(jd_text))
+    score, coverage, document = semantic_score(resume, jd)
+    result.update({
+        "semantic_score":      score,
+        "coverage":            coverage,
+        "document_similarity": document,
+        "hybrid_score":        hybrid(result["final_score"], score),
+    })
+    return result
+
+
+def hybrid(deterministic, semantic):
+    return round((1 - HYBRID_SEMANTIC_WEIGHT) * deterministic + HYBRID_SEMANTIC_WEIGHT * semantic, 2)
+
+
+# ======================================================
+# ON-DISK VECTOR INDEX (LSH)
+# ======================================================
+
+class SemanticIndex:
+    """
+    Per-user JD embeddings in SQLite with random-hyperplane LSH.
+
+    Each of SEMANTIC_LSH_TABLES tables hashes the document vector
+    to SEMANTIC_LSH_BITS sign bits; a query looks up its own
+    bucket plus every 1-bit neighbour in each table (multi-probe)
+    and re-ranks the union by exact cosine. Hyperplanes come from
+    a fixed seed, so only vectors and buckets are stored; a
+    different embedder/shape wipes the index (it's a cache —
+    entries are rebuilt from JD text on demand). Users with fewer
+    than SEMANTIC_ANN_MIN_DOCS docs are scanned exactly — at that
+    size a full scan is cheaper than the probe join.
+    """
+
+    def __init__(self, path, embedder=None, bits=SEMANTIC_LSH_BITS,
+                 tables=SEMANTIC_LSH_TABLES, seed=13):
+        self.path     = path
+        self.embedder = embedder or get_embedder()
+        self.bits     = bits
+        self.tables   = tables
+        rng = np.random.default_rng(seed)
+        self._planes  = rng.standard_normal((tables, bits, self.embedder.dim)).astype(np.float32)
+        self._weights = (1 << np.arange(bits)).astype(np.int64)
+        self.signature = f"{self.embedder.signature}|aliases-{ALIASES_VERSION}|lsh-{bits}x{tables}-{seed}"
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            row = conn.execute("SELECT value FROM meta WHERE key = 'signature'").fetchone()
+            if row is None or row[0] != self.signature:
+                conn.execute("DROP TABLE IF EXISTS docs")
+                conn.execute("DROP TABLE IF EXISTS buckets")
+                conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('signature', ?)",
+                             (self.signature,))
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS docs ("
+                " user_id TEXT NOT NULL, doc_id TEXT NOT NULL, document BLOB NOT NULL,"
+                " units BLOB NOT NULL, skills BLOB NOT NULL, PRIMARY KEY (user_id, doc_id))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                " user_id TEXT NOT NULL, tbl INTEGER NOT NULL, bucket INTEGER NOT NULL,"
+                " doc_id TEXT NOT NULL, PRIMARY KEY (user_id, tbl, bucket, doc_id))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS buckets_doc ON buckets (user_id, doc_id)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=5)
+
+    def _keys(self, vector):
+        bits = (self._planes @ vector) > 0                # (tables × bits)
+        return (bits.astype(np.int64) * self._weights).sum(axis=1)
+
+    def add(self, user_id, doc_id, text):
+        return self.add_many(user_id, [(doc_id, text)])[doc_id]
+
+    def add_many(self, user_id, items):
+        """Embed and store [(doc_id, text)] in one transaction; returns {doc_id: Prepared}."""
+        prepared = {doc_id: prepare(text, "jd", self.embedder) for doc_id, text in items}
+        with self._connect() as conn:
+            for doc_id, jd in prepared.items():
+                conn.execute("DELETE FROM buckets WHERE user_id = ? AND doc_id = ?", (user_id, doc_id))
+                conn.execute(
+                    "INSERT OR REPLACE INTO docs (user_id, doc_id, document, units, skills)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (user_id, doc_id, jd.document.astype(np.float16).tobytes(),
+                     jd.units.astype(np.float16).tobytes(),
+                     match_engine.pack_row(jd.skills)),
+                )
+                conn.executemany(
+                    "INSERT OR IGNORE INTO buckets (user_id, tbl, bucket, doc_id) VALUES (?, ?, ?, ?)",
+                    [(user_id, t, int(k), doc_id) for t, k in enumerate(self._keys(jd.document))],
+                )
+        return prepared
+
+    def remove(self, user_id, doc_id):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM docs WHERE user_id = ? AND doc_id = ?", (user_id, doc_id))
+            conn.execute("DELETE FROM buckets WHERE user_id = ? AND doc_id = ?", (user_id, doc_id))
+
+    def missing(self, user_id, doc_ids):
+        """Subset of doc_ids not in the index yet."""
+        if not doc_ids:
+            return []
+        marks = ",".join("?" * len(doc_ids))
+        with self._connect() as conn:
+            present = {r[0] for r in conn.execute(
+                f"SELECT doc_id FROM docs WHERE user_id = ? AND doc_id IN ({marks})",
+                (user_id, *doc_ids),
+            )}
+        return [d for d in doc_ids if d not in present]
+
+    def query(self, user_id, vector, limit, exact=None):
+        """
+        [(doc_id, cosine)] — top `limit` by document vector.
+        Approximate (LSH) once the user has SEMANTIC_ANN_MIN_DOCS
+        docs, exact below that or when exact=True.
+        """
+        with self._connect() as conn:
+            if exact is None:
+                count = conn.execute("SELECT COUNT(*) FROM docs WHERE user_id = ?",
+                                     (user_id,)).fetchone()[0]
+                exact = count < SEMANTIC_ANN_MIN_DOCS
+
+            if exact:
+                rows = conn.execute("SELECT doc_id, document FROM docs WHERE user_id = ?",
+                                    (user_id,)).fetchall()
+            else:
+                clauses, params = [], [user_id]
+                for t, key in enumerate(self._keys(vector)):
+                    key     = int(key)
+                    buckets = [key] + [key ^ (1 << b) for b in range(self.bits)]
+                    clauses.append(
+                        "SELECT doc_id FROM buckets WHERE user_id = ? AND tbl = ?"
+                        f" AND bucket IN ({','.join('?' * len(buckets))})"
+                    )
+                    params.extend([user_id, t, *buckets])
+                rows = conn.execute(
+                    "SELECT doc_id, document FROM docs WHERE user_id = ? AND doc_id IN ("
+                    + " UNION ".join(clauses) + ")",
+                    params,
+                ).fetchall()
+
+        metrics.increment("semantic.exact_queries" if exact else "semantic.ann.queries")
+        metrics.increment("semantic.ann.candidates", len(rows))
+        if not rows:
+            return []
+        matrix = np.frombuffer(b"".join(r[1] for r in rows), dtype=np.float16)
+        sims   = matrix.reshape(len(rows), -1).astype(np.float32) @ vector
+        order  = np.argsort(-sims)[:limit]
+        return [(rows[i][0], float(sims[i])) for i in order]
+
+    def load(self, user_id, doc_ids):
+        """{doc_id: Prepared} for the indexed subset of doc_ids."""
+        if not doc_ids:
+            return {}
+        marks = ",".join("?" * len(doc_ids))
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT doc_id, document, units, skills FROM docs"
+                f" WHERE user_id = ? AND doc_id IN ({marks})",
+                (user_id, *doc_ids),
+            ).fetchall()
+
+        dim, loaded = self.embedder.dim, {}
+        for doc_id, document, units, skills in rows:
+            loaded[doc_id] = Prepared(
+                np.frombuffer(units, dtype=np.float16).reshape(-1, dim).astype(np.float32),
+                np.frombuffer(document, dtype=np.float16).astype(np.float32),
+                match_engine.unpack_rows([skills])[0],
+            )
+        return loaded
+
+
+_index      = None
+_index_lock = threading.Lock()
+
+
+def get_semantic_index():
+    """Process-wide on-disk index (created on first use)."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = SemanticIndex(cache_path("semantic_index.sqlite3"))
+        return _index
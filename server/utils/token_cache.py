@@ -0,0 +1,96 @@
+# server/utils/token_cache.py
+
+import os
+import time
+import hashlib
+
+from firebase_admin import auth
+
+from utils import metrics
+from utils.cache_store import LRUCache
+
+# ======================================================
+# SHARED FIREBASE ID-TOKEN VERIFIER
+# Every route verifies tokens through verify_id_token() below.
+#
+# ✅ PERF: app.py, upload, batch_matcher, verify_cert and
+# interview_prep each called auth.verify_id_token() on every
+# request — signature check plus key lookup — although the
+# frontend resends the same ID token for up to an hour.
+#
+# Now the decoded claims are kept in a bounded LRU:
+#   - keyed by sha256(token), so raw tokens never sit in memory
+#     as dict keys
+#   - each entry expires TOKEN_CACHE_EXP_SKEW_SECONDS before the
+#     token's own `exp`, capped at TOKEN_CACHE_MAX_TTL_SECONDS
+#   - only successful verifications are cached; failures always
+#     go back to Firebase so callers keep their error branches
+#   - check_revoked=True bypasses the cache (revocation needs a
+#     live lookup by definition)
+# ======================================================
+
+TOKEN_CACHE_MAX_ENTRIES      = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", "2048"))
+TOKEN_CACHE_MAX_TTL_SECONDS  = int(os.getenv("TOKEN_CACHE_MAX_TTL_SECONDS", "3600"))
+TOKEN_CACHE_EXP_SKEW_SECONDS = int(os.getenv("TOKEN_CACHE_EXP_SKEW_SECONDS", "30"))
+
+_token_cache = (
+    LRUCache(max_entries=TOKEN_CACHE_MAX_ENTRIES)
+    if TOKEN_CACHE_MAX_ENTRIES > 0 and TOKEN_CACHE_MAX_TTL_SECONDS > 0 else None
+)
+
+
+def _token_key(token):
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def _claims_ttl(decoded):
+    """Seconds the claims may be reused, or 0 if they should not be cached."""
+    try:
+        exp = float(decoded.get("exp"))
+    except (TypeError, ValueError):
+        return 0
+    return max(0, min(exp - time.time() - TOKEN_CACHE_EXP_SKEW_SECONDS,
+                      TOKEN_CACHE_MAX_TTL_SECONDS))
+
+
+def verify_id_token(token, check_revoked=False):
+    """
+    Drop-in for firebase_admin.auth.verify_id_token().
+
+    Returns the decoded claims dict. Raises the same auth.* errors
+    (ExpiredIdTokenError, InvalidIdTokenError, ...) on failure.
+    """
+    if _token_cache is None or check_revoked:
+        return auth.verify_id_token(token, check_revoked=check_revoked)
+
+    key     = _token_key(token)
+    decoded = _token_cache.get(key)
+    if decoded is not None:
+        metrics.increment("auth.token_cache.hit")
+        return dict(decoded)
+
+    metrics.increment("auth.token_cache.miss")
+    with metrics.timer("auth.verify_id_token"):
+        decoded = auth.verify_id_token(token, check_revoked=False)
+
+    ttl = _claims_ttl(decoded)
+    if ttl > 0:
+        _token_cache.set(key, dict(decoded), ttl_seconds=ttl)
+    return decoded
+
+
+def token_cache_stats():
+    """Size and hit rate for GET /metrics."""
+    if _token_cache is None:
+        return {"enabled": False}
+
+    counters = metrics.snapshot()["counters"]
+    hits     = counters.get("auth.token_cache.hit", 0)
+    misses   = counters.get("auth.token_cache.miss", 0)
+    return {
+        "enabled":  True,
+        "entries":  len(_token_cache),
+        "hits":     hits,
+        "misses":   misses,
+        "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+    }